@@ -1,16 +1,99 @@
 # Import streamlit to make frontend components
 import streamlit as st
+# to measure how long each tab takes to render
+import time
+# the view modules are imported when their tab is first rendered
+import importlib
+import sys
+import threading
 
-# Import functions from other files, where the View is created
-from dashboard import dashschedule, dashresults, dashreqs
-from architecture import sysarcfunc
-from issues import sysissues
 # from home import homefunc, progmgmtfunc
-from orbit import orbitfunc
+from ingest import ReportWatcher, WATCH_INTERVAL
+from tabs import TAB_VIEWS, TAB_REPORTS
+import diagnostics
 
 # Set page configuration, page title is the titlebar content, icon also appears on title bar
 st.set_page_config(page_title="CatSat Dashboard", page_icon="🛰️", layout="wide")
 
+# the Diagnostics tab is opt-in: set DIAGNOSTICS, or open the app with ?diagnostics=1.
+# recording is process-wide once turned on, so the tab shows the views of every session
+DIAGNOSTICS = False
+# JSONL file the records are also appended to, None keeps them in memory only
+DIAGNOSTICS_TRACE_FILE = None
+
+# reload the reports when the pipeline rewrites them, and refresh the open tabs that show them
+LIVE_RELOAD = True
+
+# import the orbital mechanics stack on a background thread once the header is drawn, so the Orbit tab
+# finds it loaded. The modules are imported in this order, the first one that fails stops the prefetch
+PREFETCH = True
+PREFETCH_MODULES = ["astropy.units", "astropy.time", "poliastro.bodies", "poliastro.twobody", "orbit"]
+
+# "lazy" renders only the selected tab, each in its own fragment
+# "tabs" is the original st.tabs layout, where every tab runs on every rerun
+TAB_MODE = "lazy"
+
+
+def load_view(module, function):
+    """Return a view function, importing its module on first use."""
+    with diagnostics.span("import", module) as record:
+        record["cache"] = "hit" if module in sys.modules else "miss"
+        return getattr(importlib.import_module(module), function)
+
+
+def _prefetch():
+    for module in PREFETCH_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            # e.g. poliastro is not installed, the Orbit tab reports it when it is opened
+            return
+
+
+# one prefetch per server process
+@st.cache_resource
+def prefetch():
+    thread = threading.Thread(target=_prefetch, name="prefetch", daemon=True)
+    thread.start()
+    return thread
+
+
+# runs the views of one tab as a fragment, so a widget change inside the tab
+# (e.g. the "Select view" selectbox) reruns this tab only, not the whole page
+@st.fragment
+def render_tab(name):
+    start = time.perf_counter()
+    for module, function in TAB_VIEWS[name]:
+        view = load_view(module, function)
+        with diagnostics.span("view", function):
+            view()
+    elapsed = (time.perf_counter() - start) * 1000
+
+    # keep the latest render time of each tab for this session
+    st.session_state.setdefault("tab_timings", {})[name] = elapsed
+    st.caption(f"{name} rendered in {elapsed:.0f} ms")
+
+
+# one watcher per server process, shared by every session
+@st.cache_resource
+def report_watcher():
+    return ReportWatcher().start()
+
+
+# polls the shared watcher, a cheap dict compare, and reruns the page only when a report
+# of the open tab changed. In lazy mode the rerun executes that tab only
+@st.fragment(run_every=WATCH_INTERVAL)
+def watch_reports(active):
+    watcher = report_watcher()
+    seen = st.session_state.setdefault("report_revisions", watcher.snapshot())
+    changed = watcher.changed_since(seen)
+    if not changed:
+        return
+    st.session_state["report_revisions"] = watcher.snapshot()
+    if set(changed) & set(TAB_REPORTS[active]):
+        st.rerun()
+
+
 # main entrypoint of the application, gets called when the app runs
 def main():
 
@@ -18,23 +101,31 @@ def main():
     st.header("🛰️ CubeSat Mission Dashboard", divider="red")
 
     # create the list of tabs in a list
-    TABS = ["Requirements", "Architecture", "Orbit",  "Test Strategy", "Warnings/Issues"]
+    TABS = list(TAB_VIEWS.keys())
+    if DIAGNOSTICS or st.query_params.get("diagnostics") == "1":
+        diagnostics.enable(True, DIAGNOSTICS_TRACE_FILE)
+        diagnostics.install_chart_hooks(st)
+    else:
+        TABS.remove("Diagnostics")
+    if PREFETCH:
+        prefetch()
+
+    if TAB_MODE == "lazy":
+        # st.tabs executes every tab, so a horizontal radio picks the one tab to run
+        active = st.radio("Tab", TABS, horizontal=True, label_visibility="collapsed", key="active_tab")
+        if LIVE_RELOAD:
+            watch_reports(active)
+        render_tab(active)
+        return
+
     # pass the list to make a tab component
     tabs = st.tabs(TABS)
 
-    # call each tab and call the function that containes the Page view under the tab section
-    with tabs[0]:
-        dashreqs()
-    with tabs[1]:
-        sysarcfunc()
-    with tabs[2]:
-        orbitfunc()
-    with tabs[3]:
-        dashschedule()
-        dashresults()
-    with tabs[4]:
-        # issues/warnings tab view
-        sysissues()
+    # call each tab and call the functions that contain the Page view under the tab section
+    for tab, name in zip(tabs, TABS):
+        with tab:
+            for module, function in TAB_VIEWS[name]:
+                load_view(module, function)()
 
 
 if __name__ == "__main__":
@@ -1,121 +1,125 @@
-import streamlit as st
 import pandas as pd
+import streamlit as st
 
-# for making UML diagrams
-import graphviz
+from reportstore import load_report, report_version
+from impact import impact_index
+from graphbuilder import (DEFAULT_DEPTH, GraphBuilder, graph_builder, graph_source, graph_svg, hierarchy_source,
+                          hierarchy_svg)
 
 
-# ########## ARCHITECTURE VIEW FUNCTION
-def sysarcfunc():
-    # read the data for the architecture
-    function = pd.read_csv("reports/FunctionalArchitecture.csv", index_col=0)
-    system = pd.read_csv("reports/Query2_SystemArchitecture.csv", index_col=0)
-    environment = pd.read_csv("reports/Environment.csv", index_col=0)
-    mission = pd.read_csv("reports/Query1_MissionArchitecture 1.csv", index_col=0)
-    moe = pd.read_csv("reports/Query4_MOEs.csv", index_col=0)
-
-    # Make a dropdown selection menu, with a title, and list of options. 
-    # this component returns the variable that is selected
-    graphchoice = st.selectbox("Select view", ["Functional Architechture", "System Architechture", "Missions",
-                                                            "MOE", "Environments"], index=0)
-
-    # initiate a empty diagraph
-    dot = graphviz.Digraph(comment='Hierarchy', strict=True)
-    
-    # take each option, and design the graph, if the option is selected
-    if graphchoice == "Functional Architechture":
-        # make the graph
-        for index, row in function.iterrows():
-            func = row['Function']
-            super_func = row['SuperFunction']
-            allocated_to = row['AllocatedTo']
-            
-            # Add the function node
-            dot.node(func)
-            
+# graph builders for each view, each takes the report of the view and returns a GraphBuilder
+def functional_graph(function):
+    return (GraphBuilder()
+            # Add the function nodes
+            .nodes(function["Function"])
             # Add edge from SuperFunction to Function if SuperFunction exists
-            if pd.notna(super_func):
-                dot.edge(super_func, func, label="has function")
-            
-            # Add AllocatedTo node and edge if it doesn't already exist
-            if pd.notna(allocated_to):
-                if allocated_to not in dot.body:
-                    dot.node(allocated_to, shape='box')
-                dot.edge(func, allocated_to, label="function allocated to")
-        
-        # call the diagraph chart using streamlit component
-        st.graphviz_chart(dot, True)
-    
-    elif graphchoice == "System Architechture":
-        for index, row in system.iterrows():
-            sys = row["SystemName"]
-            subsys = row["SubsystemName"]
-            subsubsys = row["SubsubsystemName"]
-
-            if pd.notna(sys):
-                dot.node(sys)
-
-            if pd.notna(subsys):
-                if subsys not in dot.body:
-                    dot.node(subsys)
-                if pd.notna(sys):
-                    dot.edge(sys, subsys, label="has subsystem")
-            
-            if pd.notna(subsubsys):
-                if subsubsys not in dot.body:
-                    dot.node(subsubsys, shape="box")
-                if pd.notna(subsys):
-                    dot.edge(subsys, subsubsys, label="has subsubsystem")  
-        st.graphviz_chart(dot, True)
-    
-    elif graphchoice == "Environments":
-        for index, row in environment.iterrows():
-            mission = row["Mission"]
-            env = row["Environment"]
-            entity = row["EnvironmentalEntity"]
-
-            dot.node(mission)
-
-            if pd.notna(env):
-                dot.edge(mission, env, label="has environment")
-            if pd.notna(entity):
-                dot.edge(env, entity, label="has environment entity")
-        st.graphviz_chart(dot, True)
-    
-    elif graphchoice == "Missions":
-        for index, row in  mission.iterrows():
-            program = row["ProgramName"]
-            missname = row["MissionName"]
-            misscomp = row["MissionComponentName"]
-            subsys = row["SubsystemName"]
-
-            dot.node(program)
-
-            if pd.notna(missname):
-                if missname not in dot.body:
-                    dot.node(missname)
-                dot.edge(program, missname, label="has mission")
-            if pd.notna(misscomp):
-                dot.node(misscomp, shape="box")
-                # dot.edge(missname, misscomp, arrowhead="diamond", label="has component")
-                dot.edge(missname, misscomp, label="has component")
-            if pd.notna(subsys):
-                # dot.edge(misscomp, subsys, arrowhead="vee", label="has subsystem")
-                dot.edge(misscomp, subsys,  label="has subsystem")
-        st.graphviz_chart(dot, True)
-    
-    elif graphchoice == "MOE":
-        for index, row in moe.iterrows():
-            missname = row["MissionName"]
-            moename = row["MOEName"]
-
-            dot.node(missname)
-
-            if pd.notna(moename):
-                dot.edge(missname, moename, label="has moe")
-        st.graphviz_chart(dot, True)
-    
-
-
+            .edges(function["SuperFunction"], function["Function"], label="has function")
+            # Add AllocatedTo nodes and edges
+            .nodes(function["AllocatedTo"], shape="box")
+            .edges(function["Function"], function["AllocatedTo"], label="function allocated to"))
+
+
+def system_graph(system):
+    return (GraphBuilder()
+            .nodes(system["SystemName"])
+            .nodes(system["SubsystemName"])
+            .edges(system["SystemName"], system["SubsystemName"], label="has subsystem")
+            .nodes(system["SubsubsystemName"], shape="box")
+            .edges(system["SubsystemName"], system["SubsubsystemName"], label="has subsubsystem"))
+
+
+def environment_graph(environment):
+    return (GraphBuilder()
+            .nodes(environment["Mission"])
+            .edges(environment["Mission"], environment["Environment"], label="has environment")
+            .edges(environment["Environment"], environment["EnvironmentalEntity"], label="has environment entity"))
+
+
+def mission_graph(mission):
+    return (GraphBuilder()
+            .nodes(mission["ProgramName"])
+            .nodes(mission["MissionName"])
+            .edges(mission["ProgramName"], mission["MissionName"], label="has mission")
+            .nodes(mission["MissionComponentName"], shape="box")
+            .edges(mission["MissionName"], mission["MissionComponentName"], label="has component")
+            .edges(mission["MissionComponentName"], mission["SubsystemName"], label="has subsystem"))
+
+
+def moe_graph(moe):
+    return (GraphBuilder()
+            .nodes(moe["MissionName"])
+            .edges(moe["MissionName"], moe["MOEName"], label="has moe"))
+
+
+# view name -> (report, graph builder)
+VIEWS = {
+    "Functional Architechture": ("FunctionalArchitecture.csv", functional_graph),
+    "System Architechture": ("Query2_SystemArchitecture.csv", system_graph),
+    "Missions": ("Query1_MissionArchitecture 1.csv", mission_graph),
+    "MOE": ("Query4_MOEs.csv", moe_graph),
+    "Environments": ("Environment.csv", environment_graph),
+}
+# how a view is drawn: collapsed below a depth with the chosen nodes expanded, or every node at once
+MODES = ["Hierarchical", "Full graph"]
+# the deepest level the depth input goes to
+MAX_DEPTH = 6
+# kinds of affected elements counted above the impact table, and their labels
+IMPACT_METRICS = {"function": "Functions", "requirement": "Requirements", "test": "Tests", "moe": "MOEs"}
 
 
+# ########## ARCHITECTURE VIEW FUNCTION
+def sysarcfunc():
+    # Make a dropdown selection menu, with a title, and list of options.
+    # this component returns the variable that is selected
+    graphchoice = st.selectbox("Select view", list(VIEWS.keys()), index=0)
+
+    # only the report behind the selected view is read from the report store
+    report, build = VIEWS[graphchoice]
+    data = load_report(report, copy=False)
+    # the graph caches are keyed by the report's content hash, the data is not hashed again on every rerun
+    version = report_version(report)
+
+    mode = st.radio("Mode", MODES, horizontal=True)
+    if mode == "Full graph":
+        # the DOT source and layout are cached per (view, data content), so they are only rebuilt when the report changes
+        svg = graph_svg(graphchoice, data, build, version)
+        source = lambda: graph_source(graphchoice, data, build, version)
+    else:
+        col1, col2 = st.columns([0.2, 0.8])
+        depth = col1.number_input("Depth", min_value=0, max_value=MAX_DEPTH, value=DEFAULT_DEPTH)
+        # the nodes that have a subtree, in graph order. the choice is kept per view for the session
+        children = graph_builder(graphchoice, data, build, version).children()
+        expanded = col2.multiselect("Expand nodes", list(children), key=f"expanded_{graphchoice}")
+        # the layout is computed on the server and cached per (view, data content, expanded nodes, depth)
+        # for all sessions, so only a new expansion runs dot
+        svg = hierarchy_svg(graphchoice, data, build, expanded, depth, version)
+        source = lambda: hierarchy_source(graphchoice, data, build, expanded, depth, version)
+
+    if svg is not None:
+        st.image(svg, use_column_width=True)
+    else:
+        # no dot executable on the server: the browser lays out the DOT source
+        st.graphviz_chart(source(), True)
+
+    impactfunc()
+
+
+# ########## IMPACT ANALYSIS FUNCTION
+def impactfunc():
+    with st.expander("Impact analysis"):
+        # the closures of all the elements are computed once per version of the reports, a choice is a lookup
+        index = impact_index()
+        kinds = index.source_kinds()
+        if not kinds:
+            st.write("No linked elements in the reports")
+            return
+        col1, col2 = st.columns([0.3, 0.7])
+        kind = col1.selectbox("Kind", kinds, index=kinds.index("subsystem") if "subsystem" in kinds else 0)
+        name = col2.selectbox("Changed or failed element", index.sources(kind))
+
+        affected = index.affected(name)
+        for col, (kind, label) in zip(st.columns(len(IMPACT_METRICS)), IMPACT_METRICS.items()):
+            col.metric(f"Affected {label}", len(affected.get(kind, [])))
+        table = pd.DataFrame([(kind, element) for kind, elements in affected.items() for element in elements],
+                             columns=["Kind", "Element"])
+        st.dataframe(table, hide_index=True, use_container_width=True)
@@ -0,0 +1,175 @@
+"""
+Headless benchmarks of the dashboard views on synthetic reports.
+
+    python -m benchmarks.run --scales 10 100 1000
+    python -m benchmarks.run --save-baseline
+    python -m benchmarks.run --baseline benchmarks/baseline.json --tolerance 0.25
+    python -m benchmarks.run --backend triples
+
+Each view runs against the recording streamlit stub, once cold (report store cleared) and
+then warm. Wall time, peak Python memory (tracemalloc) and the serialized payload of the
+emitted elements are recorded. With a baseline, any metric that grows by more than the
+tolerance is flagged and the command exits with status 1. With --backend triples the query
+reports are computed from a model file exported from the synthetic reports, cold runs include
+parsing the triples.
+"""
+import argparse
+import importlib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.stubstreamlit import StreamlitStub
+from benchmarks.synthetic import generate_reports
+
+# the views import streamlit at module level, so the stub has to be installed first
+st = StreamlitStub()
+sys.modules["streamlit"] = st
+
+import reportstore  # noqa: E402
+import triplestore  # noqa: E402
+
+# benchmark name -> (module, view function, {widget label: choice})
+VIEWS = {
+    "dashreqs": ("dashboard", "dashreqs", {}),
+    "sysarcfunc[Functional Architechture]": ("architecture", "sysarcfunc", {"Select view": "Functional Architechture"}),
+    "sysarcfunc[System Architechture]": ("architecture", "sysarcfunc", {"Select view": "System Architechture"}),
+    "sysarcfunc[Missions]": ("architecture", "sysarcfunc", {"Select view": "Missions"}),
+    "sysarcfunc[MOE]": ("architecture", "sysarcfunc", {"Select view": "MOE"}),
+    "sysarcfunc[Environments]": ("architecture", "sysarcfunc", {"Select view": "Environments"}),
+    "orbitfunc": ("orbit", "orbitfunc", {}),
+    "orbitfunc[Constellation]": ("orbit", "orbitfunc", {"Orbit mode": "Constellation", "Satellites": 1200, "Planes": 12}),
+    "dashschedule[Week]": ("dashboard", "dashschedule", {"Zoom": "Week"}),
+    "dashschedule[Campaign]": ("dashboard", "dashschedule", {"Zoom": "Campaign"}),
+    "dashschedule[Resolved]": ("dashboard", "dashschedule", {"Zoom": "Week", "Timeline": "Resolved"}),
+    "dashresults[Payload Test Data Report]": ("dashboard", "dashresults", {"Select Test Data Document": "Payload Test Data Report"}),
+    "dashresults[Verification Results]": ("dashboard", "dashresults", {"Select Test Data Document": "Verification Results"}),
+    "sysissues": ("issues", "sysissues", {}),
+}
+METRICS = ["cold_s", "warm_s", "peak_mb", "payload_bytes"]
+# differences below these floors are noise, not regressions
+NOISE_FLOOR = {"cold_s": 0.005, "warm_s": 0.005, "peak_mb": 0.5, "payload_bytes": 1024}
+
+
+def _load_view(module, function):
+    try:
+        return getattr(importlib.import_module(module), function), None
+    except ImportError as e:
+        # e.g. orbitfunc without poliastro installed
+        return None, str(e)
+
+
+def bench_view(view, choices, repeats=3):
+    """
+    Run one view cold, then warm repeats times. Returns the metrics dict.
+    """
+    st.choices = choices
+    reportstore.clear_reports()
+    triplestore.clear_store()
+
+    start = time.perf_counter()
+    view()
+    cold = time.perf_counter() - start
+
+    warm = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        view()
+        warm.append(time.perf_counter() - start)
+
+    # separate run for memory and payload, tracemalloc slows the code down
+    st.reset()
+    tracemalloc.start()
+    view()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "cold_s": cold,
+        "warm_s": statistics.median(warm),
+        "peak_mb": peak / 2**20,
+        "payload_bytes": st.payload_bytes,
+    }
+
+
+def run(scales, repeats=3, only=None, seed=0, backend="csv"):
+    results = {}
+    suffix = "" if backend == "csv" else f"+{backend}"
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as directory:
+            generate_reports(directory, scale=scale, seed=seed)
+            reportstore.use_reports_dir(directory)
+            if backend == "triples":
+                print(f"{triplestore.export_triples()} triples at scale {scale}")
+            reportstore.use_backend(backend)
+            for name, (module, function, choices) in VIEWS.items():
+                if only and not any(o in name for o in only):
+                    continue
+                view, error = _load_view(module, function)
+                key = f"{name}@{scale}{suffix}"
+                if view is None:
+                    print(f"{key:<55} skipped: {error}")
+                    continue
+                results[key] = bench_view(view, choices, repeats)
+                r = results[key]
+                print(f"{key:<55} cold {r['cold_s'] * 1000:9.1f} ms  warm {r['warm_s'] * 1000:9.1f} ms  "
+                      f"peak {r['peak_mb']:8.1f} MB  payload {r['payload_bytes'] / 1024:10.1f} kB")
+    reportstore.use_backend("csv")
+    reportstore.use_reports_dir("reports")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Return a list of (key, metric, baseline value, new value) that grew by more than tolerance.
+    """
+    regressions = []
+    for key, metrics in results.items():
+        if key not in baseline:
+            continue
+        for metric in METRICS:
+            old, new = baseline[key][metric], metrics[metric]
+            if new > old * (1 + tolerance) and new - old > NOISE_FLOOR[metric]:
+                regressions.append((key, metric, old, new))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--only", nargs="*", help="run only the views whose name contains one of these")
+    parser.add_argument("--baseline", default=os.path.join("benchmarks", "baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--backend", choices=["csv", "triples"], default="csv", help="where the query reports come from")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run(args.scales, args.repeats, args.only, backend=args.backend)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for key, metric, old, new in regressions:
+            print(f"REGRESSION {key} {metric}: {old:.4g} -> {new:.4g}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Cold import time of the dashboard modules, each imported in a fresh interpreter.
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --modules app orbit --repeats 5
+    python -m benchmarks.startup --output startup.json
+
+Streamlit is imported before the clock starts, as it is on a running server, so each time is what
+the module adds on top of it. "app" is what the page imports before the header is drawn, the view
+modules are what each tab adds on its first render. The heaviest packages a module pulls in are
+taken from python -X importtime.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# the app, then the view modules in tab order, then the modules they share
+MODULES = ["app", "dashboard", "architecture", "orbit", "issues", "diagnostics",
+           "orbithelper", "passes", "power", "decay", "graphbuilder", "impact", "scheduler", "verification", "triplestore"]
+# packages whose import time is shown next to each module
+HEAVIEST = 3
+
+# runs in the child: streamlit first, then the module between two markers on stderr
+_CHILD = """
+import sys, time
+import streamlit
+sys.stderr.write("--- start\\n")
+start = time.perf_counter()
+try:
+    import {module}
+    error = None
+except Exception as e:
+    error = f"{{type(e).__name__}}: {{e}}"
+elapsed = time.perf_counter() - start
+sys.stderr.write("--- end\\n")
+print(repr((elapsed, error)))
+"""
+
+
+def _heaviest(stderr, count=HEAVIEST):
+    '''
+    Top level packages imported between the markers, by cumulative import time (s)
+    '''
+    lines = stderr.split("--- start\n", 1)[-1].split("--- end\n", 1)[0].splitlines()
+    packages = {}
+    for line in lines:
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.rstrip()
+        # the module is at depth 0, what it imports directly at depth 1 (two more spaces of indent),
+        # their cumulative time covers everything below them
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if cumulative.strip().isdigit() and depth == 1:
+            package = name.strip().split(".")[0]
+            packages[package] = packages.get(package, 0) + int(cumulative) / 1e6
+    return sorted(packages.items(), key=lambda item: -item[1])[:count]
+
+
+def measure(module, repeats=3):
+    """
+    Import a module in repeats fresh interpreters. Returns the metrics dict: import_s (median), heaviest, error.
+    """
+    times, heaviest, error = [], [], None
+    for _ in range(repeats):
+        child = subprocess.run([sys.executable, "-X", "importtime", "-c", _CHILD.format(module=module)],
+                               capture_output=True, text=True, cwd=os.getcwd())
+        if child.returncode != 0:
+            return {"import_s": None, "heaviest": [], "error": child.stderr.strip().splitlines()[-1]}
+        elapsed, error = eval(child.stdout.strip().splitlines()[-1])
+        times.append(elapsed)
+        heaviest = _heaviest(child.stderr)
+        if error:
+            break
+    return {"import_s": statistics.median(times), "heaviest": heaviest, "error": error}
+
+
+def run(modules, repeats=3):
+    results = {}
+    for module in modules:
+        r = results[module] = measure(module, repeats)
+        if r["error"]:
+            print(f"{module:<16} failed: {r['error']}")
+            continue
+        packages = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in r["heaviest"])
+        print(f"{module:<16} {r['import_s'] * 1000:9.1f} ms   {packages}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run(args.modules, args.repeats)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
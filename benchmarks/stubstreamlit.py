@@ -0,0 +1,138 @@
+# A recording stand-in for the streamlit API, so the views can run headless.
+# Every element call is recorded with the size of the payload streamlit would send to the browser.
+import types
+
+from diagnostics import payload_size
+
+
+class _Element:
+    '''
+    Returned by every element call. Works as a container (columns, expander, ...) and as a
+    context manager, and forwards calls such as col.metric(...) to the stub.
+    '''
+    def __init__(self, stub):
+        self._stub = stub
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def __getattr__(self, name):
+        return getattr(self._stub, name)
+
+
+class StreamlitStub(types.ModuleType):
+    """
+    Module object that replaces streamlit in sys.modules for the benchmarks.
+
+    choices: widget label -> value returned by selectbox, radio and button, otherwise the default option is used
+        and buttons are not clicked
+    measure: compute the payload size of every element (the benchmarks), off when only the elements are kept
+    """
+    def __init__(self, measure=True):
+        super().__init__("streamlit")
+        self.session_state = {}
+        self.choices = {}
+        self.measure = measure
+        self.reset()
+
+    def reset(self):
+        # (element name, payload bytes) for each call since the last reset
+        self.calls = []
+        # (element name, value, positional arguments, keyword arguments) for each call, e.g. for the snapshot export
+        self.elements = []
+
+    @property
+    def payload_bytes(self):
+        return sum(size for _, size in self.calls)
+
+    def _record(self, name, value=None, args=(), kwargs=None):
+        self.calls.append((name, payload_size(value) if self.measure else 0))
+        self.elements.append((name, value, args, kwargs or {}))
+        return _Element(self)
+
+    # decorators are pass-through, the benchmarks measure the uncached work
+    def _decorator(self, func=None, **kwargs):
+        if func is None:
+            return lambda f: f
+        return func
+
+    def cache_data(self, func=None, **kwargs):
+        return self._decorator(func, **kwargs)
+
+    def cache_resource(self, func=None, **kwargs):
+        return self._decorator(func, **kwargs)
+
+    def fragment(self, func=None, **kwargs):
+        return self._decorator(func, **kwargs)
+
+    # layout elements that return several containers
+    def columns(self, spec, **kwargs):
+        count = spec if isinstance(spec, int) else len(spec)
+        self._record("columns")
+        return [_Element(self) for _ in range(count)]
+
+    def tabs(self, labels, **kwargs):
+        self._record("tabs")
+        return [_Element(self) for _ in labels]
+
+    # widgets return the chosen option
+    def selectbox(self, label, options, index=0, **kwargs):
+        options = list(options)
+        choice = self.choices.get(label, options[index] if options and index is not None else None)
+        self._record("selectbox", options, (label,), {"choice": choice})
+        return choice
+
+    def radio(self, label, options, index=0, **kwargs):
+        options = list(options)
+        choice = self.choices.get(label, options[index] if options and index is not None else None)
+        self._record("radio", options, (label,), {"choice": choice})
+        return choice
+
+    def select_slider(self, label, options=(), value=None, **kwargs):
+        options = list(options)
+        self._record("select_slider", options)
+        return self.choices.get(label, value if value is not None else options[0])
+
+    def number_input(self, label, min_value=None, max_value=None, value=None, **kwargs):
+        self._record("number_input", value)
+        return self.choices.get(label, value)
+
+    def multiselect(self, label, options, default=None, **kwargs):
+        self._record("multiselect", options)
+        return list(self.choices.get(label, default or []))
+
+    def button(self, label, *args, **kwargs):
+        self._record("button", None, (label,))
+        return self.choices.get(label, False)
+
+    def data_editor(self, data, *args, **kwargs):
+        self._record("data_editor", data)
+        return data
+
+    # charts and tables, the payload is the figure or the data
+    def plotly_chart(self, figure, *args, **kwargs):
+        return self._record("plotly_chart", figure)
+
+    def graphviz_chart(self, figure, *args, **kwargs):
+        return self._record("graphviz_chart", figure)
+
+    def image(self, image, *args, **kwargs):
+        return self._record("image", image)
+
+    def pyplot(self, figure=None, *args, **kwargs):
+        return self._record("pyplot", figure)
+
+    def dataframe(self, data=None, *args, **kwargs):
+        return self._record("dataframe", data)
+
+    def __getattr__(self, name):
+        # every other element (markdown, metric, warning, container, ...) records its arguments
+        if name.startswith("__"):
+            raise AttributeError(name)
+
+        def element(*args, **kwargs):
+            return self._record(name, " ".join(str(a) for a in args), args, kwargs)
+        return element
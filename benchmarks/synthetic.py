@@ -0,0 +1,177 @@
+# Synthetic reports with the same schemas as the SPARQL exports in reports/, at any scale
+import numpy as np
+import pandas as pd
+import os
+import shutil
+
+# reports that are copied as they are, they do not grow with the program size
+STATIC_REPORTS = ["Units.csv", "DocumentSearch.csv"]
+
+UNITS = ["percentage", "second", "kilogram", "degrees", "na"]
+
+
+def _pool(prefix, size):
+    return np.array([f"{prefix}{i}" for i in range(max(int(size), 1))], dtype=object)
+
+
+def _with_gaps(values, rng, fraction):
+    '''
+    Blank out a fraction of the values, like OPTIONAL matches in the SPARQL queries
+    '''
+    values = pd.Series(values, dtype=object)
+    values[rng.random(len(values)) < fraction] = np.nan
+    return values
+
+
+def scheduling(n, rng):
+    start = pd.Timestamp("2024-11-18") + pd.to_timedelta(rng.integers(0, max(n // 4, 7) * 24, n), unit="h")
+    end = start + pd.to_timedelta(rng.integers(1, 5, n), unit="h")
+    site = _with_gaps(rng.choice(_pool("TE", n // 10 + 5), n) + "_Environment", rng, 0.05)
+    df = pd.DataFrame({
+        "ITPName": rng.choice(_pool("ITP ", n // 500 + 1), n),
+        "DTPName": rng.choice(_pool("DTP ", n // 100 + 1), n),
+        "VM": [f"TE{i}" for i in range(n)],
+        "VMName": [f"Test {i}" for i in range(n)],
+        "TestSubjects": rng.choice(_pool("LSNDS_Model", n // 20 + 3), n),
+        "Site": site,
+        "Start": start.strftime("%Y-%m-%dT%H:%M:%S"),
+        "End": end.strftime("%Y-%m-%dT%H:%M:%S"),
+    })
+    # unscheduled tests have no site and no slot
+    df.loc[df["Site"].isna(), ["Start", "End"]] = np.nan
+    return df
+
+
+def key_capabilities(n, rng):
+    threshold = rng.integers(1, 100, n)
+    return pd.DataFrame({
+        "KCName": [f"KPP {i}" for i in range(n)],
+        "SatisfiedBy": _with_gaps(_pool("quantity", n), rng, 0.1),
+        "Unit": rng.choice(UNITS, n),
+        "Threshold": threshold,
+        "Objective": threshold + rng.integers(-50, 50, n),
+        "VerificationMethodName": _with_gaps(rng.choice(_pool("Test ", n), n), rng, 0.2),
+    })
+
+
+def verification_check(n, rng):
+    return pd.DataFrame({
+        "MissionReq": [f"M.1.{i}" for i in range(n)],
+        "MissionReqName": [f"Mission Requirement {i}" for i in range(n)],
+        "SystemQuantity": _pool("quantity", n),
+        "TestName": rng.choice(_pool("Test ", n), n),
+        "TestOutput": _pool("TestData", n),
+        "TestMeasurement": _pool("Measurement", n),
+        "Unit": rng.choice(UNITS[:4], n),
+        "Value": np.round(rng.uniform(0, 100, n), 2),
+        "MinValue": rng.integers(0, 100, n),
+    })
+
+
+def requirements(n, rng):
+    return pd.DataFrame({
+        "Requirement ID": [f"MR{i + 1}" for i in range(n)],
+        "Requirement Name": [f"Requirement {i + 1}" for i in range(n)],
+        "Description": [f"The cubesat shall meet requirement {i + 1}" for i in range(n)],
+        "Satisfied By": _with_gaps(rng.choice(_pool("Element", n // 5 + 1), n), rng, 0.1),
+        "Verified By": _with_gaps(rng.choice(_pool("Analysis", n // 2 + 1), n), rng, 0.3),
+        "Results": np.nan,
+        "Verification Status": rng.choice(["PASS", "FAIL", "TBD"], n),
+    })
+
+
+def functional_architecture(n, rng):
+    # a tree of functions, every 8th function is a root
+    parent = [np.nan if i % 8 == 0 else f"Function{(i - 1) // 4}" for i in range(n)]
+    return pd.DataFrame({
+        "Function": [f"Function{i}" for i in range(n)],
+        "SuperFunction": parent,
+        "AllocatedTo": _with_gaps(rng.choice(_pool("System_", n // 10 + 1), n), rng, 0.1),
+    })
+
+
+def system_architecture(n, rng):
+    subsystem = rng.choice(_pool("Subsystem", n // 3 + 1), n)
+    return pd.DataFrame({
+        "SystemName": [f"System{int(s[9:]) % max(n // 50, 1)}" for s in subsystem],
+        "SubsystemName": subsystem,
+        "SubsubsystemName": _with_gaps(_pool("Part", n), rng, 0.3),
+    })
+
+
+def mission_architecture(n, rng):
+    return pd.DataFrame({
+        "ProgramName": rng.choice(_pool("Program ", n // 100 + 1), n),
+        "MissionName": rng.choice(_pool("Mission ", n // 10 + 1), n),
+        "MissionComponentName": _pool("Component ", n),
+        "SubsystemName": _with_gaps(rng.choice(_pool("Subsystem", n // 3 + 1), n), rng, 0.5),
+    })
+
+
+def moes(n, rng):
+    return pd.DataFrame({
+        "MissionName": rng.choice(_pool("Mission ", n // 10 + 1), n),
+        "MOEName": _pool("MOE ", n),
+    })
+
+
+def environments(n, rng):
+    return pd.DataFrame({
+        "Mission": rng.choice(_pool("Mission ", n // 10 + 1), n),
+        "Environment": rng.choice(_pool("Environment", n // 5 + 1), n),
+        "EnvironmentalEntity": _pool("Entity", n),
+    })
+
+
+def equipment_check(n, rng):
+    acquired = pd.Timestamp("2024-03-01") + pd.to_timedelta(rng.integers(0, 200, n), unit="D")
+    equipment = rng.choice(_pool("Rig", n // 5 + 1), n)
+    return pd.DataFrame({
+        "Milestone": rng.choice(_pool("TestMilestone", n // 20 + 1), n),
+        "MilestoneDate": (acquired + pd.Timedelta(days=30)).strftime("%Y-%m-%dT%H:%M:%S"),
+        "Test": rng.choice(_pool("Test ", n), n),
+        "TestEquipment": equipment,
+        "Acquisition": equipment + "_Acquisition",
+        "AcquisitionDate": acquired.strftime("%Y-%m-%dT%H:%M:%S"),
+    })
+
+
+# report file -> (generator, rows at scale 1, written with the row index)
+REPORTS = {
+    "Query6_Scheduling 2 copy.csv": (scheduling, 10, True),
+    "Query5_KeyCapabilities 2.csv": (key_capabilities, 9, True),
+    "Query7_VerificationCheck.csv": (verification_check, 1, True),
+    "cubesatrequirements.csv": (requirements, 5, False),
+    "FunctionalArchitecture.csv": (functional_architecture, 7, True),
+    "Query2_SystemArchitecture.csv": (system_architecture, 7, True),
+    "Query1_MissionArchitecture 1.csv": (mission_architecture, 6, True),
+    "Query4_MOEs.csv": (moes, 2, True),
+    "Environment.csv": (environments, 2, True),
+    "TestEquipmentCheck.csv": (equipment_check, 3, True),
+}
+
+
+def generate_reports(directory, scale=1, seed=0, source="reports"):
+    """
+    Write every report the views read into directory, with scale times the rows of the sample reports.
+
+    Parameters:
+    directory (str): output folder, created if needed
+    scale (int): row multiplier, e.g. 10 to 10000
+    seed (int): random seed, the same seed and scale always give the same files
+    source (str): folder of the sample reports, the static reports are copied from there
+
+    Returns:
+    dict: report file -> number of rows written
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    rows = {}
+    for name, (make, base, index) in REPORTS.items():
+        df = make(max(int(base * scale), 2), rng)
+        df.to_csv(os.path.join(directory, name), index=index)
+        rows[name] = len(df)
+    for name in STATIC_REPORTS:
+        shutil.copy(os.path.join(source, name), os.path.join(directory, name))
+        rows[name] = len(pd.read_csv(os.path.join(source, name)))
+    return rows
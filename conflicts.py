@@ -0,0 +1,217 @@
+import pandas as pd
+import heapq
+import threading
+from bisect import bisect_left, insort
+
+from reportstore import load_report, report_version
+from diagnostics import traced
+
+# the scheduling report that the Test Strategy and Issues tabs read
+SCHEDULE_REPORT = "Query6_Scheduling 2 copy.csv"
+EQUIPMENT_REPORT = "TestEquipmentCheck.csv"
+
+# how each shared resource is described on the issue cards
+RESOURCE_LABELS = {
+    "Site": "Site",
+    "TestSubjects": "Test Subject",
+    "Equipment": "Equipment",
+}
+
+
+class ConflictIndex:
+    '''
+    Interval index over scheduled tests. Two tests conflict when their [Start, End) intervals
+    overlap and they share a Site, a TestSubject or a piece of test equipment.
+
+    The first build is a sweep line per resource, O(n log n). After that, rows can be added
+    or removed one at a time and only the conflicts of that row are recomputed.
+    '''
+    def __init__(self):
+        # row id -> (start, end, resources)
+        self.rows = {}
+        # resource -> sorted list of (start, row id), and the longest interval seen on it
+        self.by_resource = {}
+        self.max_span = {}
+        # (row a, row b, resource) with a < b, and row id -> the pairs it is part of
+        self.pairs = set()
+        self.row_pairs = {}
+
+    def build(self, intervals):
+        '''
+        Build the index from scratch. intervals: iterable of (row id, start, end, resources)
+        '''
+        self.__init__()
+        for rid, start, end, resources in intervals:
+            self._insert(rid, start, end, resources)
+
+        for resource, entries in self.by_resource.items():
+            # sweep: walk the tests in start order, keeping a heap of the ones still running
+            active = []
+            for start, rid in entries:
+                while active and active[0][0] <= start:
+                    heapq.heappop(active)
+                for _, other in active:
+                    self._pair(rid, other, resource)
+                heapq.heappush(active, (self.rows[rid][1], rid))
+
+    def _pair(self, rid, other, resource):
+        pair = (min(rid, other), max(rid, other), resource)
+        self.pairs.add(pair)
+        self.row_pairs.setdefault(rid, set()).add(pair)
+        self.row_pairs.setdefault(other, set()).add(pair)
+
+    def _insert(self, rid, start, end, resources):
+        self.rows[rid] = (start, end, resources)
+        for resource in resources:
+            insort(self.by_resource.setdefault(resource, []), (start, rid))
+            span = end - start
+            if resource not in self.max_span or span > self.max_span[resource]:
+                self.max_span[resource] = span
+
+    def add(self, rid, start, end, resources):
+        '''
+        Add one scheduled test and record its conflicts
+        '''
+        if rid in self.rows:
+            self.remove(rid)
+        for resource in resources:
+            for other in self.overlapping(resource, start, end):
+                self._pair(rid, other, resource)
+        self._insert(rid, start, end, resources)
+
+    def overlapping(self, resource, start, end):
+        '''
+        Return the row ids holding a resource at some time in [start, end)
+        '''
+        entries = self.by_resource.get(resource, [])
+        if not entries:
+            return []
+        # any interval overlapping [start, end) starts in (start - longest span, end)
+        lo = bisect_left(entries, (start - self.max_span[resource],))
+        hi = bisect_left(entries, (end,))
+        return [other for _, other in entries[lo:hi] if self.rows[other][1] > start]
+
+    def remove(self, rid):
+        '''
+        Remove one scheduled test and the conflicts it was part of
+        '''
+        start, _, resources = self.rows.pop(rid)
+        for resource in resources:
+            entries = self.by_resource[resource]
+            del entries[bisect_left(entries, (start, rid))]
+        for pair in self.row_pairs.pop(rid, ()):
+            self.pairs.discard(pair)
+            other = pair[1] if pair[0] == rid else pair[0]
+            self.row_pairs[other].discard(pair)
+
+    def clear_conflicts(self):
+        '''
+        Forget the recorded conflicts, keeping the intervals. Later adds record only their own conflicts
+        '''
+        self.pairs = set()
+        self.row_pairs = {}
+
+    def conflicts(self):
+        '''
+        Return the conflicting pairs grouped by pair: {(row a, row b): [resource, ...]}
+        '''
+        grouped = {}
+        for a, b, resource in sorted(self.pairs, key=lambda p: (p[0], p[1], str(p[2]))):
+            grouped.setdefault((a, b), []).append(resource)
+        return grouped
+
+
+def _equipment_map():
+    '''
+    Map each test to the test equipment it needs, from the equipment acquisition report
+    '''
+    equipment = load_report(EQUIPMENT_REPORT, copy=False)
+    return equipment.groupby("Test")["TestEquipment"].apply(lambda x: sorted(set(x.dropna()))).to_dict()
+
+
+def _resources(vm, vmname, subject, site, equipment):
+    '''
+    The resources a test holds while it runs: its Site, its TestSubject and its test equipment
+    '''
+    resources = set()
+    if pd.notna(site):
+        resources.add(("Site", site))
+    if pd.notna(subject):
+        resources.add(("TestSubjects", subject))
+    for item in equipment.get(vmname, []) + equipment.get(vm, []):
+        resources.add(("Equipment", item))
+    return frozenset(resources)
+
+
+def _intervals(schedule, equipment):
+    '''
+    Yield (row id, start, end, resources) for each scheduled row of the report
+    '''
+    scheduled = schedule[schedule["Start"].notna() & schedule["End"].notna()]
+    for rid, vm, vmname, subject, site, start, end in zip(
+            scheduled.index, scheduled["VM"], scheduled["VMName"], scheduled["TestSubjects"],
+            scheduled["Site"], scheduled["Start"], scheduled["End"]):
+        yield rid, start, end, _resources(vm, vmname, subject, site, equipment)
+
+
+# process-wide index, kept in sync with the scheduling report
+_INDEX = ConflictIndex()
+# row id -> row hash of the report the index was last synced with, and the equipment report version
+_STATE = {"rows": None, "equipment": None}
+_LOCK = threading.Lock()
+
+
+def _sync(schedule):
+    '''
+    Bring the shared index up to date with the report, touching only the rows that changed
+    '''
+    hashes = pd.util.hash_pandas_object(schedule, index=True)
+    new = dict(zip(schedule.index, hashes))
+    equipment_version = report_version(EQUIPMENT_REPORT)
+
+    if _STATE["rows"] is None or _STATE["equipment"] != equipment_version:
+        _INDEX.build(_intervals(schedule, _equipment_map()))
+    else:
+        old = _STATE["rows"]
+        changed = [rid for rid, h in new.items() if old.get(rid) != h]
+        dropped = [rid for rid in old if rid not in new]
+        if changed or dropped:
+            for rid in changed + dropped:
+                if rid in _INDEX.rows:
+                    _INDEX.remove(rid)
+            for interval in _intervals(schedule.loc[changed], _equipment_map()):
+                _INDEX.add(*interval)
+    _STATE["rows"] = new
+    _STATE["equipment"] = equipment_version
+
+
+# ########## PUBLIC FUNCTION
+@traced("figure", "schedule issues")
+def schedule_issues():
+    """
+    Find the schedule conflicts and the unscheduled tests in the scheduling report.
+
+    Returns:
+    conflicts (pandas.DataFrame): one row per conflicting pair of tests, with the columns
+        Test, OtherTest, Start, End, OtherStart, OtherEnd, ConflictType
+    unscheduled (pandas.DataFrame): the rows of the report that have no Site
+    """
+    schedule = load_report(SCHEDULE_REPORT, copy=False)
+    with _LOCK:
+        _sync(schedule)
+        pairs = _INDEX.conflicts()
+
+    records = []
+    for (a, b), resources in pairs.items():
+        records.append({
+            "Test": schedule.at[a, "VMName"],
+            "OtherTest": schedule.at[b, "VMName"],
+            "Start": schedule.at[a, "Start"],
+            "End": schedule.at[a, "End"],
+            "OtherStart": schedule.at[b, "Start"],
+            "OtherEnd": schedule.at[b, "End"],
+            "ConflictType": ", ".join(f"Has the same {RESOURCE_LABELS[kind]} {name}" for kind, name in sorted(resources)),
+        })
+    conflicts = pd.DataFrame(records, columns=["Test", "OtherTest", "Start", "End", "OtherStart", "OtherEnd", "ConflictType"])
+    unscheduled = schedule[schedule["Site"].isna()]
+    return conflicts, unscheduled
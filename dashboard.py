@@ -7,7 +7,14 @@ import numpy as np
 from datetime import datetime, timedelta
 
 from issues import issuesinfo
-import graphviz
+from reportstore import load_report
+from timeline import schedule_index
+from scheduler import proposed_schedule, PROPOSAL_STATES
+from traceability import trace_index
+from graphbuilder import GraphBuilder, graph_source
+from diagnostics import span
+from verification import verification_results, STATUSES
+from lifetime import ensemble_job, ensemble_result, start_ensemble, ENSEMBLE_DEFAULTS, DEORBIT_YEARS, REQUIRED_PROBABILITY
 
 COLORS = px.colors.qualitative.Plotly
 more_colors = {
@@ -15,6 +22,17 @@ more_colors = {
     "red": "#fb8072",
     "amber": "#ffed6f"
 }
+# charts with more rows than this are drawn with WebGL (scattergl)
+WEBGL_ROWS = 500
+# tiles per row of the verification status grid
+GRID_COLUMNS = 10
+# schedule timelines: the report as it is, or the scheduler's proposal (resolve: re-slot the conflicting tests)
+TIMELINES = {"Current": None, "Proposed": False, "Resolved": True}
+# schedule timeline zoom levels: days shown, None for the whole campaign.
+# "Week" shows single tests, the other levels show per-site weekly occupancy
+ZOOM_LEVELS = {"Week": 7, "Month": 35, "Campaign": None}
+# seconds between two polls of a running deorbit lifetime ensemble
+ENSEMBLE_POLL = 1.0
 
 # ########## TEST SCHEDULE VIEW FUNCTION
 def dashschedule():
@@ -28,7 +46,7 @@ def dashschedule():
     with top_columns[0]:
         # this column will hold the number of tests scheduled, read data for test programs
         # programs = pd.read_csv("reports/TestPrograms.csv", index_col=0)
-        testscheduling = pd.read_csv("reports/Query6_Scheduling 2 copy.csv", index_col=0)
+        testscheduling = load_report("Query6_Scheduling 2 copy.csv")
 
         st.markdown("<h6>Scheduled Test Metrics</h6>", True)
         numTests = sum(pd.notnull(testscheduling['Site']))
@@ -37,7 +55,7 @@ def dashschedule():
         metriccols = st.columns(3)
         metriccols[0].metric(label="Unscheduled Test Count", value=unscheduledTests, delta=f'Total Tests: {totalTests}')
 
-        upcomingTests = np.asarray(np.where(pd.to_datetime(testscheduling['Start']).dt.date >= datetime.today().date())).size
+        upcomingTests = np.asarray(np.where(testscheduling['Start'].dt.date >= datetime.today().date())).size
         metriccols[1].metric(label="Upcoming Tests Count", value=upcomingTests, delta=f'Total Tests: {totalTests}')
 
         metriccols[2].metric(label="Successful Test Count", value=2, delta=f'Completed Tests: {totalTests-unscheduledTests-upcomingTests}')
@@ -51,59 +69,107 @@ def dashschedule():
     with top_columns[1]:
         issuesinfo(500)
             
-    # read the data for test schedule
-    testscheduling = pd.read_csv("reports/Query6_Scheduling 2 copy.csv", index_col=0)
-    testscheduling["Start"] = pd.to_datetime(testscheduling["Start"])
-    testscheduling["End"] = pd.to_datetime(testscheduling["End"])
-
-    # Define a function to extract the week of year
-    testscheduling['Week'] = testscheduling['Start'].dt.strftime('%Y-W%U')
-
-    # Creating the Plotly figure for timeline chart of test schedule
-    fig = px.timeline(testscheduling, x_start="Start", x_end="End", y="Site", color="VMName", text="VMName", hover_name="VM",
-                    category_orders={"Site": sorted(testscheduling['Site'].unique(), key=lambda x: str(x))})
-
-    
-    # Update layout to include a dropdown menu for week selection
-    week_options = testscheduling['Week'].unique()
-
-    # update the layout with options menu, time-axis scale, etc.
-    fig.update_layout(
-        title="Test Schedule",
-        xaxis_title="Time",
-        yaxis_title="Test Site",
-        xaxis=dict(
-            tickformat="%d %b %Y\n%H:%M",
-            range=[testscheduling['Start'].min() - pd.Timedelta(days=1), testscheduling['End'].min() + pd.Timedelta(days=6)],
-        ),
-        # updatemenus=[{
-        #     "buttons": [
-        #         {
-        #             "args": [
-        #                 {"xaxis.range": [testscheduling[testscheduling['Week'] == week]['Start'].min(), testscheduling[testscheduling['Week'] == week]['End'].max()]}
-        #             ],
-        #             "label": week,
-        #             "method": "relayout"
-        #         }
-        #         for week in week_options
-        #     ],
-        #     "direction": "down",
-        #     "showactive": True,
-        #     "x": 0.17,
-        #     "xanchor": "left",
-        #     "y": 1.15,
-        #     "yanchor": "top"
-        # }],
-        legend=dict(xanchor="left", x=0, y=-0.5, yanchor="bottom", orientation="h"),
-    )
+    # the timeline only gets the tests of the visible window, found in the schedule index sorted by Start.
+    # at coarse zoom it gets per-site, per-week totals instead of single tests
+    navcols = top_columns[0].columns([0.3, 0.3, 0.4])
+    zoom = navcols[0].radio("Zoom", list(ZOOM_LEVELS.keys()), index=0, horizontal=True)
+    # the proposed timelines come from the scheduler: unscheduled tests placed, and conflicting tests re-slotted
+    timeline = navcols[1].radio("Timeline", list(TIMELINES.keys()), index=0, horizontal=True)
+    if TIMELINES[timeline] is None:
+        index, proposal = schedule_index(), None
+    else:
+        proposal, index = proposed_schedule(resolve=TIMELINES[timeline])
+    if len(index.weeks) == 0:
+        top_columns[0].info("No tests are scheduled yet")
+        return
+
+    week = navcols[2].select_slider("Week", options=list(index.weeks), value=index.weeks[0],
+                                    format_func=lambda w: w.strftime("%d %b %Y"),
+                                    disabled=ZOOM_LEVELS[zoom] is None)
+
+    if ZOOM_LEVELS[zoom] is None:
+        # the whole campaign
+        start, end = index.weeks[0], index.weeks[-1] + pd.Timedelta(days=7)
+    else:
+        start, end = week, week + pd.Timedelta(days=ZOOM_LEVELS[zoom])
+
+    with span("figure", "schedule timeline"):
+        if zoom == "Week":
+            # Creating the Plotly figure for timeline chart of the tests in the window
+            events = index.window(start, end)
+            fig = px.timeline(events, x_start="Start", x_end="End", y="Site", color="VMName", text="VMName", hover_name="VM",
+                            pattern_shape=None if proposal is None else "Proposal",
+                            category_orders={"Site": sorted(events['Site'].unique(), key=lambda x: str(x)),
+                                             "Proposal": PROPOSAL_STATES})
+        else:
+            # occupancy bars: one bar per site and week, colored by the scheduled hours
+            weekly = index.occupancy(None if ZOOM_LEVELS[zoom] is None else start, end)
+            fig = px.timeline(weekly, x_start="WeekStart", x_end="WeekEnd", y="Site", color="Hours", text="Tests",
+                            hover_data=["Tests", "Hours"],
+                            category_orders={"Site": sorted(weekly['Site'].unique(), key=lambda x: str(x))})
+
+        # update the layout with time-axis scale, etc.
+        fig.update_layout(
+            title="Test Schedule",
+            xaxis_title="Time",
+            yaxis_title="Test Site",
+            xaxis=dict(
+                tickformat="%d %b %Y\n%H:%M",
+                range=[start, end],
+            ),
+            legend=dict(xanchor="left", x=0, y=-0.5, yanchor="bottom", orientation="h"),
+        )
     vlinedate = datetime.today().date()
     fig.add_vline(x=datetime(vlinedate.year, vlinedate.month, vlinedate.day).timestamp() * 1000, annotation_text= f"today {vlinedate.month}/{vlinedate.day}")
     
     # insert the figure in the view using streamlit
-    top_columns[0].plotly_chart(fig, use_container_width=True)
+    with top_columns[0]:
+        st.plotly_chart(fig, use_container_width=True)
+
+        if proposal is not None:
+            counts = proposal["Proposal"].value_counts()
+            st.caption(f"{counts.get('placed', 0)} tests placed, {counts.get('moved', 0)} re-slotted, "
+                       f"{counts.get('unplaced', 0)} could not be placed")
+            with st.expander("Proposed changes", expanded=False):
+                st.dataframe(proposal[proposal["Proposal"] != "kept"][["VM", "VMName", "DTPName", "TestSubjects", "Site", "Start", "End", "Proposal"]],
+                             hide_index=True, use_container_width=True)
 
     
 
+def status_grid(requirements):
+    '''
+    One tile per requirement, colored by its verification status, GRID_COLUMNS tiles per row
+    '''
+    n = len(requirements)
+    rows = max(-(-n // GRID_COLUMNS), 1)
+    # status code per tile: 0 fail, 1 unknown, 2 pass, NaN for the empty tiles of the last row
+    codes = np.full(rows * GRID_COLUMNS, np.nan)
+    codes[:n] = requirements["Status"].map({status: i for i, status in enumerate(STATUSES)}).to_numpy()
+    labels = np.full(rows * GRID_COLUMNS, "", dtype=object)
+    labels[:n] = requirements["MissionReq"].astype(str).to_numpy()
+    hover = np.full(rows * GRID_COLUMNS, "", dtype=object)
+    hover[:n] = (requirements["MissionReq"].astype(str) + " " + requirements["MissionReqName"].astype(str)
+                 + "<br>" + requirements["Passed"].astype(str) + " of " + requirements["Measurements"].astype(str)
+                 + " measurements pass<br>worst margin: " + requirements["Worst Margin (%)"].round(1).astype(str) + " %").to_numpy()
+
+    colors = [more_colors["red"], more_colors["amber"], more_colors["green"]]
+    fig = go.Figure(go.Heatmap(
+        z=codes.reshape(rows, GRID_COLUMNS),
+        text=labels.reshape(rows, GRID_COLUMNS),
+        # the labels are only readable while the grid is small
+        texttemplate="%{text}" if n <= WEBGL_ROWS else None,
+        customdata=hover.reshape(rows, GRID_COLUMNS),
+        hovertemplate="%{customdata}<extra></extra>",
+        colorscale=[[i / 2, color] for i, color in enumerate(colors)],
+        zmin=0, zmax=2, showscale=False, xgap=2, ygap=2,
+    ))
+    fig.update_layout(title="Requirement Verification Status", height=max(150, min(30 * rows, 600)) + 80,
+                      margin=dict(t=40, b=10))
+    fig.update_xaxes(visible=False)
+    fig.update_yaxes(visible=False, autorange="reversed")
+    return fig
+
+
 # ########## TEST SCHEDULE VIEW FUNCTION
 def dashresults():
     # create a heading of size H2
@@ -118,8 +184,7 @@ def dashresults():
     
     # call the first column and design the view under
     with top_columns[0]:
-        resultsdocument = pd.read_csv("reports/DocumentSearch.csv", index_col=0)
-        verificationcheck = pd.read_csv("reports/Query7_VerificationCheck.csv", index_col=0)
+        resultsdocument = load_report("DocumentSearch.csv")
         
         st.markdown("<h6>Test Data Results</h6>", True)
 
@@ -134,11 +199,22 @@ def dashresults():
                     st.metric(label=row["TestData"], value=value, delta=row["TestDataSubject"], help="Test, followed by result value for given test subject")
 
         if metricchoice == "Verification Results":
-            verificationcheck["UnitSymb"] = verificationcheck["Unit"].replace({"percentage": "%"})
-            for index,row in verificationcheck.iterrows():
-                value = str(row["Value"]) + " " + str(row["UnitSymb"]) if (pd.isna(row["UnitSymb"]) != True) else str(row["Value"])
-                st.metric(label=row["MissionReqName"], value=value, delta="Minimum Value: " + str(row["MinValue"]) + str(row["UnitSymb"]),
-                          help=f"Test Name: {row['TestName']} \n Test Output: {row['TestOutput']}")
+            # every measurement is compared with its minimum once per data version, and rolled up by requirement
+            evaluation, requirements = verification_results()
+            counts = requirements["Status"].value_counts()
+            metriccols = st.columns(3)
+            for col, status, label in zip(metriccols, ["pass", "fail", "unknown"], ["Passed", "Failed", "No Result"]):
+                col.metric(label=f"{label} Requirements", value=int(counts.get(status, 0)),
+                           delta=f"Measurements: {int((evaluation['Status'] == status).sum())}")
+
+            with span("figure", "verification status grid"):
+                fig = status_grid(requirements)
+            st.plotly_chart(fig, use_container_width=True)
+
+            with st.expander("Measurements", expanded=False):
+                st.dataframe(evaluation[["MissionReq", "MissionReqName", "TestName", "TestMeasurement", "Value",
+                                         "MinValue", "Symbol", "Status", "Margin", "Margin (%)"]],
+                             hide_index=True, use_container_width=True)
         
         
         st.write(
@@ -155,62 +231,73 @@ def dashresults():
     middle_columns = st.columns([0.7, 0.3])
 
     with middle_columns[0]:
-        keycaprates = pd.read_csv("reports/Query5_KeyCapabilities 2.csv", index_col=0)
-        keycaprates["UnitSymbols"] = keycaprates["Unit"].map({"percent": "%", "degrees": "deg", "second": "sec", "kilogram": "kg"})
-
-        fig = go.Figure()
-        for i in range(len(keycaprates["KCName"])):
-            fig.add_trace(go.Scatter(
-                x=[keycaprates["Threshold"][i], keycaprates["Objective"][i]],
-                y=[keycaprates["KCName"][i], keycaprates["KCName"][i]],
+        keycaprates = load_report("Query5_KeyCapabilities 2.csv")
+        keycaprates["UnitSymbols"] = keycaprates["Unit"].map({"percent": "%", "percentage": "%", "degrees": "deg", "second": "sec", "kilogram": "kg"})
+
+        with span("figure", "key capabilities chart"):
+            # a constant number of traces, whatever the number of key capabilities:
+            # one trace for all threshold-objective segments and one marker trace per series
+            # above WEBGL_ROWS rows the traces are drawn with WebGL
+            Scatter = go.Scattergl if len(keycaprates) > WEBGL_ROWS else go.Scatter
+            names = keycaprates["KCName"].to_numpy()
+            threshold = keycaprates["Threshold"].to_numpy()
+            objective = keycaprates["Objective"].to_numpy()
+            units = keycaprates["UnitSymbols"].fillna("").to_numpy()
+            satisfiedby = keycaprates["SatisfiedBy"].astype(str).to_numpy()
+
+            # segments are separated by None gaps: (threshold, objective, None) per row
+            gaps = np.full(len(keycaprates), None)
+            fig = go.Figure()
+            fig.add_trace(Scatter(
+                x=np.column_stack([threshold, objective, gaps]).ravel(),
+                y=np.column_stack([names, names, gaps]).ravel(),
                 mode='lines',
                 line=dict(color='gray'),
+                connectgaps=False,
+                hoverinfo="skip",
                 showlegend=False
             ))
-            fig.add_trace(go.Scatter(
-                x=[keycaprates["Threshold"][i]],
-                y=[keycaprates["KCName"][i]],
-                mode='markers+text',
-                marker=dict(size=10, color="blue"),
-                name="Threshold" if i==0 else "",
-                showlegend=(i==0),
-                text=[f"{keycaprates['Threshold'][i]} {keycaprates['UnitSymbols'][i]}"],
-                textposition="bottom center",
-                hovertemplate=f" <b> Satisfied by:</b> {keycaprates['SatisfiedBy'][i]}" + ""
-            ))
-            fig.add_trace(go.Scatter(
-                x=[keycaprates["Objective"][i]],
-                y=[keycaprates["KCName"][i]],
-                mode='markers+text',
-                marker=dict(size=10, color="red"),
-                name="Objective" if i==0 else "",
-                showlegend=(i==0),
-                text=[f"{keycaprates['Objective'][i]} {keycaprates['UnitSymbols'][i]}"],
-                textposition="top center",
-                hovertemplate=f" <b> Satisfied by:</b> {keycaprates['SatisfiedBy'][i]}" + ""
-            ))
-
-        fig.update_layout(title="Threshold vs Objective for Each Key Capacities",
-                            xaxis_title="Value",
-                            yaxis_title="KCName",
-                            yaxis=dict(tickmode='linear'),
-                            legend=dict(orientation="h", x=0.3, y=10))
+            for series, values, color, position in [("Threshold", threshold, "blue", "bottom center"),
+                                                    ("Objective", objective, "red", "top center")]:
+                fig.add_trace(Scatter(
+                    x=values,
+                    y=names,
+                    mode='markers+text',
+                    marker=dict(size=10, color=color),
+                    name=series,
+                    text=np.char.add(np.char.add(values.astype(str), " "), units.astype(str)),
+                    textposition=position,
+                    customdata=satisfiedby,
+                    hovertemplate=" <b> Satisfied by:</b> %{customdata}<extra></extra>"
+                ))
+
+            fig.update_layout(title="Threshold vs Objective for Each Key Capacities",
+                                xaxis_title="Value",
+                                yaxis_title="KCName",
+                                yaxis=dict(tickmode='linear'),
+                                legend=dict(orientation="h", x=0.3, y=10))
 
         st.plotly_chart(fig, use_container_width=True)
     
     with middle_columns[1]:
         keycaprates["VerificationStatus"] = np.where(pd.notnull(keycaprates["VerificationMethodName"]),  "Verified", "Unverified")
-        
-        fig = go.Figure(data=[
-            go.Bar(name="Satisfied", y=keycaprates["KCName"], x=np.where(pd.notnull(keycaprates["SatisfiedBy"]), 1, 0),
-                    orientation="h", marker=dict(color=COLORS[2]), text=keycaprates["SatisfiedBy"]),
-            go.Bar(name="Verified", y=keycaprates["KCName"], x=np.where(pd.notnull(keycaprates["VerificationMethodName"]), 1, 0),
-                    orientation="h",marker=dict(color=COLORS[0]), text=keycaprates["VerificationMethodName"])
-        ])
-        fig.update_layout(barmode="stack",
-                            title="Key Capabilities Verification and Satisfaction Status")
-        fig.update_traces(textposition="inside", textfont_size=16)
-        fig.update_xaxes(showticklabels=False)
+
+        with span("figure", "key capabilities status"):
+            # two bar traces built from whole columns. With many rows the bars are too thin
+            # to read the labels, so the text is only sent below WEBGL_ROWS rows
+            showtext = len(keycaprates) <= WEBGL_ROWS
+            satisfied = keycaprates["SatisfiedBy"].notna().to_numpy()
+            verified = keycaprates["VerificationMethodName"].notna().to_numpy()
+            fig = go.Figure(data=[
+                go.Bar(name="Satisfied", y=names, x=satisfied.astype(int),
+                        orientation="h", marker=dict(color=COLORS[2]), text=keycaprates["SatisfiedBy"] if showtext else None),
+                go.Bar(name="Verified", y=names, x=verified.astype(int),
+                        orientation="h",marker=dict(color=COLORS[0]), text=keycaprates["VerificationMethodName"] if showtext else None)
+            ])
+            fig.update_layout(barmode="stack",
+                                title="Key Capabilities Verification and Satisfaction Status")
+            fig.update_traces(textposition="inside", textfont_size=16)
+            fig.update_xaxes(showticklabels=False)
         st.plotly_chart(fig, True)
 
 
@@ -221,11 +308,55 @@ def dashresults():
 #  scatterplot annotations: https://stackoverflow.com/questions/71875067/adding-text-labels-to-a-plotly-scatter-plot-for-a-subset-of-points #
 ##########################################################################################################
 
+# graph builder for the requirement traceability view
+def requirement_graph(reqs):
+    return (GraphBuilder()
+            .nodes(reqs["Requirement ID"])
+            .nodes(reqs["Requirement Name"])
+            .edges(reqs["Requirement ID"], reqs["Requirement Name"], label="has name")
+            .nodes(reqs["Verified By"])
+            .edges(reqs["Requirement Name"], reqs["Verified By"], label="verified by")
+            .nodes(reqs["Satisfied By"])
+            .edges(reqs["Requirement Name"], reqs["Satisfied By"], label="satisfied by"))
+
+
+def lifetime_histogram(result):
+    '''
+    Histogram of the deorbit lifetimes of an ensemble (partial or finished), with the MR1 limit
+    '''
+    bins = result["bins"]
+    # the bins past the longest lifetime are left out
+    last = max(int(np.flatnonzero(result["histogram"]).max(initial=0)) + 2, int(DEORBIT_YEARS) + 2)
+    fig = go.Figure(go.Bar(x=bins[:last] + 0.5, y=result["histogram"][:last], width=1.0,
+                           marker=dict(color=COLORS[0]), hovertemplate="%{x:.0f} years: %{y} samples<extra></extra>"))
+    fig.add_vline(x=DEORBIT_YEARS, line_dash="dash", line_color=more_colors["red"],
+                  annotation_text=f"MR1: {DEORBIT_YEARS:g} years")
+    fig.update_layout(title=f"Deorbit Lifetime ({result['done']} of {result['samples']} samples)",
+                      xaxis_title="Lifetime (years)", yaxis_title="Samples", bargap=0.05)
+    return fig
+
+
+# polls the shared ensemble job, the histogram is redrawn as the batches come back.
+# Once the job is over the page reruns, and dashreqs shows the result or the error
+@st.fragment(run_every=ENSEMBLE_POLL)
+def ensemble_progress():
+    job = ensemble_job()
+    if job is None or not job.running:
+        st.rerun()
+    mr1 = job.poll()
+    st.progress(mr1["done"] / mr1["samples"], text=f"{mr1['done']} of {mr1['samples']} samples")
+    if mr1["done"]:
+        with span("figure", "lifetime histogram"):
+            fig = lifetime_histogram(mr1)
+        st.plotly_chart(fig, use_container_width=True)
+
+
 # ########## REQUIREMENTS VIEW FUNCTION
 def dashreqs():
     st.subheader("Requirements Summary", divider="orange")
-    breakdown = pd.read_csv("reports/cubesatrequirements.csv")
-    breakdown = breakdown.drop(columns=["Verification Status", "Results"]).copy()
+    # requirements, their links and warnings are indexed once per data version
+    trace = trace_index()
+    breakdown = trace.requirements
 
     cols = st.columns([0.7,0.15])
 
@@ -243,63 +374,54 @@ def dashreqs():
     
     cont = st.container(border=True)
     cont.subheader("Warnings")
-    for _, row in breakdown.iterrows():
-        req = row["Requirement Name"]
-        verified = row["Verified By"]
-        satisfied = row["Satisfied By"]
-        # result = row["Results"]
-        # status = row["Verification Status"]
-
-        if pd.isna(verified):
-            cont.warning(f"Requirement {req} is not verified by any analysis", icon="⚠️")
-        if pd.isna(satisfied):
-            cont.warning(f"Requirement {req} is not satisfied by any mission element", icon="⚠️")
-        # if pd.notna(verified) and status != "PASS":
-        #     cont.error(f"Requirement {req} has not PASSED the analysis")
+    for warning in trace.warnings:
+        cont.warning(warning, icon="⚠️")
+
+    # requirement MR1, from the Monte Carlo deorbit lifetime ensemble. The ensemble runs in the background,
+    # once per parameter set and process, and every session polls the same job
+    with st.expander("MR1 Deorbit Analysis", expanded=True):
+        mr1 = ensemble_result()
+        if mr1 is None:
+            job = ensemble_job()
+            if job is None or not job.running:
+                if job is not None and job.error is not None:
+                    st.error(f"The deorbit lifetime ensemble failed: {job.error}")
+                st.info(f"The deorbit lifetime ensemble has not run yet ({ENSEMBLE_DEFAULTS['samples']} samples)")
+                if st.button("Run deorbit lifetime ensemble"):
+                    job, mr1 = start_ensemble(), ensemble_result()
+            if job is not None and job.running:
+                ensemble_progress()
+        if mr1 is not None:
+            p = mr1["percentiles"]
+            metriccols = st.columns(3)
+            metriccols[0].metric(label=f"P(deorbit within {DEORBIT_YEARS:g} years)", value=f"{mr1['probability']:.2%}",
+                                 delta=f"{'PASS' if mr1['passed'] else 'FAIL'} (required: {REQUIRED_PROBABILITY:.0%})",
+                                 delta_color="normal" if mr1["passed"] else "inverse")
+            metriccols[1].metric(label="Median Lifetime", value=f"{p[50]:.1f} years", delta=f"5%-95%: {p[5]:.1f}-{p[95]:.1f} years",
+                                 delta_color="off")
+            metriccols[2].metric(label="Samples", value=mr1["samples"])
+            with span("figure", "lifetime histogram"):
+                fig = lifetime_histogram(mr1)
+            st.plotly_chart(fig, use_container_width=True)
 
     req_choice = st.selectbox("Select Requirement by Name", options=breakdown["Requirement Name"], index=1)
-    target_req = breakdown[breakdown["Requirement Name"] == req_choice]
+    target_req = trace.by_name(req_choice)
+
+    # traceability graph of the selected requirement, cached per requirement content
+    dot = graph_source("Requirement Traceability", target_req, requirement_graph)
 
-    dot = graphviz.Digraph(comment='Hierarchy', strict=True)
-    for _, row in target_req.iterrows():
-            
-        reqid = row["Requirement ID"]
-        req = row["Requirement Name"]
-        verified = row["Verified By"]
-        satisfied = row["Satisfied By"]
-        # result = row["Results"]
-        # status = row["Verification Status"]
-
-        if pd.notna(reqid):
-            dot.node(reqid)
-        if pd.notna(req):
-            if req not in dot.body:
-                dot.node(req)
-            dot.edge(reqid, req, label="has name")
-
-        if pd.notna(verified):
-            if verified not in dot.body:
-                dot.node(verified)
-            dot.edge(req, verified, label="verified by")
-        
-        if pd.notna(satisfied):
-            if satisfied not in dot.body:
-                dot.node(satisfied)
-            dot.edge(req, satisfied, label="satisfied by")
-        # if pd.notna(result):
-        #     if result not in dot.body:
-        #         dot.node(result)
-        #     dot.edge(verified, result, label="analysis output")
-        
-        # if pd.notna(result) and pd.notna(status):
-        #     if status not in dot.body:
-        #         dot.node(status, shape="box")
-        #     dot.edge(result, status, label="verification status")
-            
     cols = st.columns([0.23 ,0.5])
     cols[0].graphviz_chart(dot, True)
 
-    cols[-1].dataframe(target_req.rename({0: "values", 1: "values", 2: "values", 3: "values", 4: "values"}).T.reset_index(). \
+    cols[-1].dataframe(target_req.T.set_axis(["values"], axis=1).reset_index(). \
         style.applymap(lambda x: 'color: black'), use_container_width=True, hide_index=True)
 
+    # tests and measured values that verify the selected requirement
+    tests = trace.tests(trace.id_by_name[req_choice])
+    if len(tests):
+        # with their outcome against the minimum value
+        evaluation, _ = verification_results()
+        cols[-1].dataframe(evaluation.loc[tests.index, ["TestName", "TestMeasurement", "Value", "MinValue", "Symbol", "Status", "Margin"]],
+                           use_container_width=True, hide_index=True)
+
    
\ No newline at end of file
@@ -0,0 +1,191 @@
+import numpy as np
+from functools import lru_cache
+
+# Earth constants, in km and seconds
+MU_EARTH = 398600.4418  # km^3/s^2
+R_EARTH = 6378.137  # km
+SECONDS_PER_YEAR = 365.25 * 86400.0
+
+# CubeSat defaults: 3U, 4 kg, 0.03 m^2 cross section, drag coefficient 2.2
+# ballistic coefficient B = m / (Cd * A) in kg/m^2
+DEFAULT_BALLISTIC_COEFFICIENT = 4.0 / (2.2 * 0.03)
+# 10.7 cm solar radio flux (sfu), 150 is a mean solar cycle
+DEFAULT_SOLAR_FLUX = 150.0
+# altitude (km) at which the CubeSat is considered re-entered
+REENTRY_ALTITUDE = 100.0
+# length of the solar cycle the solar flux follows when it is given an amplitude (years)
+SOLAR_CYCLE_YEARS = 11.0
+
+# Exponential atmosphere (Vallado, Fundamentals of Astrodynamics, table 8-4)
+# base altitude (km), nominal density (kg/m^3), scale height (km)
+ATMOSPHERE_TABLE = np.array([
+    [0, 1.225, 7.249],
+    [25, 3.899e-2, 6.349],
+    [30, 1.774e-2, 6.682],
+    [40, 3.972e-3, 7.554],
+    [50, 1.057e-3, 8.382],
+    [60, 3.206e-4, 7.714],
+    [70, 8.770e-5, 6.549],
+    [80, 1.905e-5, 5.799],
+    [90, 3.396e-6, 5.382],
+    [100, 5.297e-7, 5.877],
+    [110, 9.661e-8, 7.263],
+    [120, 2.438e-8, 9.473],
+    [130, 8.484e-9, 12.636],
+    [140, 3.845e-9, 16.149],
+    [150, 2.070e-9, 22.523],
+    [180, 5.464e-10, 29.740],
+    [200, 2.789e-10, 37.105],
+    [250, 7.248e-11, 45.546],
+    [300, 2.418e-11, 53.628],
+    [350, 9.518e-12, 53.298],
+    [400, 3.725e-12, 58.515],
+    [450, 1.585e-12, 60.828],
+    [500, 6.967e-13, 63.822],
+    [600, 1.454e-13, 71.835],
+    [700, 3.614e-14, 88.667],
+    [800, 1.170e-14, 124.64],
+    [900, 5.245e-15, 181.05],
+    [1000, 3.019e-15, 268.00],
+])
+
+
+def atmospheric_density(altitude, solar_flux=DEFAULT_SOLAR_FLUX):
+    """
+    Atmospheric density from the exponential model, vectorized over altitude.
+
+    Parameters:
+    altitude (float or numpy.ndarray): altitude above the equatorial radius (in kilometers)
+    solar_flux (float or numpy.ndarray): F10.7 solar flux (sfu). The table is for a mean flux of 150,
+        other values scale the density by (solar_flux / 150) ** 1.5 as a first-order solar cycle effect
+
+    Returns:
+    numpy.ndarray: density (in kg/m^3)
+    """
+    altitude = np.clip(np.asarray(altitude, dtype=float), 0.0, None)
+    band = np.clip(np.searchsorted(ATMOSPHERE_TABLE[:, 0], altitude, side="right") - 1, 0, len(ATMOSPHERE_TABLE) - 1)
+    base, rho0, scale = ATMOSPHERE_TABLE[band].T
+    return rho0 * np.exp(-(altitude - base) / scale) * (np.asarray(solar_flux, dtype=float) / DEFAULT_SOLAR_FLUX) ** 1.5
+
+
+def _sma_rate(a, ballistic_coefficient, solar_flux):
+    '''
+    Drag decay of the semi-major axis of a near-circular orbit, da/dt = -rho * sqrt(mu * a) / B, in km/s
+    '''
+    rho = atmospheric_density(a - R_EARTH, solar_flux) * 1e9  # kg/m^3 -> kg/km^3
+    return -rho * np.sqrt(MU_EARTH * a) / (ballistic_coefficient * 1e6)  # B: kg/m^2 -> kg/km^2
+
+
+def _cycle_flux(solar_flux, amplitude, phase, t):
+    '''
+    Solar flux at t seconds, a sine over the solar cycle around its mean, never below zero
+    '''
+    return np.maximum(solar_flux + amplitude * np.sin(2 * np.pi * t / (SOLAR_CYCLE_YEARS * SECONDS_PER_YEAR) + phase), 0.0)
+
+
+def propagate_decay(altitude, ballistic_coefficient=DEFAULT_BALLISTIC_COEFFICIENT, solar_flux=DEFAULT_SOLAR_FLUX,
+                    reentry_altitude=REENTRY_ALTITUDE, rtol=1e-6, max_years=200.0, history=False,
+                    flux_amplitude=0.0, flux_phase=0.0):
+    """
+    Propagate the orbital decay of one or many CubeSats until re-entry.
+
+    The semi-major axis is integrated with an adaptive Bogacki-Shampine (RK 3(2)) scheme. Every
+    input may be an array, they are broadcast together and each element keeps its own step size.
+
+    Parameters:
+    altitude (float or numpy.ndarray): initial circular orbit altitude (in kilometers)
+    ballistic_coefficient (float or numpy.ndarray): m / (Cd * A) (in kg/m^2)
+    solar_flux (float or numpy.ndarray): F10.7 solar flux (sfu), the mean of the solar cycle when flux_amplitude is set
+    reentry_altitude (float): altitude at which the propagation stops (in kilometers)
+    rtol (float): relative error tolerance of each step
+    max_years (float): stop propagating after this many years
+    history (bool): also return the altitude history of every element
+    flux_amplitude (float or numpy.ndarray): amplitude of the solar cycle (sfu), 0 keeps the flux constant
+    flux_phase (float or numpy.ndarray): phase of the solar cycle at the start (rad)
+
+    Returns:
+    lifetime (numpy.ndarray): time to re-entry (in years), max_years if it does not re-enter
+    if history is True, also times (list of numpy.ndarray, years) and altitudes (list of numpy.ndarray, km)
+    """
+    altitude, bc, flux, amplitude, phase = np.broadcast_arrays(np.asarray(altitude, dtype=float),
+                                                               np.asarray(ballistic_coefficient, dtype=float),
+                                                               np.asarray(solar_flux, dtype=float),
+                                                               np.asarray(flux_amplitude, dtype=float),
+                                                               np.asarray(flux_phase, dtype=float))
+    shape = altitude.shape
+    a = (altitude + R_EARTH).ravel().copy()
+    bc, flux, amplitude, phase = bc.ravel(), flux.ravel(), amplitude.ravel(), phase.ravel()
+    a_end = R_EARTH + reentry_altitude
+    t_end = max_years * SECONDS_PER_YEAR
+    # a varying flux is followed with at least 20 steps per solar cycle
+    h_max = np.where(amplitude > 0, SOLAR_CYCLE_YEARS * SECONDS_PER_YEAR / 20, t_end)
+
+    t = np.zeros_like(a)
+    # first step: about one percent of the local decay time a / |da/dt|
+    k1 = _sma_rate(a, bc, _cycle_flux(flux, amplitude, phase, t))
+    h = np.minimum(np.minimum(0.01 * a / np.abs(k1), t_end), h_max)
+    active = a > a_end
+    steps_t, steps_a = [t.copy()], [a.copy()]
+
+    while active.any():
+        idx = np.flatnonzero(active)
+        ai, hi, k1i, bci, ti = a[idx], h[idx], k1[idx], bc[idx], t[idx]
+        fi, ampi, phi = flux[idx], amplitude[idx], phase[idx]
+
+        with np.errstate(invalid="ignore"):
+            k2 = _sma_rate(ai + 0.5 * hi * k1i, bci, _cycle_flux(fi, ampi, phi, ti + 0.5 * hi))
+            k3 = _sma_rate(ai + 0.75 * hi * k2, bci, _cycle_flux(fi, ampi, phi, ti + 0.75 * hi))
+            a_new = ai + hi * (2 * k1i + 3 * k2 + 4 * k3) / 9
+            k4 = _sma_rate(a_new, bci, _cycle_flux(fi, ampi, phi, ti + hi))
+        # difference between the 3rd and the embedded 2nd order solution
+        err = np.abs(hi * (-5 * k1i / 72 + k2 / 12 + k3 / 9 - k4 / 8))
+        err = err / (rtol * ai)
+        # a step so long that a stage falls through the atmosphere gives NaN, it is rejected and shrunk
+        err = np.where(np.isfinite(err), err, np.inf)
+
+        accept = err <= 1.0
+        # a step that crosses the re-entry altitude ends on it, with the time interpolated inside the step
+        frac = np.where(a_new < a_end, (ai - a_end) / (ai - a_new), 1.0)
+        ok = idx[accept]
+        a[ok] = np.maximum(a_new[accept], a_end)
+        t[ok] += hi[accept] * frac[accept]
+        k1[ok] = k4[accept]
+
+        # step size control, limited so the step never shrinks or grows too quickly
+        factor = np.clip(0.9 * np.where(err > 0, err, 1e-12) ** (-1.0 / 3.0), 0.2, 5.0)
+        h[idx] = np.minimum(np.minimum(hi * factor, t_end - t[idx]), h_max[idx])
+
+        done = (a <= a_end) | (t >= t_end)
+        active &= ~done
+        if history:
+            steps_t.append(t.copy())
+            steps_a.append(a.copy())
+
+    lifetime = np.minimum(t, t_end)
+    if history:
+        times = np.stack(steps_t, axis=1)
+        alts = np.stack(steps_a, axis=1) - R_EARTH
+        curves_t, curves_a = [], []
+        for i in range(len(a)):
+            keep = np.concatenate(([True], np.diff(times[i]) > 0))
+            curves_t.append(times[i][keep] / SECONDS_PER_YEAR)
+            curves_a.append(alts[i][keep])
+        return (lifetime / SECONDS_PER_YEAR).reshape(shape), curves_t, curves_a
+    return (lifetime / SECONDS_PER_YEAR).reshape(shape)
+
+
+@lru_cache(maxsize=64)
+def decay_curve(altitude, ballistic_coefficient=DEFAULT_BALLISTIC_COEFFICIENT, solar_flux=DEFAULT_SOLAR_FLUX):
+    """
+    Altitude history of a single CubeSat until re-entry, memoized by (altitude, ballistic coefficient, solar flux).
+
+    Returns:
+    times (numpy.ndarray): time since the start of the propagation (in years)
+    altitudes (numpy.ndarray): altitude (in kilometers)
+    """
+    _, times, altitudes = propagate_decay(float(altitude), float(ballistic_coefficient), float(solar_flux), history=True)
+    times, altitudes = times[0], altitudes[0]
+    # cached arrays are shared between callers
+    times.setflags(write=False)
+    altitudes.setflags(write=False)
+    return times, altitudes
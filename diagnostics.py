@@ -0,0 +1,217 @@
+# to see where the render time goes: views, report loads, figure builds and chart emission
+import io
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+# recording is opt-in, when it is off a span costs one flag check
+ENABLED = False
+# records kept in memory, the oldest are dropped first
+BUFFER_SIZE = 5000
+# when set, every record is also appended to this JSONL file
+TRACE_FILE = None
+
+# the kinds of records, in the order the Diagnostics tab shows them
+KINDS = ["view", "import", "report", "figure", "chart"]
+# streamlit elements whose emission is timed and measured
+CHART_ELEMENTS = ["plotly_chart", "graphviz_chart", "pyplot", "dataframe", "image"]
+
+_buffer = deque(maxlen=BUFFER_SIZE)
+_lock = threading.Lock()
+# the view that is running in this thread, so the nested records can be attributed to it
+_local = threading.local()
+
+
+def payload_size(value):
+    '''
+    Approximate serialized size (bytes) of what an element sends to the browser
+    '''
+    if hasattr(value, "to_plotly_json"):
+        return len(value.to_json())
+    if hasattr(value, "savefig"):
+        buffer = io.BytesIO()
+        value.savefig(buffer, format="png")
+        return buffer.tell()
+    if hasattr(value, "source"):
+        return len(value.source)
+    if hasattr(value, "data") and hasattr(value.data, "to_csv"):
+        # pandas Styler
+        value = value.data
+    if hasattr(value, "to_csv"):
+        return len(value.to_csv())
+    if value is None:
+        return 0
+    return len(str(value))
+
+
+def _store(record):
+    with _lock:
+        _buffer.append(record)
+        if TRACE_FILE:
+            with open(TRACE_FILE, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+
+class _Span(dict):
+    '''
+    The record of one timed block. The block may fill in "cache" and "bytes"
+    '''
+    def __setitem__(self, key, value):
+        if ENABLED:
+            super().__setitem__(key, value)
+
+
+@contextmanager
+def span(kind, name):
+    """
+    Time a block and record it with its kind and name.
+
+    Parameters:
+    kind (str): one of KINDS
+    name (str): the view, module, report, figure or element
+
+    Yields:
+    dict: set "cache" ("hit", "miss", ...) and "bytes" on it to add them to the record
+    """
+    if not ENABLED:
+        yield _Span()
+        return
+    record = _Span(kind=kind, name=name, view=getattr(_local, "view", None), cache=None, bytes=None)
+    if kind == "view":
+        outer, _local.view = getattr(_local, "view", None), name
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["ms"] = (time.perf_counter() - start) * 1000
+        record["ts"] = time.time()
+        if kind == "view":
+            _local.view = outer
+        _store(dict(record))
+
+
+def traced(kind, name=None):
+    """
+    Decorator that records every call of a function as a span, named after the function by default.
+    """
+    def decorator(func):
+        label = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with span(kind, label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def install_chart_hooks(st):
+    """
+    Wrap the chart and table elements of streamlit's DeltaGenerator, so their emissions are timed and their payload
+    measured, whether they go through the st module, a column, a container or a placeholder.
+    Installing twice has no effect.
+    """
+    from streamlit.delta_generator import DeltaGenerator
+
+    for element in CHART_ELEMENTS:
+        emit = getattr(DeltaGenerator, element)
+        if getattr(emit, "_traced", False):
+            continue
+
+        def wrapper(self, *args, _emit=emit, _element=element, **kwargs):
+            with span("chart", _element) as record:
+                result = _emit(self, *args, **kwargs)
+                # measured after the emission, so the time above is what streamlit spent
+                if ENABLED:
+                    record["bytes"] = payload_size(args[0] if args else next(iter(kwargs.values()), None))
+            return result
+
+        wrapper._traced = True
+        wraps(emit)(wrapper)
+        setattr(DeltaGenerator, element, wrapper)
+        # st.<element> is a method bound to the main container when streamlit is imported, bind it again
+        setattr(st, element, getattr(st._main, element))
+
+
+def enable(on=True, trace_file=None):
+    """Turn recording on or off, optionally appending the records to a JSONL file."""
+    global ENABLED, TRACE_FILE
+    ENABLED = on
+    TRACE_FILE = trace_file
+    if trace_file:
+        os.makedirs(os.path.dirname(os.path.abspath(trace_file)), exist_ok=True)
+
+
+def records():
+    """Return the records in the buffer as a DataFrame, oldest first."""
+    # pandas is only loaded when the records are read, spans must not slow down the app start
+    import pandas as pd
+
+    with _lock:
+        rows = list(_buffer)
+    return pd.DataFrame(rows, columns=["ts", "kind", "name", "view", "ms", "cache", "bytes"])
+
+
+def clear():
+    """Drop the records in the buffer. The trace file is kept."""
+    with _lock:
+        _buffer.clear()
+
+
+def summary(df=None):
+    """
+    Per (kind, name) statistics of the records: count, duration percentiles, cache hit rate and payload.
+
+    Returns:
+    pandas.DataFrame sorted by the 90th percentile, slowest first
+    """
+    import numpy as np
+    import pandas as pd
+
+    df = records() if df is None else df
+    if df.empty:
+        return pd.DataFrame(columns=["kind", "name", "count", "p50 (ms)", "p90 (ms)", "p99 (ms)", "max (ms)",
+                                     "hit rate", "mean bytes"])
+    grouped = df.groupby(["kind", "name"], sort=False)
+    stats = grouped["ms"].agg(
+        count="size",
+        **{"p50 (ms)": lambda ms: np.percentile(ms, 50),
+           "p90 (ms)": lambda ms: np.percentile(ms, 90),
+           "p99 (ms)": lambda ms: np.percentile(ms, 99),
+           "max (ms)": "max"})
+    # share of the lookups that found the result cached, among the records that report a cache state
+    cached = df.dropna(subset=["cache"])
+    stats["hit rate"] = cached["cache"].eq("hit").groupby([cached["kind"], cached["name"]]).mean()
+    stats["mean bytes"] = grouped["bytes"].mean()
+    return stats.reset_index().sort_values("p90 (ms)", ascending=False, ignore_index=True)
+
+
+# ########## DIAGNOSTICS VIEW FUNCTION
+def diagnosticsfunc():
+    import streamlit as st
+
+    st.subheader("Diagnostics", divider="gray")
+    df = records()
+    cols = st.columns([0.2, 0.2, 0.6])
+    cols[0].metric("Records", len(df))
+    cols[1].metric("Trace file", TRACE_FILE or "off")
+    if cols[2].button("Clear records"):
+        clear()
+        df = records()
+
+    stats = summary(df)
+    for kind in KINDS:
+        part = stats[stats["kind"] == kind].drop(columns="kind")
+        if part.empty:
+            continue
+        st.markdown(f"**{kind.capitalize()}s**")
+        st.dataframe(part, hide_index=True, use_container_width=True)
+
+    with st.expander("Latest records", expanded=False):
+        st.dataframe(df.iloc[::-1].head(500), hide_index=True, use_container_width=True)
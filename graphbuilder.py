@@ -0,0 +1,232 @@
+import pandas as pd
+import hashlib
+import threading
+from collections import OrderedDict
+
+# for making UML diagrams
+import graphviz
+
+from diagnostics import span
+
+
+# levels shown below the roots of a hierarchical view, deeper subtrees start collapsed
+DEFAULT_DEPTH = 1
+
+
+class GraphBuilder:
+    '''
+    Builds a graphviz digraph from DataFrame columns.
+
+    Nodes and edges are kept in dicts, so adding one is O(1) instead of scanning dot.body,
+    and repeated rows collapse into one node or edge. Later attributes update earlier ones,
+    the same as repeating a node statement in DOT, and edges between the same two nodes are
+    merged as in a strict digraph.
+    '''
+    def __init__(self, comment='Hierarchy', strict=True):
+        self.comment = comment
+        self.strict = strict
+        # node name -> attributes
+        self.node_index = {}
+        # (tail, head) -> attributes, or (tail, head, label) when the graph is not strict
+        self.edge_index = {}
+        # tail -> keys of its edges, built on first use by children
+        self._children = None
+
+    def nodes(self, names, **attrs):
+        '''
+        Add a node for every non-null value of a column
+        '''
+        for name in pd.unique(pd.Series(names).dropna().astype(str)):
+            self.node_index.setdefault(name, {}).update(attrs)
+        return self
+
+    def edges(self, tails, heads, label=None, **attrs):
+        '''
+        Add an edge for every row where both the tail and the head column are not null
+        '''
+        pairs = pd.DataFrame({"tail": pd.Series(tails).values, "head": pd.Series(heads).values})
+        pairs = pairs.dropna().astype(str).drop_duplicates()
+        if label is not None:
+            attrs = {**attrs, "label": label}
+        for tail, head in zip(pairs["tail"], pairs["head"]):
+            # an edge to an undeclared node declares it, as in DOT
+            self.node_index.setdefault(tail, {})
+            self.node_index.setdefault(head, {})
+            key = (tail, head) if self.strict else (tail, head, label)
+            self.edge_index.setdefault(key, {}).update(attrs)
+        self._children = None
+        return self
+
+    def digraph(self):
+        '''
+        Return the graph as a graphviz.Digraph
+        '''
+        dot = graphviz.Digraph(comment=self.comment, strict=self.strict)
+        for name, attrs in self.node_index.items():
+            dot.node(name, **attrs)
+        for key, attrs in self.edge_index.items():
+            dot.edge(key[0], key[1], **attrs)
+        return dot
+
+    def source(self):
+        '''
+        Return the DOT source of the graph
+        '''
+        return self.digraph().source
+
+    def children(self):
+        '''
+        Return the adjacency of the graph, node -> keys of its outgoing edges in insertion order
+        '''
+        if self._children is None:
+            self._children = {}
+            for key in self.edge_index:
+                self._children.setdefault(key[0], []).append(key)
+        return self._children
+
+    def collapse(self, expanded=(), depth=DEFAULT_DEPTH):
+        '''
+        Return a GraphBuilder with the part of the graph that is visible when every subtree below depth levels
+        is collapsed, except under the expanded nodes. The roots are the nodes without incoming edges. A collapsed
+        node that hides edges shows how many in its label and gets a dashed border.
+        Only the visible nodes and their edges are visited, not the whole graph
+        '''
+        children = self.children()
+        heads = {key[1] for key in self.edge_index}
+        roots = [name for name in self.node_index if name not in heads] or list(self.node_index)[:1]
+        expanded = set(expanded)
+
+        visible = GraphBuilder(self.comment, self.strict)
+        level = {name: 0 for name in roots}
+        queue = list(roots)
+        for name in queue:
+            attrs = dict(self.node_index[name])
+            below = children.get(name, [])
+            if level[name] < depth or name in expanded:
+                for key in below:
+                    if key[1] not in level:
+                        level[key[1]] = level[name] + 1
+                        queue.append(key[1])
+                    visible.edge_index[key] = self.edge_index[key]
+            elif below:
+                attrs.update(label=f"{attrs.get('label', name)} (+{len(below)})", style="dashed")
+            visible.node_index[name] = attrs
+        return visible
+
+
+def data_hash(data):
+    '''
+    Content hash of a DataFrame, used to key the graph caches. It follows the row order, which sets the node order
+    '''
+    return hashlib.sha1(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes()).hexdigest()
+
+
+# process-wide caches of the full graph, DOT source and rendered SVG, keyed by (view name, data version)
+# and for the hierarchical views also by (expanded nodes, depth)
+GRAPH_CACHE_SIZE = 128
+_builders = OrderedDict()
+_sources = OrderedDict()
+_svgs = OrderedDict()
+_lock = threading.Lock()
+
+
+def _cached(cache, key, make, name):
+    with span("figure", name) as record:
+        with _lock:
+            if key in cache:
+                record["cache"] = "hit"
+                cache.move_to_end(key)
+                return cache[key]
+        record["cache"] = "miss"
+        value = make()
+        record["bytes"] = len(value) if isinstance(value, str) else 0
+        with _lock:
+            cache[key] = value
+            if len(cache) > GRAPH_CACHE_SIZE:
+                cache.popitem(last=False)
+        return value
+
+
+def graph_source(view, data, build, version=None):
+    """
+    Return the DOT source of a view, building it only when the data changed.
+
+    Parameters:
+    view (str): name of the view, part of the cache key
+    data (pandas.DataFrame): the data the graph is built from
+    build (function): data -> GraphBuilder
+    version (str): content version of the data, e.g. reportstore.report_version of the report it is. Hashed from
+        the data if None
+
+    Returns:
+    str: DOT source, can be passed to st.graphviz_chart
+    """
+    version = data_hash(data) if version is None else version
+    return _cached(_sources, (view, version), lambda: build(data).source(), f"dot source [{view}]")
+
+
+def _render(source):
+    '''
+    Lay out DOT source with the graphviz dot executable, None if it is not installed
+    '''
+    try:
+        return graphviz.Source(source).pipe(format="svg").decode()
+    except graphviz.ExecutableNotFound:
+        return None
+
+
+def graph_svg(view, data, build, version=None):
+    """
+    Return the SVG of a view rendered with the graphviz dot executable, or None if it is not installed.
+    """
+    version = data_hash(data) if version is None else version
+    source = graph_source(view, data, build, version)
+    return _cached(_svgs, (view, version), lambda: _render(source), f"dot layout [{view}]")
+
+
+def _hierarchy(view, data, build, expanded, depth, version):
+    '''
+    Cache key and DOT source of the visible part of a view. The full graph is built once per data version
+    and every expansion is collapsed from it
+    '''
+    version = data_hash(data) if version is None else version
+    key = (view, version, tuple(sorted(expanded)), depth)
+
+    def make():
+        return graph_builder(view, data, build, version).collapse(expanded, depth).source()
+    return key, _cached(_sources, key, make, f"dot source [{view}]")
+
+
+def graph_builder(view, data, build, version=None):
+    """
+    Return the full GraphBuilder of a view, built only when the data changed.
+    """
+    version = data_hash(data) if version is None else version
+    return _cached(_builders, (view, version), lambda: build(data), f"graph [{view}]")
+
+
+def hierarchy_source(view, data, build, expanded=(), depth=DEFAULT_DEPTH, version=None):
+    """
+    Return the DOT source of the visible part of a view, see GraphBuilder.collapse.
+
+    Parameters:
+    view (str): name of the view, part of the cache key
+    data (pandas.DataFrame): the data the graph is built from
+    build (function): data -> GraphBuilder
+    expanded (iterable): the nodes whose subtree is shown whatever their depth
+    depth (int): levels shown below the roots
+    version (str): content version of the data, see graph_source
+
+    Returns:
+    str: DOT source, can be passed to st.graphviz_chart
+    """
+    return _hierarchy(view, data, build, expanded, depth, version)[1]
+
+
+def hierarchy_svg(view, data, build, expanded=(), depth=DEFAULT_DEPTH, version=None):
+    """
+    Return the SVG of the visible part of a view laid out on the server, or None if dot is not installed.
+    The layouts are shared by all sessions, an expansion that was opened before costs a lookup.
+    """
+    key, source = _hierarchy(view, data, build, expanded, depth, version)
+    return _cached(_svgs, key, lambda: _render(source), f"dot layout [{view}]")
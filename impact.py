@@ -0,0 +1,309 @@
+# impact analysis over the architecture, requirements and test reports as one model graph
+import numpy as np
+import pandas as pd
+import threading
+
+from reportstore import load_report, report_version
+from diagnostics import span
+from conflicts import SCHEDULE_REPORT
+from traceability import REQUIREMENTS_REPORT, VERIFICATION_REPORT
+
+# kinds of model elements, in the order the results are listed. "element" is what a report links to without
+# saying what it is (AllocatedTo, Satisfied By), a report that does say it overrides it
+KINDS = ["program", "mission", "component", "system", "subsystem", "part", "element",
+         "function", "requirement", "analysis", "test", "moe"]
+
+# (report, index_col, tail column, tail kind, head column, head kind, relation): one edge per row where both are
+# given, pointing from an element to the one that is affected when it changes or fails
+LINKS = [
+    ("Query2_SystemArchitecture.csv", 0, "SubsubsystemName", "part", "SubsystemName", "subsystem", "part of"),
+    ("Query2_SystemArchitecture.csv", 0, "SubsystemName", "subsystem", "SystemName", "system", "subsystem of"),
+    ("Query1_MissionArchitecture 1.csv", 0, "SubsystemName", "subsystem", "MissionComponentName", "component", "subsystem of"),
+    ("Query1_MissionArchitecture 1.csv", 0, "MissionComponentName", "component", "MissionName", "mission", "component of"),
+    ("Query1_MissionArchitecture 1.csv", 0, "MissionName", "mission", "ProgramName", "program", "mission of"),
+    ("Query4_MOEs.csv", 0, "MissionName", "mission", "MOEName", "moe", "measured by"),
+    ("FunctionalArchitecture.csv", 0, "AllocatedTo", "element", "Function", "function", "performs"),
+    ("FunctionalArchitecture.csv", 0, "Function", "function", "SuperFunction", "function", "subfunction of"),
+    (REQUIREMENTS_REPORT, None, "Satisfied By", "element", "Requirement ID", "requirement", "satisfies"),
+    (REQUIREMENTS_REPORT, None, "Requirement ID", "requirement", "Verified By", "analysis", "verified by"),
+    (VERIFICATION_REPORT, 0, "MissionReq", "requirement", "TestName", "test", "verified by"),
+    (SCHEDULE_REPORT, 0, "TestSubjects", "element", "VMName", "test", "tested by"),
+]
+
+
+def _links(reports):
+    '''
+    All the edges of the model as one DataFrame: Tail, TailKind, Head, HeadKind, Relation
+    '''
+    frames = []
+    for report, index_col, tail, tail_kind, head, head_kind, relation in LINKS:
+        data = reports[(report, index_col)]
+        if tail not in data or head not in data:
+            continue
+        pairs = pd.DataFrame({"Tail": data[tail], "Head": data[head]}).dropna().astype(str).drop_duplicates()
+        frames.append(pairs.assign(TailKind=tail_kind, HeadKind=head_kind, Relation=relation))
+    columns = ["Tail", "TailKind", "Head", "HeadKind", "Relation"]
+    return pd.concat(frames, ignore_index=True)[columns] if frames else pd.DataFrame(columns=columns)
+
+
+def _ranges(starts, lengths):
+    '''
+    Positions start, start + 1, ..., start + length - 1 of every (start, length), concatenated
+    '''
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+
+
+def _csr(tails, heads, n):
+    '''
+    CSR adjacency of n nodes, sorted by tail then head: indptr, indices, and the order of the edges
+    '''
+    order = np.lexsort((heads, tails))
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(tails, minlength=n), out=indptr[1:])
+    return indptr, heads[order], order
+
+
+def _levels(indptr, indices):
+    '''
+    Length of the longest path from every node to a sink, peeling the sinks off one level at a time.
+    -1 for the nodes on a cycle or upstream of one, which are never peeled
+    '''
+    n = len(indptr) - 1
+    tails = np.repeat(np.arange(n), np.diff(indptr))
+    # predecessors of every node
+    rptr, rtails, _ = _csr(indices, tails, n)
+    remaining = np.diff(indptr)
+    level = np.full(n, -1, dtype=np.int64)
+    frontier, depth = np.flatnonzero(remaining == 0), 0
+    while len(frontier):
+        level[frontier] = depth
+        predecessors = rtails[_ranges(rptr[frontier], rptr[frontier + 1] - rptr[frontier])]
+        remaining = remaining - np.bincount(predecessors, minlength=n)
+        frontier = np.unique(predecessors[remaining[predecessors] == 0])
+        depth += 1
+    return level
+
+
+def _strong_components(indptr, indices):
+    '''
+    Tarjan's strongly connected components without recursion: the component number of every node
+    '''
+    n = len(indptr) - 1
+    # plain lists: the loop touches one item at a time
+    index, low, component = [-1] * n, [0] * n, [-1] * n
+    indptr, indices = indptr.tolist(), indices.tolist()
+    on_stack, stack = [False] * n, []
+    counter = components = 0
+    for root in range(n):
+        if index[root] >= 0:
+            continue
+        # (node, position of the next edge to follow)
+        work = [(root, indptr[root])]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        while work:
+            node, edge = work[-1]
+            if edge < indptr[node + 1]:
+                work[-1] = (node, edge + 1)
+                head = indices[edge]
+                if index[head] < 0:
+                    index[head] = low[head] = counter
+                    counter += 1
+                    stack.append(head)
+                    on_stack[head] = True
+                    work.append((head, indptr[head]))
+                elif on_stack[head]:
+                    low[node] = min(low[node], index[head])
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component[member] = components
+                    if member == node:
+                        break
+                components += 1
+    return np.array(component, dtype=np.int64)
+
+
+class ImpactIndex:
+    '''
+    The reports as one directed graph, element -> the elements it affects, with the transitive closure of every
+    element computed once.
+
+    Nodes are numbered by kind, so the closure of a node, kept as a sorted slice of node numbers, lists its affected
+    elements grouped by kind. The adjacency is a CSR index (indptr, indices), and so are the closures.
+
+    The closures are built on the condensation of the graph, where every cycle is one component. The components are
+    ordered by their longest path to a sink, and the closures of one level are computed together with array
+    operations from the levels below: the closure of a component is its successors and their closures. Only the
+    nodes that lead into a cycle go through Tarjan's algorithm, the reports are mostly trees.
+    '''
+    def __init__(self, links):
+        # two reports may give the same link, the first relation is kept
+        self.links = links = links.drop_duplicates(["Tail", "Head"]).reset_index(drop=True)
+        # a node takes the first kind it is given in LINKS order, except that "element" gives way to any other kind
+        rows = np.arange(len(links))
+        kinds = pd.concat([
+            pd.DataFrame({"Name": links["Tail"], "Kind": links["TailKind"], "Order": 2 * rows}),
+            pd.DataFrame({"Name": links["Head"], "Kind": links["HeadKind"], "Order": 2 * rows + 1}),
+        ], ignore_index=True)
+        kinds["Generic"] = kinds["Kind"].eq("element")
+        kinds = kinds.sort_values(["Generic", "Order"]).drop_duplicates("Name")
+        kinds["Kind"] = pd.Categorical(kinds["Kind"], categories=KINDS)
+        kinds = kinds.sort_values("Kind", kind="stable")
+
+        self.names = kinds["Name"].to_numpy()
+        self.kinds = kinds["Kind"].cat.codes.to_numpy()
+        self.node = dict(zip(self.names, range(len(self.names))))
+        # first node of each kind, for slicing a sorted closure by kind
+        self.kind_start = np.searchsorted(self.kinds, np.arange(len(KINDS) + 1))
+
+        tails = links["Tail"].map(self.node).to_numpy(dtype=np.int64)
+        heads = links["Head"].map(self.node).to_numpy(dtype=np.int64)
+        self.indptr, self.indices, _ = _csr(tails, heads, len(self.names))
+
+        self.component = self._condense(tails, heads)
+        # component -> (start, end) of its closure in closure_indices
+        self.closure_bounds, self.closure_indices = self._closures(tails, heads)
+
+    def successors(self, node):
+        '''
+        Numbers of the nodes a node links to directly
+        '''
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def _condense(self, tails, heads):
+        '''
+        Component number of every node. A node that is not on a cycle is its own component, with its own number
+        '''
+        n = len(self.names)
+        component = np.arange(n)
+        cyclic = np.flatnonzero(_levels(self.indptr, self.indices) < 0)
+        if len(cyclic):
+            # the subgraph of the nodes that were not peeled: the cycles and what leads into them
+            local = np.full(n, -1, dtype=np.int64)
+            local[cyclic] = np.arange(len(cyclic))
+            inside = (local[tails] >= 0) & (local[heads] >= 0)
+            indptr, indices, _ = _csr(local[tails[inside]], local[heads[inside]], len(cyclic))
+            labels = _strong_components(indptr, indices)
+            # a component is numbered after its smallest node
+            first = np.full(labels.max() + 1, n, dtype=np.int64)
+            np.minimum.at(first, labels, cyclic)
+            component[cyclic] = first[labels]
+        return component
+
+    def _closures(self, tails, heads):
+        '''
+        The sorted closures of the components one after the other, and the bounds of each, indexed by component
+        number. A component is not in its own closure unless it is a cycle
+        '''
+        n = len(self.names)
+        component = self.component
+        # the members of every component, ordered by component
+        members = np.argsort(component, kind="stable")
+        member_ptr = np.searchsorted(component[members], np.arange(n + 1))
+        size = np.diff(member_ptr)
+        # the edges between components, and the components that reach themselves (a cycle or a self loop)
+        ctails, cheads = component[tails], component[heads]
+        loops = ctails == cheads
+        cyclic = np.zeros(n, dtype=bool)
+        cyclic[ctails[loops]] = True
+        edges = np.unique(ctails[~loops] * n + cheads[~loops])
+        indptr, indices, _ = _csr(edges // n, edges % n, n)
+        level = _levels(indptr, indices)
+
+        start = np.zeros(n, dtype=np.int64)
+        length = np.zeros(n, dtype=np.int64)
+        flat = np.empty(0, dtype=np.int64)
+
+        def pairs(sources, starts, counts, values):
+            # source * n + target for the counts values from each start
+            return np.repeat(sources, counts) * n + values[_ranges(starts, counts)]
+
+        by_level = np.argsort(level, kind="stable")
+        bounds = np.searchsorted(level[by_level], np.arange(level.max(initial=-1) + 2))
+        for depth in range(len(bounds) - 1):
+            sources = by_level[bounds[depth]:bounds[depth + 1]]
+            sources = sources[size[sources] > 0]
+            # (source, target) of every successor and its closure, plus the members of a cyclic component
+            counts = indptr[sources + 1] - indptr[sources]
+            successor, source = indices[_ranges(indptr[sources], counts)], np.repeat(sources, counts)
+            own = sources[cyclic[sources]]
+            keys = np.unique(np.concatenate([
+                pairs(source, member_ptr[successor], size[successor], members),
+                pairs(source, start[successor], length[successor], flat),
+                pairs(own, member_ptr[own], size[own], members),
+            ]))
+            source, target = keys // n, keys % n
+            found, first = np.unique(source, return_index=True)
+            start[found] = len(flat) + first
+            length[found] = np.diff(np.append(first, len(keys)))
+            flat = np.concatenate([flat, target])
+        return np.stack([start, start + length]), flat
+
+    def affected(self, name):
+        """
+        Return the elements affected when an element changes or fails: everything it reaches in the model graph.
+
+        Parameters:
+        name (str): name of the element
+
+        Returns:
+        dict: kind -> names of the affected elements of that kind, in KINDS order, empty if the name is unknown
+        """
+        if name not in self.node:
+            return {}
+        start, end = self.closure_bounds[:, self.component[self.node[name]]]
+        closure = self.closure_indices[start:end]
+        bounds = np.searchsorted(closure, self.kind_start)
+        return {kind: self.names[closure[bounds[i]:bounds[i + 1]]].tolist()
+                for i, kind in enumerate(KINDS) if bounds[i + 1] > bounds[i]}
+
+    def kind(self, name):
+        '''
+        Kind of an element, None if the name is unknown
+        '''
+        return KINDS[self.kinds[self.node[name]]] if name in self.node else None
+
+    def sources(self, kind=None):
+        '''
+        Names of the elements that affect at least one other, of one kind or grouped by kind in KINDS order
+        '''
+        nodes = np.flatnonzero(np.diff(self.indptr) > 0)
+        if kind is not None:
+            nodes = nodes[self.kinds[nodes] == KINDS.index(kind)]
+        return self.names[nodes].tolist()
+
+    def source_kinds(self):
+        '''
+        The kinds that have at least one element affecting another, in KINDS order
+        '''
+        return [KINDS[code] for code in np.unique(self.kinds[np.diff(self.indptr) > 0])]
+
+
+# ########## PUBLIC FUNCTION
+# one index per version of the linked reports, shared by all sessions
+_indexes = {}
+_lock = threading.Lock()
+
+
+def impact_index():
+    """Return the ImpactIndex of the current reports, built once per data version."""
+    reports = sorted({(report, index_col) for report, index_col, *_ in LINKS}, key=str)
+    version = tuple(report_version(report, index_col=index_col) for report, index_col in reports)
+    with _lock, span("figure", "impact index") as record:
+        record["cache"] = "hit" if version in _indexes else "miss"
+        if version not in _indexes:
+            _indexes.clear()
+            data = {(report, index_col): load_report(report, index_col=index_col, copy=False)
+                    for report, index_col in reports}
+            _indexes[version] = ImpactIndex(_links(data))
+        return _indexes[version]
@@ -0,0 +1,158 @@
+# to watch the reports folder and reload the reports that the pipeline rewrites
+import logging
+import os
+import threading
+
+# reportstore and triplestore load pandas, they are imported by the watcher itself so that app.py
+# can read WATCH_INTERVAL before the header is drawn
+
+# watchdog ships with streamlit, it gets file events from the OS instead of scanning the folder.
+# without it the watcher falls back to comparing the file stats every interval
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # pragma: no cover
+    Observer = None
+    FileSystemEventHandler = object
+
+# seconds between two scans of the reports folder
+WATCH_INTERVAL = 2.0
+# the exported reports, and the model triples of the "triples" backend
+WATCHED = (".csv", ".nt")
+
+log = logging.getLogger(__name__)
+
+
+class _ReportEvents(FileSystemEventHandler):
+    '''
+    Wakes the watcher up when a report or the model file is written, moved or deleted
+    '''
+    def __init__(self, wake):
+        self.wake = wake
+
+    def on_any_event(self, event):
+        if not event.is_directory and str(getattr(event, "dest_path", "") or event.src_path).endswith(WATCHED):
+            self.wake.set()
+
+
+class ReportWatcher:
+    '''
+    Watches the reports folder and keeps the report store current.
+
+    When a CSV changes only that report is reparsed, and only in the shapes (index column) that
+    were already loaded; an append-only change parses just the new rows. Each report has a revision
+    number that goes up by one per content change, sessions compare it with the revisions they
+    rendered to know which tabs are stale. The caches built from a report are keyed by its content
+    hash (report_version), so they are rebuilt on their next use and the caches of other reports stay.
+    '''
+    def __init__(self, directory=None, interval=WATCH_INTERVAL):
+        import reportstore
+
+        self.directory = directory or reportstore.REPORTS_DIR
+        self.interval = interval
+        # file name -> (mtime, size) of the last scan
+        self.stamps = self._stat_all()
+        # file name -> revision, bumped once per content change
+        self.revisions = {name: 0 for name in self.stamps}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._observer = None
+
+    def _stat_all(self):
+        stamps = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(WATCHED):
+                    stat = entry.stat()
+                    stamps[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        return stamps
+
+    def scan(self):
+        '''
+        Reload the reports whose file changed since the last scan, return their names
+        '''
+        import reportstore
+        import triplestore
+
+        stamps = self._stat_all()
+        touched = [name for name, stamp in stamps.items() if self.stamps.get(name) != stamp]
+        touched += [name for name in self.stamps if name not in stamps]
+        self.stamps = stamps
+
+        loaded = reportstore.loaded_reports()
+        changed = []
+        for name in touched:
+            if name not in stamps:
+                # deleted: the views keep their last data until the file comes back
+                continue
+            try:
+                if reportstore.BACKEND == "triples":
+                    # the query reports come from the model, its new version changes all of them at once
+                    if name == triplestore.TRIPLES_FILE:
+                        triplestore.load_store()
+                        changed.extend(triplestore.QUERY_REPORTS)
+                    if name.endswith(".nt") or name in triplestore.QUERY_REPORTS:
+                        continue
+                shapes = {index_col: digest for (report, index_col), digest in loaded.items() if report == name}
+                # reparse the report in the shapes the views read it in, so the next render finds it ready.
+                # a report nobody has read yet is parsed on its first use, like before
+                if shapes and all(reportstore.report_version(name, index_col) == digest for index_col, digest in shapes.items()):
+                    # rewritten with the same contents
+                    continue
+            except (OSError, ValueError):
+                # pandas' EmptyDataError and ParserError are ValueErrors: the file was caught mid-rewrite.
+                # forget its stamp so the next scan looks at it again
+                log.warning("could not reload %s, retrying on the next scan", name, exc_info=True)
+                del self.stamps[name]
+                continue
+            changed.append(name)
+        with self._lock:
+            for name in changed:
+                self.revisions[name] = self.revisions.get(name, 0) + 1
+        return changed
+
+    def snapshot(self):
+        '''
+        Return a copy of the report revisions, file name -> revision
+        '''
+        with self._lock:
+            return dict(self.revisions)
+
+    def changed_since(self, revisions):
+        '''
+        Return the names of the reports whose revision moved past the given ones
+        '''
+        with self._lock:
+            return [name for name, rev in self.revisions.items() if rev != revisions.get(name, 0)]
+
+    def _run(self):
+        while not self._stop.is_set():
+            # a file event cuts the wait short, the interval is the fallback
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.scan()
+            except Exception:
+                # e.g. the folder is being rewritten. The watcher thread must outlive it, or live reload
+                # stops for the whole process: log it and try again on the next tick
+                log.warning("report scan failed, retrying on the next tick", exc_info=True)
+
+    def start(self):
+        if self._thread is not None:
+            return self
+        if Observer is not None:
+            self._observer = Observer()
+            self._observer.schedule(_ReportEvents(self._wake), self.directory, recursive=False)
+            self._observer.daemon = True
+            self._observer.start()
+        self._thread = threading.Thread(target=self._run, name="report-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._observer is not None:
+            self._observer.stop()
@@ -1,75 +1,86 @@
 import streamlit as st
+import pandas as pd
+
+from conflicts import schedule_issues
+from scheduler import proposed_schedule
+
+
+def _timeslot(start, end):
+    '''
+    Format a schedule slot the way the issue cards show it, e.g. "September 1 12:00 - 13:00"
+    '''
+    if pd.isna(start) or pd.isna(end):
+        return "Not scheduled"
+    return f"{start:%B} {start.day} {start:%H:%M} - {end:%H:%M}"
+
+
+def _proposed(proposal, rid):
+    '''
+    Describe the slot the scheduler proposes for a test, e.g. "TE53_Environment, November 18 13:00 - 15:00"
+    '''
+    if proposal.at[rid, "Proposal"] == "unplaced":
+        return "No free slot found"
+    return f"{proposal.at[rid, 'Site']}, {_timeslot(proposal.at[rid, 'Start'], proposal.at[rid, 'End'])}"
+
 
 # ########## ISSUES VIEW FUNCTION
 def sysissues():
+    # get the conflicts and unscheduled tests found in the scheduling report
+    conflicts, unscheduled = schedule_issues()
+
+    # each conflicting pair is shown on the card of both tests
+    cards = pd.concat([
+        conflicts[["Test", "OtherTest", "Start", "End", "ConflictType"]],
+        conflicts[["OtherTest", "Test", "OtherStart", "OtherEnd", "ConflictType"]]
+            .set_axis(["Test", "OtherTest", "Start", "End", "ConflictType"], axis=1),
+    ], ignore_index=True)
+
     # create three columns of equal size
     top_cols = st.columns(3)
 
     # with the first column, create content for all the scheduling conflicts
     with top_cols[0]:
         # create an accordion expander using st.expander. this will contain all details of the conflict issues
-        conflicts = st.expander("⚠️ Four tests have overlapping schedule", expanded=True)
-
-        # call the expander and create containers for each occurring conflict.
-        # this needs to be updated to a controlled loop, getting data from the OML query data
-        with conflicts:
-            with st.container(border=True):
-                st.error("Pathway Creation Time Test has potential schedule conflict with other tests", icon="❗")
-                st.markdown("<li>Test Names: Maneuvrability Test</li> \
-                            <li>Scheduled Date and Time: September 1 12:00 - 13:00</li>  \
-                            <li>Conflict Type: Has the same Site TE53_Environment</li>  \
-                            ",True)
-            with st.container(border=True):
-                st.error("Maneuvrability Test has potential schedule conflict with other tests", icon="❗")
-                st.markdown("<li>Test Names: Pathway Creation Time</li> \
-                            <li>Scheduled Date and Time: September 1 12:00 - 13:00</li>  \
-                            <li>Conflict Type: Has the same Site TE53_Environment</li>  \
-                            ",True)
-            with st.container(border=True):
-                st.error("Path Confidence Test has potential schedule conflict with other tests", icon="❗")
-                st.markdown("<li>Test Names: Information Loss Test</li> \
-                            <li>Scheduled Date and Time: September 2 12:00 - 13:00</li>  \
-                            <li>Conflict Type: Has the same Equipment LSNDS</li>  \
-                            ",True)
-            with st.container(border=True):
-                st.error("Information Loss Test has potential schedule conflict with other tests", icon="❗")
-                st.markdown("<li>Test Names: Path Confidence Test</li> \
-                            <li>Scheduled Date and Time: September 2 12:00 - 13:00</li>  \
-                            <li>Conflict Type: Has the same Equipment LSNDS</li>  \
-                            ",True)
-    
+        conflictlist = st.expander(f"⚠️ {cards['Test'].nunique()} tests have overlapping schedule", expanded=True)
+
+        # call the expander and create containers for each test that has a conflict
+        with conflictlist:
+            for test, group in cards.groupby("Test", sort=False):
+                with st.container(border=True):
+                    st.error(f"{test} has potential schedule conflict with other tests", icon="❗")
+                    st.markdown(f"<li>Test Names: {', '.join(group['OtherTest'])}</li> \
+                                <li>Scheduled Date and Time: {_timeslot(group['Start'].iloc[0], group['End'].iloc[0])}</li>  \
+                                <li>Conflict Type: {'; '.join(group['ConflictType'].unique())}</li>  \
+                                ",True)
+
+    # the slots the scheduler proposes for the unscheduled tests
+    proposal, _ = proposed_schedule()
+
     with top_cols[1]:
-        unscheduled = st.expander("⚠️ Three tests have not been scheduled on any Enviroment", expanded=True)
-
-        with unscheduled:
-            with st.container(border=True):
-                st.warning("Adaptability Simulation 1 is not scheduled on any Site/Env", icon="⚠️")
-                st.markdown("<li>Scheduled Date and Time: September 2 12:00 - 13:00</li>  \
-                            <li>Test Equipment: LSNDS_PhysicsModel1</li> \
-                            <li>Conflict Type: No Environment</li>  \
-                            ",True)
-            with st.container(border=True):
-                st.warning("Adaptability Simulation 2 is not scheduled on any Site/Env", icon="⚠️")
-                st.markdown("<li>Scheduled Date and Time: September 4 12:00 - 13:00</li>  \
-                            <li>Test Equipment: LSNDS_PhysicsModel2</li> \
-                            <li>Conflict Type: No Environment</li>  \
-                            ",True)
-            with st.container(border=True):
-                st.warning("Electrical Simulation is not scheduled on any Site/Env", icon="⚠️")
-                st.markdown("<li>Scheduled Date and Time: September 5 12:00 - 13:00</li>  \
-                            <li>Test Equipment: LSNDS_ElectricalModel1</li> \
-                            <li>Conflict Type: No Environment</li>  \
-                            ",True)
+        unscheduledlist = st.expander(f"⚠️ {len(unscheduled)} tests have not been scheduled on any Enviroment", expanded=True)
+
+        with unscheduledlist:
+            for _, row in unscheduled.iterrows():
+                with st.container(border=True):
+                    st.warning(f"{row['VMName']} is not scheduled on any Site/Env", icon="⚠️")
+                    st.markdown(f"<li>Scheduled Date and Time: {_timeslot(row['Start'], row['End'])}</li>  \
+                                <li>Test Equipment: {row['TestSubjects']}</li> \
+                                <li>Conflict Type: No Environment</li>  \
+                                <li>Proposed Slot: {_proposed(proposal, row.name)}</li>  \
+                                ",True)
                 
 
 # Function to make a issues widget that can create a brief of issues on other pages
 def issuesinfo(height, ):
+    conflicts, unscheduled = schedule_issues()
+    tests = pd.unique(pd.concat([conflicts["Test"], conflicts["OtherTest"]]))
+
     st.markdown("<h6>Issues</h6>", True)
     with st.container(border=True, height=height):
-        st.warning('Four tests have overlapped scheduling (find more info on Issues tab)', icon="⚠️")
-
-        st.error("Electrical Test has potential schedule conflict with other tests", icon="❗")
-        st.error("Path Accuracy Test has potential schedule conflict with other tests", icon="❗")
+        if len(tests):
+            st.warning(f'{len(tests)} tests have overlapped scheduling (find more info on Issues tab)', icon="⚠️")
+        if len(unscheduled):
+            st.warning(f'{len(unscheduled)} tests are not scheduled on any Site (find more info on Issues tab)', icon="⚠️")
 
-        st.error("Maneuverability Test has potential schedule conflict with other tests", icon="❗")
-        st.error("Pathway Creation Time Test has potential schedule conflict with other tests", icon="❗")
\ No newline at end of file
+        for test in tests:
+            st.error(f"{test} has potential schedule conflict with other tests", icon="❗")
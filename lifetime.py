@@ -0,0 +1,276 @@
+"""
+Monte Carlo deorbit lifetime of the CubeSat, for requirement MR1.
+
+    python lifetime.py --samples 20000 --workers 4
+
+Every sample draws a drag coefficient, an area-to-mass ratio, a solar cycle (mean flux, amplitude
+and phase) and an initial altitude, and propagates the decay to re-entry with decay.propagate_decay.
+The samples are split in batches that run vectorized on a process pool, and the lifetime histogram
+is updated as each batch comes back. A parameter set runs as one background job shared by every
+session of the app, and its result is kept for the process.
+"""
+import argparse
+import multiprocessing
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from decay import propagate_decay
+
+# requirement MR1: the cubesat shall deorbit within 25 years of the end of its mission
+DEORBIT_YEARS = 25.0
+# share of the samples that have to re-enter in time for MR1 to pass
+REQUIRED_PROBABILITY = 0.95
+
+# the ensemble: how many samples, and the range each parameter is drawn from (uniform, except the
+# altitude which is normal around its nominal value). Any of them can be overridden per run
+ENSEMBLE_DEFAULTS = {
+    "samples": 20000,
+    "seed": 0,
+    # nominal initial altitude and insertion dispersion (km)
+    "altitude": 465.0,
+    "altitude_sigma": 10.0,
+    "drag_coefficient": (2.0, 2.6),
+    # m^2/kg, a 3U of 4 kg with 0.03 m^2 is 0.0075
+    "area_to_mass": (0.0055, 0.0095),
+    # F10.7 solar flux (sfu): mean of the cycle and its amplitude, the phase is drawn over the whole cycle
+    "solar_flux": (120.0, 180.0),
+    "flux_amplitude": (40.0, 80.0),
+}
+# samples per batch, each batch is one vectorized propagation on a worker
+BATCH_SIZE = 1000
+# lifetimes are propagated up to this many years, longer ones count in the last bin
+MAX_YEARS = 100.0
+# histogram bins of the lifetime (years)
+HISTOGRAM_BINS = np.arange(0.0, MAX_YEARS + 1.0, 1.0)
+# seconds between two looks of a job at its batches
+POLL_INTERVAL = 0.5
+# a job that nobody polled for this long (s) is abandoned, e.g. every session showing it was closed,
+# and the batches that did not start are cancelled
+ABANDON_AFTER = 30.0
+
+
+def ensemble_parameters(**overrides):
+    """Return the ensemble parameters with the given ones overridden, as a hashable, sorted tuple of items."""
+    unknown = set(overrides) - set(ENSEMBLE_DEFAULTS)
+    if unknown:
+        raise ValueError(f"unknown ensemble parameters: {', '.join(sorted(unknown))}")
+    params = dict(ENSEMBLE_DEFAULTS, **overrides)
+    return tuple(sorted((name, tuple(value) if isinstance(value, (list, tuple)) else value)
+                        for name, value in params.items()))
+
+
+def sample_batch(params, index, count):
+    """
+    Draw one batch of samples and propagate them to re-entry.
+
+    Parameters:
+    params (tuple): from ensemble_parameters
+    index (int): batch number, each batch has its own random stream so the result does not depend on the workers
+    count (int): samples in the batch
+
+    Returns:
+    numpy.ndarray (count, 6): altitude (km), drag coefficient, area-to-mass (m^2/kg), mean solar flux,
+    flux amplitude (sfu) and lifetime (years)
+    """
+    p = dict(params)
+    rng = np.random.default_rng([p["seed"], index])
+    altitude = rng.normal(p["altitude"], p["altitude_sigma"], count)
+    cd = rng.uniform(*p["drag_coefficient"], count)
+    area_to_mass = rng.uniform(*p["area_to_mass"], count)
+    flux = rng.uniform(*p["solar_flux"], count)
+    amplitude = rng.uniform(*p["flux_amplitude"], count)
+    phase = rng.uniform(0.0, 2 * np.pi, count)
+
+    lifetime = propagate_decay(altitude, 1.0 / (cd * area_to_mass), flux, max_years=MAX_YEARS,
+                               flux_amplitude=amplitude, flux_phase=phase)
+    return np.column_stack([altitude, cd, area_to_mass, flux, amplitude, lifetime])
+
+
+def _summary(params, batches, done):
+    '''
+    The result so far: histogram, probability of re-entering in time, percentiles and the samples
+    '''
+    samples = np.concatenate(batches) if batches else np.empty((0, 6))
+    lifetime = samples[:, 5]
+    n = len(lifetime)
+    probability = float(np.mean(lifetime <= DEORBIT_YEARS)) if n else float("nan")
+    return {
+        "params": params,
+        "done": done,
+        "samples": dict(params)["samples"],
+        "histogram": np.histogram(np.minimum(lifetime, MAX_YEARS - 1e-9), HISTOGRAM_BINS)[0],
+        "bins": HISTOGRAM_BINS,
+        "probability": probability,
+        # binomial standard error of the probability
+        "error": float(np.sqrt(probability * (1 - probability) / n)) if n else float("nan"),
+        "percentiles": dict(zip([5, 50, 95], np.percentile(lifetime, [5, 50, 95]) if n else [np.nan] * 3)),
+        "lifetimes": samples,
+        "passed": bool(n and probability >= REQUIRED_PROBABILITY),
+    }
+
+
+# finished ensembles, parameters -> result, and the jobs still running or failed, parameters -> EnsembleJob.
+# Both are shared by all sessions
+_results = {}
+_jobs = {}
+_lock = threading.Lock()
+
+
+class EnsembleJob:
+    '''
+    One run of the ensemble: the batches go to a process pool and a background thread collects them,
+    updating the partial result as each one comes back. Start jobs with start_ensemble, which keeps
+    one per parameter set.
+    '''
+    def __init__(self, params, workers=None, batch_size=BATCH_SIZE):
+        self.params = params
+        self.latest = _summary(params, [], 0)
+        self.error = None
+        self.polled = time.monotonic()
+        self._cancel = threading.Event()
+        total = dict(params)["samples"]
+        counts = [min(batch_size, total - start) for start in range(0, total, batch_size)]
+        # spawned workers: forking a server process with running threads is unsafe
+        self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        # future -> batch number, the batches come back in any order
+        self._futures = {self._pool.submit(sample_batch, params, index, count): index
+                         for index, count in enumerate(counts)}
+        self._thread = threading.Thread(target=self._collect, name="lifetime ensemble", daemon=True)
+        self._thread.start()
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def poll(self):
+        '''
+        Return the latest result, partial while the job runs, and keep the job from being abandoned
+        '''
+        self.polled = time.monotonic()
+        return self.latest
+
+    def cancel(self):
+        '''
+        Stop the job, the batches that did not start are cancelled
+        '''
+        self._cancel.set()
+
+    def wait(self):
+        '''
+        Wait for the job to finish, polling it, and return its result. None if it was cancelled
+        '''
+        while self.running:
+            self.poll()
+            self._thread.join(POLL_INTERVAL)
+        if self.error is not None:
+            raise self.error
+        return ensemble_result(self.params)
+
+    def _collect(self):
+        batches, done = {}, 0
+        pending = set(self._futures)
+        try:
+            while pending:
+                finished, pending = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index = self._futures[future]
+                    batches[index] = future.result()
+                    done += len(batches[index])
+                if self._cancel.is_set() or time.monotonic() - self.polled > ABANDON_AFTER:
+                    return
+                if finished and pending:
+                    self.latest = _summary(self.params, list(batches.values()), done)
+
+            # in batch order, so the result does not depend on the workers
+            self.latest = _summary(self.params, [batches[index] for index in sorted(batches)], done)
+            with _lock:
+                _results[self.params] = self.latest
+        except Exception as e:
+            self.error = e
+        finally:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            # a failed job stays, so the sessions polling it can show the error
+            with _lock:
+                if _jobs.get(self.params) is self and self.error is None:
+                    del _jobs[self.params]
+
+
+# ########## PUBLIC FUNCTIONS
+def start_ensemble(params=None, workers=None, batch_size=BATCH_SIZE):
+    """
+    Start the ensemble of a parameter set in the background, unless it is running or finished already.
+    Sessions that start the same parameter set at the same time share one job and one process pool.
+
+    Parameters:
+    params (tuple): from ensemble_parameters, the defaults if None
+    workers (int): worker processes, one per CPU by default
+    batch_size (int): samples per batch
+
+    Returns:
+    EnsembleJob, None if the parameter set has a result already (see ensemble_result)
+    """
+    params = params or ensemble_parameters()
+    with _lock:
+        if params in _results:
+            return None
+        job = _jobs.get(params)
+        if job is None or not job.running:
+            job = _jobs[params] = EnsembleJob(params, workers, batch_size)
+        return job
+
+
+def ensemble_job(params=None):
+    """Return the job of a parameter set while it runs, or after it failed. None if there is none."""
+    with _lock:
+        return _jobs.get(params or ensemble_parameters())
+
+
+def run_ensemble(params=None, workers=None, batch_size=BATCH_SIZE):
+    """
+    Run the ensemble to the end and return its result, see start_ensemble for the parameters.
+
+    Returns:
+    dict: done, samples, histogram, bins, probability, error, percentiles (5, 50, 95), lifetimes, passed
+    """
+    job = start_ensemble(params, workers, batch_size)
+    return ensemble_result(params) if job is None else job.wait()
+
+
+def ensemble_result(params=None):
+    """Return the finished result of a parameter set, None if it has not run in this process."""
+    with _lock:
+        return _results.get(params or ensemble_parameters())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=ENSEMBLE_DEFAULTS["samples"])
+    parser.add_argument("--altitude", type=float, default=ENSEMBLE_DEFAULTS["altitude"])
+    parser.add_argument("--seed", type=int, default=ENSEMBLE_DEFAULTS["seed"])
+    parser.add_argument("--workers", type=int, help="worker processes, one per CPU by default")
+    args = parser.parse_args(argv)
+
+    params = ensemble_parameters(samples=args.samples, altitude=args.altitude, seed=args.seed)
+    job, shown = start_ensemble(params, args.workers), 0
+    while True:
+        # the partial results while the job runs, then the final one
+        result = job.poll() if job is not None and job.running else run_ensemble(params)
+        if result["done"] > shown:
+            shown = result["done"]
+            print(f"{result['done']:>8} / {result['samples']} samples  P(lifetime <= {DEORBIT_YEARS:g} years) = "
+                  f"{result['probability']:.4f} +/- {result['error']:.4f}")
+        if shown == result["samples"]:
+            break
+        time.sleep(POLL_INTERVAL)
+    p = result["percentiles"]
+    print(f"lifetime 5% {p[5]:.2f}  50% {p[50]:.2f}  95% {p[95]:.2f} years")
+    print(f"MR1 {'PASS' if result['passed'] else 'FAIL'} (required probability {REQUIRED_PROBABILITY:g})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,15 +5,31 @@ import pandas as pd
 
 import matplotlib.pyplot as plt
 from orbithelper import (plot_decay_graph, get_orbit_parameters,  
-                        GetPositionVectors, plotly_orbit_plotter)
+                        GetPositionVectors, plotly_orbit_plotter,
+                        walker_constellation, constellation_properties, plotly_constellation_plotter,
+                        plotly_power_budget)
+from passes import downlink_check, REQUIRED_GB_PER_DAY
+from power import power_budget, MIN_STATE_OF_CHARGE
 
 from poliastro.twobody import Orbit
 from poliastro.bodies import Earth
 from poliastro.bodies import *
 
 
-@st.cache_resource(show_spinner=False)
+# "CubeSat" shows the mission orbit, "Constellation" a table of satellites propagated together
+ORBIT_MODES = ["CubeSat", "Constellation"]
+
+
 def orbitfunc():
+    mode = st.radio("Orbit mode", ORBIT_MODES, horizontal=True, key="orbit_mode")
+    if mode == "Constellation":
+        constellationfunc()
+    else:
+        cubesatorbitfunc()
+
+
+@st.cache_resource(show_spinner=False)
+def cubesatorbitfunc():
     st.subheader("Orbital Details", divider="violet")
 
     attractor = Earth
@@ -60,17 +76,12 @@ def orbitfunc():
 
     # Create an instance of OrbitElements
     initial_orbit_elements = GetPositionVectors(initial_orbit)
-    # Get position and velocity at periapsis of initial orbit (0 degrees true anomaly)
-    nu_periapsis_initial = 0 * u.deg
-    position_periapsis_initial, velocity_periapsis_initial = initial_orbit_elements.get_position_velocity(nu_periapsis_initial)
-
-    # Get position and velocity at apoapsis of initial orbit (180 degrees true anomaly)
-    nu_apoapsis_initial = 180 * u.deg
-    position_apoapsis_initial, velocity_apoapsis_initial = initial_orbit_elements.get_position_velocity(nu_apoapsis_initial)
+    # Get position and velocity at periapsis (0 degrees true anomaly) and apoapsis (180 degrees) of initial orbit
+    positions_initial, velocities_initial = initial_orbit_elements.get_position_velocity_batch([0, 180] * u.deg)
+    position_periapsis_initial, position_apoapsis_initial = positions_initial
 
     # Calculate absolute velocity at point
-    velocity_periapsis_initial_abs = np.linalg.norm(velocity_periapsis_initial)
-    velocity_apoapsis_initial_abs = np.linalg.norm(velocity_apoapsis_initial)
+    velocity_periapsis_initial_abs, velocity_apoapsis_initial_abs = np.linalg.norm(velocities_initial, axis=1)
 
     positions = {
         "I Periapsis": position_periapsis_initial,
@@ -91,10 +102,66 @@ def orbitfunc():
         with st.expander("CubeSat Orbit Details", expanded=True):
             st.dataframe(orbits_df.T.reset_index().rename(columns={'index':'Orbit Properties' ,'CubeSat Orbit': 'Values'}), 
                          hide_index=True, use_container_width=True)
-        fig = plot_decay_graph()
+        # decay curve computed from the altitude of the selected orbit
+        fig = plot_decay_graph(initial_orbit.a.to(u.km).value - attractor.R.to(u.km).value)
         st.pyplot(fig, use_container_width=True)
 
-    
-    
+        # requirement MR2, computed from ground station passes over one week at 1 second steps
+        with st.expander("MR2 Downlink Check", expanded=False):
+            elements = (initial_orbit.a.to(u.km).value, initial_orbit.ecc.value, initial_orbit.inc.to(u.rad).value,
+                        initial_orbit.raan.to(u.rad).value, initial_orbit.argp.to(u.rad).value, initial_orbit.nu.to(u.rad).value)
+            passed, daily = downlink_check(elements, initial_orbit.epoch.datetime, days=7)
+            st.metric(label="Minimum Daily Downlink", value=f"{daily.loc[daily['Checked'], 'Volume (GB)'].min():.2f} GB",
+                      delta=f"{'PASS' if passed else 'FAIL'} (required: {REQUIRED_GB_PER_DAY} GB per day)",
+                      delta_color="normal" if passed else "inverse")
+            st.dataframe(daily, hide_index=True, use_container_width=True)
+
+    # eclipses and battery charge over one year at 10 second steps, computed once per orbit
+    with st.expander("Eclipse and Power Budget", expanded=False):
+        budget = power_budget(elements, initial_orbit.epoch.datetime, days=365)
+        orbits_power = budget["orbits"]
+        metriccols = st.columns(4)
+        metriccols[0].metric(label="Longest Eclipse", value=f"{orbits_power['Eclipse (min)'].max():.1f} min")
+        metriccols[1].metric(label="Mean Sunlight", value=f"{orbits_power['Sunlight (%)'].mean():.1f} %")
+        metriccols[2].metric(label="Beta Angle Range",
+                             value=f"{budget['daily']['Beta (deg)'].min():.0f} to {budget['daily']['Beta (deg)'].max():.0f} deg")
+        metriccols[3].metric(label="Minimum Battery Charge", value=f"{budget['min_charge']:.1f} %",
+                             delta=f"{'PASS' if budget['passed'] else 'FAIL'} (required: {MIN_STATE_OF_CHARGE:.0%})",
+                             delta_color="normal" if budget["passed"] else "inverse")
+        st.plotly_chart(plotly_power_budget(budget, MIN_STATE_OF_CHARGE * 100), use_container_width=True)
+        st.dataframe(orbits_power, hide_index=True, use_container_width=True)
+
+
+def constellationfunc():
+    st.subheader("Constellation", divider="violet")
+
+    # Walker delta pattern as the starting table, every row can then be edited
+    with st.expander("Walker Constellation", expanded=True):
+        cols = st.columns(5)
+        satellites = cols[0].number_input("Satellites", min_value=1, max_value=5000, value=24, step=1)
+        planes = cols[1].number_input("Planes", min_value=1, max_value=500, value=4, step=1)
+        phasing = cols[2].number_input("Phasing", min_value=0, max_value=500, value=1, step=1)
+        altitude = cols[3].number_input("Altitude (km)", min_value=150.0, max_value=40000.0, value=465.0)
+        inclination = cols[4].number_input("Inclination (deg)", min_value=0.0, max_value=180.0, value=55.0)
+
+    elements = walker_constellation(satellites, planes, phasing, altitude, inclination)
+    with st.expander("Orbital Elements", expanded=False):
+        elements = st.data_editor(elements, num_rows="dynamic", hide_index=True, use_container_width=True,
+                                  key=f"constellation_{satellites}_{planes}_{phasing}_{altitude}_{inclination}")
+    elements = elements.dropna()
+
+    # open orbits have no closed line to draw
+    closed = elements["ecc"] < 1
+    if not closed.all():
+        st.warning(f"{(~closed).sum()} satellites with eccentricity >= 1 are not shown")
+        elements = elements[closed]
+    if elements.empty:
+        st.info("No satellites to show")
+        return
 
- 
+    cols = st.columns([0.6, 0.4])
+    with cols[0]:
+        st.plotly_chart(plotly_constellation_plotter(elements.reset_index(drop=True), Earth), use_container_width=True)
+    with cols[1]:
+        with st.expander("Constellation Orbit Details", expanded=True):
+            st.dataframe(constellation_properties(elements), use_container_width=True)
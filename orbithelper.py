@@ -6,19 +6,34 @@ import streamlit as st
 from plotly.subplots import make_subplots
 from poliastro.bodies import *
 import matplotlib.pyplot as plt
-from poliastro.core.elements import coe2rv
 from astropy.time import Time
 import plotly.graph_objs as go
 from PIL import Image
+import os
+import threading
+from collections import OrderedDict
 
-
-@st.cache_data(show_spinner=False)
-def plot_decay_graph():
+from decay import decay_curve, DEFAULT_BALLISTIC_COEFFICIENT, DEFAULT_SOLAR_FLUX, MU_EARTH, R_EARTH
+from diagnostics import traced
 
 
-    decaydf = pd.read_csv('reports/decay.csv')
-    times = decaydf['times'].values
-    altitudes = decaydf['altitudes'].values
+@traced("figure")
+@st.cache_data(show_spinner=False)
+def plot_decay_graph(altitude=465.0, ballistic_coefficient=DEFAULT_BALLISTIC_COEFFICIENT, solar_flux=DEFAULT_SOLAR_FLUX):
+    """
+    Plots the orbital decay of the CubeSat from the given circular orbit altitude until re-entry.
+    Parameters:
+    altitude: float
+        Initial orbit altitude in km
+    ballistic_coefficient: float
+        m / (Cd * A) of the CubeSat in kg/m^2
+    solar_flux: float
+        F10.7 solar flux in sfu
+    Returns:
+    fig: matplotlib.figure.Figure
+    """
+    # propagated in decay.py, the curve is memoized per (altitude, ballistic coefficient, solar flux)
+    times, altitudes = decay_curve(altitude, ballistic_coefficient, solar_flux)
     
     fig = plt.figure(figsize=(12,5))
     ax = fig.add_subplot(111)
@@ -35,12 +50,246 @@ def plot_decay_graph():
     return fig
 
 
+@traced("figure")
+def plotly_power_budget(result, min_charge=70.0):
+    """
+    Plots the eclipse and power analysis of an orbit (power.simulate_power): the beta angle and the longest
+    eclipse of each day, the range of the battery charge over each day, and the first orbits in detail.
+    Parameters:
+    result: dict
+        returned by power.power_budget
+    min_charge: float
+        lowest allowed state of charge in %, drawn as a line
+    Returns:
+    fig: plotly.graph_objs.Figure
+    """
+    daily, detail = result["daily"], result["detail"]
+    # the orbits are summed up by day, a year of them is several thousand points per trace
+    orbits = result["orbits"].groupby(result["orbits"]["Start"].dt.floor("D")).agg(
+        {"Eclipse (min)": "max", "Min Charge (%)": "min", "Max Charge (%)": "max"})
+    fig = make_subplots(rows=3, cols=1, vertical_spacing=0.08,
+                        specs=[[{"secondary_y": True}], [{}], [{"secondary_y": True}]],
+                        subplot_titles=("Beta Angle and Longest Eclipse", "Battery Charge Range", "First Orbits"))
+    fig.add_trace(go.Scatter(x=orbits.index, y=orbits["Eclipse (min)"], name="Eclipse (min)", line=dict(width=1)),
+                  row=1, col=1, secondary_y=True)
+    fig.add_trace(go.Scatter(x=pd.to_datetime(daily["Date"]), y=daily["Beta (deg)"], name="Beta (deg)",
+                             line=dict(width=2)), row=1, col=1)
+    fig.add_trace(go.Scatter(x=orbits.index, y=orbits["Max Charge (%)"], name="Max Charge (%)", line=dict(width=1)),
+                  row=2, col=1)
+    fig.add_trace(go.Scatter(x=orbits.index, y=orbits["Min Charge (%)"], name="Min Charge (%)", line=dict(width=1),
+                             fill="tonexty"), row=2, col=1)
+    fig.add_hline(y=min_charge, line_dash="dash", line_color="red", row=2, col=1)
+    fig.add_trace(go.Scattergl(x=detail["Time"], y=detail["Charge (%)"], name="Charge (%)", mode="lines"),
+                  row=3, col=1)
+    fig.add_trace(go.Scattergl(x=detail["Time"], y=detail["Illumination"], name="Illumination", mode="lines",
+                               line=dict(width=1, dash="dot")), row=3, col=1, secondary_y=True)
+    fig.update_yaxes(title_text="Beta (deg)", row=1, col=1)
+    fig.update_yaxes(title_text="Eclipse (min)", row=1, col=1, secondary_y=True)
+    fig.update_yaxes(title_text="Charge (%)", row=2, col=1)
+    fig.update_yaxes(title_text="Charge (%)", row=3, col=1)
+    fig.update_yaxes(title_text="Illumination", range=[0, 1.05], row=3, col=1, secondary_y=True)
+    fig.update_layout(height=900, legend=dict(orientation="h"))
+    return fig
+
+
 
 
 # ORBIT PROJECTIONS
 
+# globe mesh resolution levels, (longitude points, latitude points). None is the full texture
+GLOBE_LEVELS = {
+    "low": (64, 32),
+    "medium": (256, 128),
+    "high": (512, 256),
+    "full": None,
+}
+GLOBE_TEXTURE = 'images/temp.jpeg'
+# precomputed meshes are stored next to the texture
+GLOBE_CACHE_DIR = 'images/.globe'
+_globe_meshes = {}
+_globe_lock = threading.Lock()
+
+
+def get_globe_mesh(level, radius_equatorial, radius_polar):
+    """
+    Returns the x, y, z grids and the surface color of the globe at a resolution level.
+    The mesh is built once per level and radius, saved as a .npy file, and memory-mapped on later calls.
+    Parameters:
+    level: str
+        One of GLOBE_LEVELS
+    radius_equatorial, radius_polar: float
+        Radii of the attractor in km
+    Returns:
+    mesh: numpy.ndarray of shape (4, N_lat, N_lon), holding x, y, z and the texture
+    """
+    name = f"{level}_{radius_equatorial:.3f}_{radius_polar:.3f}.npy"
+    with _globe_lock:
+        if name in _globe_meshes:
+            return _globe_meshes[name]
+
+        path = os.path.join(GLOBE_CACHE_DIR, name)
+        if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(GLOBE_TEXTURE):
+            image = Image.open(GLOBE_TEXTURE)
+            if GLOBE_LEVELS[level] is not None:
+                image = image.resize(GLOBE_LEVELS[level])
+            texture = np.asarray(image).T
+            N_lat = int(texture.shape[0])
+            N_lon = int(texture.shape[1])
+            thetas = np.linspace(0, 2 * np.pi, N_lat)
+            phis = np.linspace(0, np.pi, N_lon)
+
+            mesh = np.stack([
+                radius_equatorial * np.outer(np.cos(thetas), np.sin(phis)),
+                radius_equatorial * np.outer(np.sin(thetas), np.sin(phis)),
+                radius_polar * np.outer(np.ones(N_lat), np.cos(phis)),
+                texture,
+            ]).astype(np.float32)
+            os.makedirs(GLOBE_CACHE_DIR, exist_ok=True)
+            # write then rename, so another session never maps half a file
+            tmp = path + ".tmp.npy"
+            np.save(tmp, mesh)
+            os.replace(tmp, path)
+
+        mesh = np.load(path, mmap_mode="r")
+        _globe_meshes[name] = mesh
+        return mesh
+
+
+def add_globe(fig, attractor, globe_level="low"):
+    """
+    Adds the textured attractor surface to a 3D plotly figure.
+    Parameters:
+    fig: plotly.graph_objects.Figure
+    attractor: poliastro.bodies.Body
+    globe_level: str
+        Resolution of the mesh, one of GLOBE_LEVELS
+    """
+    u_rad = u.km
+    radius_equatorial = attractor.R.to(u_rad).value
+    if attractor.R_polar is None:
+        radius_polar = radius_equatorial
+    else:
+        radius_polar = attractor.R_polar.to(u_rad).value
+    
+    # precomputed mesh at the requested level of detail
+    x_center, y_center, z_center, texture = get_globe_mesh(globe_level, radius_equatorial, radius_polar)
+    colorscale =[[0.0, 'rgb(30, 59, 117)'],
+
+                 [0.1, 'rgb(46, 68, 21)'],
+                 [0.2, 'rgb(74, 96, 28)'],
+                 [0.3, 'rgb(115,141,90)'],
+                 [0.4, 'rgb(122, 126, 75)'],
+
+                 [0.6, 'rgb(122, 126, 75)'],
+                 [0.7, 'rgb(141,115,96)'],
+                 [0.8, 'rgb(223, 197, 170)'],
+                 [0.9, 'rgb(237,214,183)'],
+
+                 [1.0, 'rgb(255, 255, 255)']]
 
-def plotly_orbit_plotter(orbit_list, attractor, positions=None, labels=None):
+    fig.add_trace(
+        go.Surface(
+            x=x_center, 
+            y=y_center, 
+            z=z_center, 
+            surfacecolor=texture,
+            colorscale=colorscale, 
+            showscale=False,
+            hovertext='none',
+            hovertemplate=None
+        )
+    )
+
+
+# ORBIT SAMPLING
+
+# largest distance (km) between a sampled orbit line and the true orbit, about a third of a pixel on the orbit figure
+SAMPLE_TOLERANCE = 5.0
+# fewest and most points of one orbit line
+SAMPLE_POINTS = (32, 4000)
+# sampled orbit lines kept in memory, the least recently used are dropped first
+SAMPLE_CACHE_SIZE = 256
+_samples = OrderedDict()
+_samples_lock = threading.Lock()
+
+
+def adaptive_true_anomalies(a, ecc, tol=SAMPLE_TOLERANCE, fine=4096):
+    """
+    True anomalies over one revolution of a closed orbit, spaced so that the chord between two
+    neighbouring points stays within tol of the ellipse.
+    The chord error of a step ds is about curvature * ds^2 / 8, so the point density along the orbit is
+    sqrt(curvature / (8 tol)) per km, times ds/dnu to get it per radian of true anomaly. Near periapsis of an
+    eccentric orbit both are large and the points gather there, a circular orbit gets evenly spaced points.
+    Parameters:
+    a: float
+        Semi-major axis in km
+    ecc: float
+        Eccentricity, below 1
+    tol: float
+        Chord error tolerance in km
+    fine: int
+        Resolution of the grid the density is integrated on
+    Returns:
+    nu: numpy.ndarray, true anomalies in rad from -pi to pi, the first and last points are both at apoapsis
+    """
+    nu = np.linspace(-np.pi, np.pi, fine + 1)
+    b = a * np.sqrt(1 - ecc**2)
+    # eccentric anomaly: on the ellipse x = a (cos E - e), y = b sin E
+    E = 2 * np.arctan2(np.sqrt(1 - ecc) * np.sin(nu / 2), np.sqrt(1 + ecc) * np.cos(nu / 2))
+    q = (a * np.sin(E))**2 + (b * np.cos(E))**2
+    # ds/dE = sqrt(q) and curvature = a b / q^1.5, so points per radian of E = sqrt(a b / (8 tol)) q^-0.25
+    density = np.sqrt(a * b / (8 * tol)) * q**-0.25 * np.sqrt(1 - ecc**2) / (1 + ecc * np.cos(nu))
+
+    cumulative = np.concatenate([[0.0], np.cumsum((density[1:] + density[:-1]) / 2 * np.diff(nu))])
+    segments = int(np.clip(np.ceil(cumulative[-1]), *SAMPLE_POINTS))
+    return np.interp(np.linspace(0, cumulative[-1], segments + 1), cumulative, nu)
+
+
+def sampled_orbit(a, ecc, inc, raan, argp, tol=SAMPLE_TOLERANCE):
+    """
+    Orbit line of a closed orbit from its classical elements, sampled with adaptive_true_anomalies.
+    The lines are kept in a bounded LRU cache keyed by the elements, so a repeat render costs a dict lookup.
+    Parameters:
+    a: float
+        Semi-major axis in km
+    ecc: float
+        Eccentricity, below 1
+    inc, raan, argp: float
+        Inclination, right ascension of the ascending node and argument of periapsis in rad
+    tol: float
+        Chord error tolerance in km
+    Returns:
+    r: numpy.ndarray (N, 3) float32, read-only, positions in km
+    """
+    key = (float(a), float(ecc), float(inc), float(raan), float(argp), float(tol))
+    with _samples_lock:
+        if key in _samples:
+            _samples.move_to_end(key)
+            return _samples[key]
+
+    nu = adaptive_true_anomalies(a, ecc, tol)
+    radius = a * (1 - ecc**2) / (1 + ecc * np.cos(nu))
+    r_pqw = np.column_stack([radius * np.cos(nu), radius * np.sin(nu), np.zeros_like(nu)])
+    r = (r_pqw @ _perifocal_to_inertial(raan, inc, argp).T).astype(np.float32)
+    r.setflags(write=False)
+
+    with _samples_lock:
+        _samples[key] = r
+        if len(_samples) > SAMPLE_CACHE_SIZE:
+            _samples.popitem(last=False)
+    return r
+
+
+def orbit_elements(orbit):
+    '''
+    The classical elements of a poliastro orbit as plain floats: a (km), ecc, inc, raan, argp (rad)
+    '''
+    return (orbit.a.to_value(u.km), float(orbit.ecc.value), orbit.inc.to_value(u.rad),
+            orbit.raan.to_value(u.rad), orbit.argp.to_value(u.rad))
+
+
+@traced("figure")
+def plotly_orbit_plotter(orbit_list, attractor, positions=None, labels=None, globe_level="low"):
     """
     Plots a list of orbits in 3D using plotly.
     Parameters:
@@ -52,6 +301,8 @@ def plotly_orbit_plotter(orbit_list, attractor, positions=None, labels=None):
         List of tuples containing maneuver impulse data in the format (Orbit, time, delta-v)
     labels: list of str
         List of labels for the orbits
+    globe_level: str
+        Resolution of the Earth mesh, one of GLOBE_LEVELS. "full" uses every texture pixel
     Returns:
     fig: plotly.graph_objects.Figure
     Help received from this thread: https://community.plotly.com/t/applying-full-color-image-texture-to-create-an-interactive-earth-globe/60166
@@ -62,8 +313,11 @@ def plotly_orbit_plotter(orbit_list, attractor, positions=None, labels=None):
         labels = ["Orbit"] * len(orbit_list)
 
     for orbit, label in zip(orbit_list, labels):
-        r = orbit.sample().xyz.T
-        x, y, z = r[:, 0].to(u.km).value, r[:, 1].to(u.km).value, r[:, 2].to(u.km).value
+        if orbit.ecc.value < 1:
+            # closed orbit: adaptive sampling, cached by the classical elements
+            x, y, z = sampled_orbit(*orbit_elements(orbit)).T
+        else:
+            x, y, z = orbit.sample().xyz.to_value(u.km).astype(np.float32)
         fig.add_trace(
             go.Scatter3d(
                 x=x,
@@ -104,56 +358,182 @@ def plotly_orbit_plotter(orbit_list, attractor, positions=None, labels=None):
             )
 
     # Add attractor
-    texture = np.asarray(Image.open('images/temp.jpeg')).T
-    u_rad = u.km
-    N_lat = int(texture.shape[0])
-    N_lon = int(texture.shape[1])
-    thetas = np.linspace(0, 2 * np.pi, N_lat)
-    phis = np.linspace(0, np.pi, N_lon)
-    radius_equatorial = attractor.R.to(u_rad).value
-    if attractor.R_polar is None:
-        radius_polar = radius_equatorial
-    else:
-        radius_polar = attractor.R_polar.to(u_rad).value
-    
-    
-    x_center = radius_equatorial * np.outer(np.cos(thetas), np.sin(phis))
-    y_center = radius_equatorial * np.outer(np.sin(thetas), np.sin(phis))
-    z_center = radius_polar * np.outer(np.ones(N_lat),np.cos(phis))
-    colorscale =[[0.0, 'rgb(30, 59, 117)'],
+    add_globe(fig, attractor, globe_level)
 
-                 [0.1, 'rgb(46, 68, 21)'],
-                 [0.2, 'rgb(74, 96, 28)'],
-                 [0.3, 'rgb(115,141,90)'],
-                 [0.4, 'rgb(122, 126, 75)'],
+    fig.update_layout(title_text="Orbit Projection",scene=dict(aspectmode="data"))
+    fig.update_layout(height=800, legend=dict(x=0, y=1, orientation="h"))
 
-                 [0.6, 'rgb(122, 126, 75)'],
-                 [0.7, 'rgb(141,115,96)'],
-                 [0.8, 'rgb(223, 197, 170)'],
-                 [0.9, 'rgb(237,214,183)'],
+    return fig
+
+   
+
+
+# CONSTELLATIONS
+
+# columns of a constellation table: one satellite per row, classical elements with angles in degrees
+CONSTELLATION_COLUMNS = ["Satellite", "Plane", "a (km)", "ecc", "inc (deg)", "raan (deg)", "argp (deg)", "nu (deg)"]
+# above this many planes the orbit lines are merged into a single trace
+MAX_PLANE_TRACES = 12
+
+
+def walker_constellation(satellites=24, planes=4, phasing=1, altitude=465.0, inclination=55.0):
+    """
+    Returns the element table of a Walker delta constellation i: t/p/f, circular orbits.
+    Parameters:
+    satellites: int
+        Total number of satellites t, rounded down to a multiple of the planes
+    planes: int
+        Number of equally spaced orbital planes p
+    phasing: int
+        Phasing factor f, shifts the satellites of neighbouring planes by f * 360 / t degrees
+    altitude: float
+        Orbit altitude in km
+    inclination: float
+        Inclination i in degrees
+    Returns:
+    pandas.DataFrame with CONSTELLATION_COLUMNS
+    """
+    planes = max(int(planes), 1)
+    per_plane = max(int(satellites) // planes, 1)
+    total = planes * per_plane
+    plane = np.repeat(np.arange(planes), per_plane)
+    slot = np.tile(np.arange(per_plane), planes)
+    return pd.DataFrame({
+        "Satellite": [f"Sat {p + 1}-{s + 1}" for p, s in zip(plane, slot)],
+        "Plane": plane + 1,
+        "a (km)": np.full(total, R_EARTH + altitude),
+        "ecc": np.zeros(total),
+        "inc (deg)": np.full(total, float(inclination)),
+        "raan (deg)": 360.0 * plane / planes,
+        "argp (deg)": np.zeros(total),
+        "nu (deg)": np.mod(360.0 * slot / per_plane + 360.0 * phasing * plane / total, 360.0),
+    })
 
-                 [1.0, 'rgb(255, 255, 255)']]
 
+@st.cache_data(show_spinner=False)
+def constellation_positions(elements, points=100):
+    """
+    Propagates every satellite of a constellation table in one vectorized batch.
+    Parameters:
+    elements: pandas.DataFrame
+        Closed orbits (ecc < 1) with CONSTELLATION_COLUMNS
+    points: int
+        Points per orbit line
+    Returns:
+    tracks: numpy.ndarray (S, points, 3), the orbit of each satellite in km
+    satellites: numpy.ndarray (S, 3), the position of each satellite at its true anomaly in km
+    """
+    a = elements["a (km)"].to_numpy(float)
+    ecc = elements["ecc"].to_numpy(float)
+    p = a * (1 - ecc**2)
+    # one (3, 3) perifocal to inertial rotation per satellite
+    rotation = _perifocal_to_inertial(*np.radians(elements[["raan (deg)", "inc (deg)", "argp (deg)"]].to_numpy(float).T))
+
+    # true anomalies: a shared grid for the orbit lines, plus the current one of each satellite
+    nu = np.concatenate([np.broadcast_to(np.linspace(0, 2 * np.pi, points), (len(a), points)),
+                         np.radians(elements[["nu (deg)"]].to_numpy(float))], axis=1)
+    radius = p[:, None] / (1 + ecc[:, None] * np.cos(nu))
+    r_pqw = np.stack([radius * np.cos(nu), radius * np.sin(nu), np.zeros_like(nu)], axis=-1)
+    r = np.einsum("sij,spj->spi", rotation, r_pqw)
+    return r[:, :points], r[:, points]
+
+
+def constellation_properties(elements, k=MU_EARTH, radius=R_EARTH):
+    """
+    Returns the orbit properties of every satellite, one row per satellite, computed column-wise.
+    Parameters:
+    elements: pandas.DataFrame with CONSTELLATION_COLUMNS
+    Returns:
+    pandas.DataFrame indexed by satellite, with the columns of the single orbit properties table
+    """
+    a = elements["a (km)"].to_numpy(float)
+    ecc = elements["ecc"].to_numpy(float)
+    return pd.DataFrame(
+        {
+            "Plane": elements["Plane"].to_numpy(),
+            "Altitude (km)": a - radius,
+            "Semi-major axis (km)": a,
+            "Inclination (deg)": elements["inc (deg)"].to_numpy(float),
+            "Eccentricity": ecc,
+            "Periapsis from surface (km)": a * (1 - ecc) - radius,
+            "Apoapsis from surface (km)": a * (1 + ecc) - radius,
+            "Longitude of Ascending Node (deg)": elements["raan (deg)"].to_numpy(float),
+            "Argument of periapsis (deg)": elements["argp (deg)"].to_numpy(float),
+            "True anomaly (deg)": elements["nu (deg)"].to_numpy(float),
+            "Period (s)": 2 * np.pi * np.sqrt(a**3 / k),
+        },
+        index=pd.Index(elements["Satellite"].to_numpy(), name="Satellite"),
+    )
+
+
+def _merge_lines(tracks):
+    """
+    Joins (S, P, 3) orbit lines into one (S * (P + 1), 3) line, a NaN row between two orbits breaks the line
+    """
+    gaps = np.full((tracks.shape[0], 1, 3), np.nan)
+    return np.concatenate([tracks, gaps], axis=1).reshape(-1, 3)
+
+
+@traced("figure")
+def plotly_constellation_plotter(elements, attractor, globe_level="low", points=100):
+    """
+    Plots a constellation in 3D using plotly, with a constant number of traces.
+    Parameters:
+    elements: pandas.DataFrame
+        Closed orbits with CONSTELLATION_COLUMNS
+    attractor: poliastro.bodies.Body
+        Main attractor of the orbits
+    globe_level: str
+        Resolution of the Earth mesh, one of GLOBE_LEVELS
+    points: int
+        Points per orbit line
+    Returns:
+    fig: plotly.graph_objects.Figure
+    """
+    fig = make_subplots(rows=1, cols=1, specs=[[{"type": "scatter3d"}]])
+    tracks, satellites = constellation_positions(elements, points)
+    plane = elements["Plane"].to_numpy()
+
+    # one line trace per plane, or a single one when there are too many planes to tell apart
+    groups = np.unique(plane) if len(np.unique(plane)) <= MAX_PLANE_TRACES else [None]
+    for group in groups:
+        mask = np.ones(len(plane), bool) if group is None else plane == group
+        x, y, z = _merge_lines(tracks[mask]).T
+        fig.add_trace(
+            go.Scatter3d(
+                x=x,
+                y=y,
+                z=z,
+                mode="lines",
+                name="Orbits" if group is None else f"Plane {group}",
+                showlegend=True,
+                connectgaps=False,
+                hoverinfo="skip",
+                line=dict(width=3)
+            )
+        )
+
+    # every satellite in one marker trace, colored by plane
     fig.add_trace(
-        go.Surface(
-            x=x_center, 
-            y=y_center, 
-            z=z_center, 
-            surfacecolor=texture,
-            colorscale=colorscale, 
-            showscale=False,
-            hovertext='none',
-            hovertemplate=None
+        go.Scatter3d(
+            x=satellites[:, 0],
+            y=satellites[:, 1],
+            z=satellites[:, 2],
+            mode="markers",
+            name="Satellites",
+            text=elements["Satellite"].to_numpy(),
+            hovertemplate="%{text}<extra></extra>",
+            marker=dict(size=4, color=pd.factorize(plane)[0], colorscale="Turbo", opacity=1),
         )
     )
 
-    fig.update_layout(title_text="Orbit Projection",scene=dict(aspectmode="data"))
+    add_globe(fig, attractor, globe_level)
+
+    fig.update_layout(title_text=f"Constellation Projection ({len(elements)} satellites)", scene=dict(aspectmode="data"))
     fig.update_layout(height=800, legend=dict(x=0, y=1, orientation="h"))
 
     return fig
 
-   
-
 
 @st.cache_data()
 def semimajor_axis_from_periapsis(periapsis, eccentricity, attractor_radius):
@@ -232,31 +612,100 @@ class GetPositionVectors:
         self.inc = orbit.inc
         self.raan = orbit.raan
         self.argp = orbit.argp
+        self.nu = orbit.nu
         self.body = orbit.attractor
         self.k = orbit.attractor.k.to(u.km**3 / u.s**2)  # Gravitational parameter in km^3/s^2
         self.p = (self.a * (1 - self.ecc**2)).to(u.km)  # Semi-latus rectum in km
 
+        # plain floats for the batched kernels, units are only attached to the results
+        self._k = self.k.value
+        self._p = self.p.value
+        self._ecc = float(self.ecc.value)
+        # perifocal (PQW) to inertial (IJK) rotation, Rz(raan) @ Rx(inc) @ Rz(argp)
+        self._rotation = _perifocal_to_inertial(self.raan.to(u.rad).value, self.inc.to(u.rad).value,
+                                                self.argp.to(u.rad).value)
+
     def get_position_velocity(self, nu):
         '''
         Return the position and velocity vector for any orbit.
         '''
-        r_ijk, v_ijk = coe2rv(self.k, self.p, self.ecc.value, self.inc.to(u.rad).value,
-                              self.raan.to(u.rad).value, self.argp.to(u.rad).value, nu.to(u.rad).value)
+        position, velocity = self.get_position_velocity_batch(np.atleast_1d(nu.to(u.rad).value) * u.rad)
+        return position[0], velocity[0]
+
+    def get_position_velocity_batch(self, nu):
+        '''
+        Return the position and velocity vectors for an array of true anomalies in one vectorized pass.
+        nu: astropy Quantity array of angles, shape (N,)
+        Returns (N, 3) position in km and (N, 3) velocity in km/s.
+        '''
+        r, v = self._state_vectors(np.asarray(nu.to(u.rad).value, dtype=float).ravel())
+        return r * u.km, v * u.km / u.s
 
-        position = r_ijk * u.km
-        velocity = v_ijk * u.km / u.s
+    def get_position_velocity_at_times(self, times):
+        '''
+        Return the position and velocity vectors at times after the orbit epoch, for closed orbits.
+        times: astropy Quantity array of durations, shape (N,)
+        Returns (N, 3) position in km and (N, 3) velocity in km/s.
+        '''
+        t = np.asarray(times.to(u.s).value, dtype=float).ravel()
+        nu = true_anomaly_at_times(self._k, self._p / (1 - self._ecc**2), self._ecc, self.nu.to(u.rad).value, t)
+        r, v = self._state_vectors(nu)
+        return r * u.km, v * u.km / u.s
+
+    def _state_vectors(self, nu):
+        '''
+        Vectorized coe2rv: true anomalies in rad -> (N, 3) position in km and velocity in km/s
+        '''
+        cos_nu, sin_nu = np.cos(nu), np.sin(nu)
+        radius = self._p / (1 + self._ecc * cos_nu)
+        speed = np.sqrt(self._k / self._p)
 
-        return position, velocity
+        r_pqw = np.column_stack([radius * cos_nu, radius * sin_nu, np.zeros_like(nu)])
+        v_pqw = np.column_stack([-speed * sin_nu, speed * (self._ecc + cos_nu), np.zeros_like(nu)])
+        return r_pqw @ self._rotation.T, v_pqw @ self._rotation.T
     
     def get_periapsis_apoapsis_positions(self):
         '''
         Return the position and velocity vector for periapsis and apoapsis of any given orbit.
         '''
-        nu_periapsis = 0 * u.deg
-        position_periapsis, _ = self.get_position_velocity(nu_periapsis)
-
-        nu_apoapsis = 180 * u.deg
-        position_apoapsis, _ = self.get_position_velocity(nu_apoapsis)
+        # periapsis at 0 degrees and apoapsis at 180 degrees true anomaly, in one batch
+        positions, _ = self.get_position_velocity_batch([0, 180] * u.deg)
+        position_periapsis, position_apoapsis = positions
 
         return position_periapsis, position_apoapsis
-    
+
+
+def _perifocal_to_inertial(raan, inc, argp):
+    '''
+    Rotation matrix from the perifocal frame to the inertial frame, Rz(raan) @ Rx(inc) @ Rz(argp), angles in rad.
+    Scalar angles give a (3, 3) matrix, arrays of N angles give (N, 3, 3)
+    '''
+    cr, sr = np.cos(raan), np.sin(raan)
+    ci, si = np.cos(inc), np.sin(inc)
+    ca, sa = np.cos(argp), np.sin(argp)
+    return np.stack([
+        np.stack([cr * ca - sr * sa * ci, -cr * sa - sr * ca * ci, sr * si], axis=-1),
+        np.stack([sr * ca + cr * sa * ci, -sr * sa + cr * ca * ci, -cr * si], axis=-1),
+        np.stack([sa * si, ca * si, ci * np.ones_like(ca)], axis=-1),
+    ], axis=-2)
+
+
+def true_anomaly_at_times(k, a, ecc, nu0, t, tol=1e-12, max_iter=50):
+    '''
+    Solve Kepler's equation for an array of times (s) after the epoch of a closed orbit.
+    k in km^3/s^2, a in km, nu0 in rad. Returns the true anomalies in rad.
+    '''
+    if ecc >= 1:
+        raise ValueError("Kepler propagation by time needs a closed orbit (ecc < 1)")
+    # mean anomaly at epoch, then advanced with the mean motion
+    E0 = 2 * np.arctan(np.sqrt((1 - ecc) / (1 + ecc)) * np.tan(nu0 / 2))
+    M = np.mod(E0 - ecc * np.sin(E0) + np.sqrt(k / a**3) * t, 2 * np.pi)
+
+    # Newton iterations on every element at once
+    E = M if ecc < 0.8 else np.full_like(M, np.pi)
+    for _ in range(max_iter):
+        delta = (E - ecc * np.sin(E) - M) / (1 - ecc * np.cos(E))
+        E = E - delta
+        if np.max(np.abs(delta), initial=0.0) < tol:
+            break
+    return 2 * np.arctan2(np.sqrt(1 + ecc) * np.sin(E / 2), np.sqrt(1 - ecc) * np.cos(E / 2))
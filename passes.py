@@ -0,0 +1,230 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+
+from decay import MU_EARTH, R_EARTH
+
+# Earth J2 zonal harmonic and rotation rate (rad/s)
+J2_EARTH = 1.08262668e-3
+OMEGA_EARTH = 7.2921150e-5
+# WGS84 flattening, used to place the ground stations
+F_EARTH = 1 / 298.257223563
+
+# local ground stations: latitude and longitude (deg), altitude (km),
+# elevation mask (deg) and downlink rate (Mbit/s)
+DEFAULT_GROUND_STATIONS = [
+    {"name": "Tucson", "lat": 32.23, "lon": -110.95, "alt": 0.73, "min_elevation": 10.0, "rate_mbps": 50.0},
+]
+# requirement MR2: the cubesat shall download at least 5 GB per day
+REQUIRED_GB_PER_DAY = 5.0
+
+
+def _gmst(epoch, t):
+    '''
+    Greenwich mean sidereal angle (rad) at t seconds after epoch
+    '''
+    jd = pd.Timestamp(epoch).timestamp() / 86400.0 + 2440587.5
+    theta0 = np.radians((280.46061837 + 360.98564736629 * (jd - 2451545.0)) % 360.0)
+    return theta0 + OMEGA_EARTH * t
+
+
+def _eccentric_anomaly(M, ecc, tol=1e-12, max_iter=50):
+    '''
+    Solve Kepler's equation M = E - e sin E for an array of mean anomalies
+    '''
+    E = M if ecc < 0.8 else np.full_like(M, np.pi)
+    for _ in range(max_iter):
+        delta = (E - ecc * np.sin(E) - M) / (1 - ecc * np.cos(E))
+        E = E - delta
+        if np.max(np.abs(delta), initial=0.0) < tol:
+            break
+    return E
+
+
+def j2_rates(a, ecc, inc):
+    """
+    Secular J2 rates (rad/s) of the node, the argument of periapsis and the mean anomaly.
+    """
+    n = np.sqrt(MU_EARTH / a**3)
+    p = a * (1 - ecc**2)
+    factor = 1.5 * n * J2_EARTH * (R_EARTH / p) ** 2
+    raan_dot = -factor * np.cos(inc)
+    argp_dot = 0.5 * factor * (5 * np.cos(inc) ** 2 - 1)
+    M_dot = n + 0.5 * factor * np.sqrt(1 - ecc**2) * (3 * np.cos(inc) ** 2 - 1)
+    return raan_dot, argp_dot, M_dot
+
+
+def calendar_days(epoch, duration):
+    """
+    Split the window [epoch, epoch + duration) into calendar days.
+
+    Returns:
+    offset (float): seconds from the start of the epoch's day to the epoch, add it to t before binning on 86400
+    dates (numpy.ndarray): the date of each day
+    covered (numpy.ndarray): seconds of each day that fall inside the window
+    """
+    start = pd.Timestamp(epoch)
+    offset = (start - start.normalize()).total_seconds()
+    n_days = max(int(np.ceil((offset + duration) / 86400.0)), 1)
+    bounds = np.clip(np.arange(n_days + 1) * 86400.0 - offset, 0.0, duration)
+    dates = (start.normalize() + pd.to_timedelta(np.arange(n_days), unit="D")).date
+    return offset, dates, np.diff(bounds)
+
+
+def ecef_chunks(elements, epoch, duration, step=1.0, chunk=86400.0, earth_fixed=True):
+    """
+    Propagate an orbit with J2 secular drift and yield its Earth-fixed (or inertial) positions chunk by chunk.
+
+    Parameters:
+    elements (tuple): a (km), ecc, inc, raan, argp, nu (rad) at epoch
+    epoch (datetime): epoch of the elements, UTC
+    duration (float): length of the propagation (in seconds)
+    step (float): time step (in seconds)
+    chunk (float): length of each chunk (in seconds), only one chunk is held in memory
+    earth_fixed (bool): Earth-fixed positions, or inertial ones (equator and equinox of date) if False
+
+    Yields:
+    t (numpy.ndarray): seconds after epoch, shape (N,)
+    r (numpy.ndarray): position (in kilometers), shape (N, 3)
+    """
+    a, ecc, inc, raan0, argp0, nu0 = elements
+    p = a * (1 - ecc**2)
+    raan_dot, argp_dot, M_dot = j2_rates(a, ecc, inc)
+
+    E0 = 2 * np.arctan(np.sqrt((1 - ecc) / (1 + ecc)) * np.tan(nu0 / 2))
+    M0 = E0 - ecc * np.sin(E0)
+    steps_per_chunk = max(int(chunk // step), 1)
+    total = int(duration // step)
+
+    for first in range(0, total, steps_per_chunk):
+        t = (first + np.arange(min(steps_per_chunk, total - first))) * step
+        E = _eccentric_anomaly(np.mod(M0 + M_dot * t, 2 * np.pi), ecc)
+        nu = 2 * np.arctan2(np.sqrt(1 + ecc) * np.sin(E / 2), np.sqrt(1 - ecc) * np.cos(E / 2))
+        radius = p / (1 + ecc * np.cos(nu))
+        arg_lat = argp0 + argp_dot * t + nu
+        # node measured from Greenwich, so the inertial to Earth-fixed rotation is folded in
+        node = raan0 + raan_dot * t - (_gmst(epoch, t) if earth_fixed else 0.0)
+
+        cos_u, sin_u = np.cos(arg_lat), np.sin(arg_lat)
+        cos_node, sin_node = np.cos(node), np.sin(node)
+        r = np.empty((len(t), 3))
+        r[:, 0] = radius * (cos_node * cos_u - sin_node * sin_u * np.cos(inc))
+        r[:, 1] = radius * (sin_node * cos_u + cos_node * sin_u * np.cos(inc))
+        r[:, 2] = radius * sin_u * np.sin(inc)
+        yield t, r
+
+
+def _station_frame(station):
+    '''
+    Earth-fixed position (km) and local up unit vector of a ground station
+    '''
+    lat, lon = np.radians(station["lat"]), np.radians(station["lon"])
+    e2 = F_EARTH * (2 - F_EARTH)
+    N = R_EARTH / np.sqrt(1 - e2 * np.sin(lat) ** 2)
+    alt = station.get("alt", 0.0)
+    position = np.array([(N + alt) * np.cos(lat) * np.cos(lon),
+                         (N + alt) * np.cos(lat) * np.sin(lon),
+                         (N * (1 - e2) + alt) * np.sin(lat)])
+    up = np.array([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+    return position, up
+
+
+def predict_passes(elements, epoch, days=7, step=1.0, stations=None, chunk=86400.0):
+    """
+    Find the visibility windows of the ground stations and the data volume that can be downlinked each day.
+
+    While more than one station is visible, the satellite downlinks to the fastest one.
+
+    Parameters:
+    elements (tuple): a (km), ecc, inc, raan, argp, nu (rad) at epoch
+    epoch (datetime): epoch of the elements, UTC
+    days (float): length of the prediction (in days)
+    step (float): time step (in seconds)
+    stations (list of dict): ground stations, see DEFAULT_GROUND_STATIONS
+    chunk (float): propagation chunk length (in seconds)
+
+    Returns:
+    passes (pandas.DataFrame): Station, AOS, LOS, Duration (s), Max Elevation (deg)
+    daily (pandas.DataFrame): Date, Contact Time (s), Volume (GB), one row per calendar day (UTC if the epoch is)
+    """
+    stations = DEFAULT_GROUND_STATIONS if stations is None else stations
+    frames = [_station_frame(s) for s in stations]
+    masks = np.radians([s["min_elevation"] for s in stations])
+    rates = np.array([s["rate_mbps"] for s in stations]) * 1e6 / 8 / 1e9  # GB per second
+
+    offset, dates, _ = calendar_days(epoch, days * 86400.0)
+    n_days = len(dates)
+    volume = np.zeros(n_days)
+    contact = np.zeros(n_days)
+    records = []
+    # pass that is still open at the end of a chunk, per station: (AOS seconds, max elevation)
+    open_pass = [None] * len(stations)
+    last_t = 0.0
+
+    for t, r in ecef_chunks(elements, epoch, days * 86400.0, step, chunk):
+        day = ((t + offset) // 86400).astype(int)
+        best_rate = np.zeros(len(t))
+        for i, (position, up) in enumerate(frames):
+            rho = r - position
+            elevation = np.arcsin((rho @ up) / np.linalg.norm(rho, axis=1))
+            visible = elevation >= masks[i]
+            best_rate = np.maximum(best_rate, np.where(visible, rates[i], 0.0))
+
+            # rising and falling edges of the visibility, carried over from the previous chunk
+            previous = open_pass[i] is not None
+            edges = np.diff(np.concatenate(([previous], visible, [False])).astype(np.int8))
+            starts = np.flatnonzero(edges == 1)
+            ends = np.flatnonzero(edges == -1)
+            if previous:
+                starts = np.concatenate(([0], starts))
+            for k, (s, e) in enumerate(zip(starts, ends)):
+                peak = elevation[s:e].max() if e > s else -np.pi / 2
+                aos = t[s]
+                if k == 0 and previous:
+                    aos, peak = open_pass[i][0], max(open_pass[i][1], peak)
+                if e == len(t):
+                    # still visible at the end of the chunk, finish it in the next one
+                    open_pass[i] = (aos, peak)
+                    break
+                records.append((stations[i]["name"], aos, t[0] + e * step, np.degrees(peak)))
+            else:
+                open_pass[i] = None
+
+        # data volume and contact time per day
+        volume += np.bincount(day, weights=best_rate * step, minlength=n_days)[:n_days]
+        contact += np.bincount(day, weights=(best_rate > 0) * step, minlength=n_days)[:n_days]
+        last_t = t[-1] + step
+
+    for i, current in enumerate(open_pass):
+        if current is not None:
+            records.append((stations[i]["name"], current[0], last_t, np.degrees(current[1])))
+
+    start = pd.Timestamp(epoch)
+    passes = pd.DataFrame(records, columns=["Station", "AOS", "LOS", "Max Elevation (deg)"])
+    passes["Duration (s)"] = passes["LOS"] - passes["AOS"]
+    passes["AOS"] = start + pd.to_timedelta(passes["AOS"], unit="s")
+    passes["LOS"] = start + pd.to_timedelta(passes["LOS"], unit="s")
+    passes = passes[["Station", "AOS", "LOS", "Duration (s)", "Max Elevation (deg)"]].sort_values("AOS", ignore_index=True)
+
+    daily = pd.DataFrame({
+        "Date": dates,
+        "Contact Time (s)": contact,
+        "Volume (GB)": volume,
+    })
+    return passes, daily
+
+
+def downlink_check(elements, epoch=None, days=7, step=1.0, stations=None, required_gb=REQUIRED_GB_PER_DAY):
+    """
+    Verify requirement MR2: at least required_gb downlinked on every day of the prediction.
+
+    Returns:
+    passed (bool), daily (pandas.DataFrame) as returned by predict_passes, plus Checked: the days held to the requirement
+    """
+    epoch = datetime(2024, 1, 1) if epoch is None else epoch
+    _, daily = predict_passes(elements, epoch, days=days, step=step, stations=stations)
+    # the partial days at either end of the window are not held to the daily requirement
+    _, _, covered = calendar_days(epoch, days * 86400.0)
+    full = np.isclose(covered, 86400.0)
+    daily["Checked"] = full if full.any() else True
+    return bool((daily.loc[daily["Checked"], "Volume (GB)"] >= required_gb).all()), daily
@@ -0,0 +1,260 @@
+import numpy as np
+import pandas as pd
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from decay import R_EARTH
+from passes import calendar_days, ecef_chunks, j2_rates
+from diagnostics import span
+
+# Sun radius and astronomical unit (km)
+R_SUN = 696000.0
+AU = 149597870.7
+# "cylindrical": the shadow is a cylinder of Earth radius, the satellite is either lit or not.
+# "conical": umbra and penumbra of the Sun's disc, the lit fraction goes from 0 to 1 through the penumbra
+SHADOW_MODELS = ["cylindrical", "conical"]
+
+# 3U CubeSat power system, any of them can be overridden per analysis
+POWER_DEFAULTS = {
+    # power of the solar arrays in full sunlight, averaged over the attitude (W)
+    "array_power": 7.0,
+    # continuous load of the bus and payload (W)
+    "load_power": 3.5,
+    # battery capacity (Wh) and the share of it charged at the start
+    "battery_capacity": 20.0,
+    "initial_charge": 1.0,
+    # share of the surplus power that ends up stored in the battery
+    "charge_efficiency": 0.9,
+}
+# the battery shall not be discharged below this share of its capacity
+MIN_STATE_OF_CHARGE = 0.7
+# steps the battery model sums at a time, a few orbits at the default step
+SOC_WINDOW = 2048
+# spacing of the Sun positions the time steps are interpolated from (s)
+SUN_STEP = 3600.0
+# length of the state of charge series kept at full resolution from the epoch, about four orbits in LEO (s)
+DETAIL_DURATION = 21600.0
+
+
+def sun_position(epoch, t):
+    """
+    Low precision position of the Sun (Vallado, Fundamentals of Astrodynamics, algorithm 29), about 0.01 deg.
+
+    Parameters:
+    epoch (datetime): UTC
+    t (numpy.ndarray): seconds after epoch
+
+    Returns:
+    numpy.ndarray (N, 3): position of the Sun (in kilometers), equator and equinox of date
+    """
+    jd = pd.Timestamp(epoch).timestamp() / 86400.0 + 2440587.5 + np.asarray(t) / 86400.0
+    T = (jd - 2451545.0) / 36525.0
+    mean_longitude = np.radians(280.460 + 36000.771 * T)
+    M = np.radians(357.5291092 + 35999.05034 * T)
+    longitude = mean_longitude + np.radians(1.914666471 * np.sin(M) + 0.019994643 * np.sin(2 * M))
+    distance = (1.000140612 - 0.016708617 * np.cos(M) - 0.000139589 * np.cos(2 * M)) * AU
+    obliquity = np.radians(23.439291 - 0.0130042 * T)
+    return np.column_stack([distance * np.cos(longitude),
+                            distance * np.cos(obliquity) * np.sin(longitude),
+                            distance * np.sin(obliquity) * np.sin(longitude)])
+
+
+def illumination(r, sun, model="conical"):
+    """
+    Lit fraction of the Sun's disc seen from the satellite, 0 in umbra and 1 in full sunlight.
+
+    Parameters:
+    r (numpy.ndarray (N, 3)): inertial position of the satellite (km)
+    sun (numpy.ndarray (N, 3)): inertial position of the Sun (km)
+    model (str): one of SHADOW_MODELS
+
+    Returns:
+    numpy.ndarray (N,)
+    """
+    if model == "cylindrical":
+        direction = sun / np.linalg.norm(sun, axis=1)[:, None]
+        along = np.einsum("ij,ij->i", r, direction)
+        across = np.linalg.norm(r - along[:, None] * direction, axis=1)
+        return np.where((along < 0) & (across < R_EARTH), 0.0, 1.0)
+    if model != "conical":
+        raise ValueError(f"unknown shadow model {model!r}, expected one of {SHADOW_MODELS}")
+
+    # apparent radii of the Sun (a) and the Earth (b) and the angle between their centres (c),
+    # the occulted area of two overlapping discs (Montenbruck and Gill, Satellite Orbits, 3.4.2)
+    to_sun = sun - r
+    r_norm, sun_norm = np.linalg.norm(r, axis=1), np.linalg.norm(to_sun, axis=1)
+    a = np.arcsin(np.minimum(R_SUN / sun_norm, 1.0))
+    b = np.arcsin(np.minimum(R_EARTH / r_norm, 1.0))
+    c = np.arccos(np.clip(-np.einsum("ij,ij->i", r, to_sun) / (r_norm * sun_norm), -1.0, 1.0))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x = (c**2 + a**2 - b**2) / (2 * c)
+        y = np.sqrt(np.maximum(a**2 - x**2, 0.0))
+        area = a**2 * np.arccos(np.clip(x / a, -1, 1)) + b**2 * np.arccos(np.clip((c - x) / b, -1, 1)) - c * y
+        partial = 1 - area / (np.pi * a**2)
+    return np.select([c >= a + b, c <= b - a, c <= a - b], [1.0, 0.0, 1 - b**2 / a**2], np.clip(partial, 0.0, 1.0))
+
+
+def beta_angle(elements, epoch, t):
+    """
+    Angle between the orbit plane and the direction of the Sun (deg), with the J2 drift of the node.
+
+    Parameters:
+    elements (tuple): a (km), ecc, inc, raan, argp, nu (rad) at epoch
+    epoch (datetime): epoch of the elements, UTC
+    t (numpy.ndarray): seconds after epoch
+    """
+    a, ecc, inc, raan, _, _ = elements
+    node = raan + j2_rates(a, ecc, inc)[0] * np.asarray(t)
+    normal = np.column_stack([np.sin(inc) * np.sin(node), -np.sin(inc) * np.cos(node), np.full(len(node), np.cos(inc))])
+    sun = sun_position(epoch, t)
+    sun /= np.linalg.norm(sun, axis=1)[:, None]
+    return np.degrees(np.arcsin(np.einsum("ij,ij->i", normal, sun)))
+
+
+def _state_of_charge(energy, level, capacity, window=SOC_WINDOW):
+    '''
+    Battery energy (Wh) after each step, from the energy stored (> 0) or drawn (< 0) in each step, the start level
+    and the capacity. The battery saturates at both ends. Between saturations the level is a cumulative sum, taken
+    over windows of steps, so the loop runs a few times per orbit and not once per step
+    '''
+    out = np.empty(len(energy))
+    i = 0
+    while i < len(energy):
+        j = min(len(energy), i + window)
+        if level >= capacity or level <= 0:
+            # full (empty): it stays so until the first step that draws from (adds to) it
+            turn = np.flatnonzero(energy[i:j] < 0 if level >= capacity else energy[i:j] > 0)
+            if not len(turn):
+                out[i:j] = level
+                i = j
+                continue
+            out[i:i + turn[0]] = level
+            i += turn[0]
+        x = level + np.cumsum(energy[i:j])
+        outside = np.flatnonzero((x > capacity) | (x < 0))
+        if not len(outside):
+            out[i:j] = x
+            level, i = x[-1], j
+            continue
+        k = outside[0]
+        out[i:i + k] = x[:k]
+        level = out[i + k] = capacity if x[k] > capacity else 0.0
+        i += k + 1
+    return out
+
+
+def simulate_power(elements, epoch, days=365.0, step=10.0, model="conical", chunk=10 * 86400.0, **params):
+    """
+    Propagate an orbit against the Sun and compute its eclipses and the battery energy balance, chunk by chunk.
+
+    Parameters:
+    elements (tuple): a (km), ecc, inc, raan, argp, nu (rad) at epoch
+    epoch (datetime): epoch of the elements, UTC
+    days (float): length of the analysis (in days)
+    step (float): time step (in seconds)
+    model (str): shadow model, one of SHADOW_MODELS
+    chunk (float): propagation chunk length (in seconds), only one chunk of time steps is held in memory
+    params: overrides of POWER_DEFAULTS
+
+    Returns:
+    dict:
+    orbits (pandas.DataFrame): one row per orbit (nodal period): Start, Eclipse (min), Sunlight (%),
+    Generated (Wh), Consumed (Wh), Min Charge (%), Max Charge (%)
+    daily (pandas.DataFrame): one row per calendar day: Date, Beta (deg), Eclipse (%), Min Charge (%)
+    detail (pandas.DataFrame): the first DETAIL_DURATION at full resolution: Time, Illumination, Charge (%)
+    min_charge (float): lowest state of charge (%), passed (bool): it stays above MIN_STATE_OF_CHARGE
+    """
+    unknown = set(params) - set(POWER_DEFAULTS)
+    if unknown:
+        raise ValueError(f"unknown power parameters: {', '.join(sorted(unknown))}")
+    p = dict(POWER_DEFAULTS, **params)
+    capacity = p["battery_capacity"]
+
+    a, ecc, inc = elements[:3]
+    _, argp_dot, M_dot = j2_rates(a, ecc, inc)
+    period = 2 * np.pi / (M_dot + argp_dot)
+    duration = days * 86400.0
+    offset, dates, day_seconds = calendar_days(epoch, duration)
+    n_orbits, n_days = int(np.ceil(duration / period)), len(dates)
+
+    # per orbit sums, and the minimum and maximum of the charge
+    eclipse, generated, consumed = np.zeros(n_orbits), np.zeros(n_orbits), np.zeros(n_orbits)
+    low, high = np.full(n_orbits, np.inf), np.full(n_orbits, -np.inf)
+    day_eclipse, day_low = np.zeros(n_days), np.full(n_days, np.inf)
+    detail = []
+    level = p["initial_charge"] * capacity
+
+    for t, r in ecef_chunks(elements, epoch, duration, step, chunk, earth_fixed=False):
+        # the Sun moves about 0.04 deg an hour, so it is interpolated between hourly positions
+        nodes = np.arange(t[0] - t[0] % SUN_STEP, t[-1] + 2 * SUN_STEP, SUN_STEP)
+        sun = sun_position(epoch, nodes)
+        sun = np.column_stack([np.interp(t, nodes, sun[:, axis]) for axis in range(3)])
+        lit = illumination(r, sun, model)
+        surplus = (p["array_power"] * lit - p["load_power"]) * step / 3600.0
+        energy = _state_of_charge(np.where(surplus > 0, surplus * p["charge_efficiency"], surplus), level, capacity)
+        level = energy[-1]
+
+        orbit, day = (t // period).astype(int), ((t + offset) // 86400).astype(int)
+        eclipse += np.bincount(orbit, weights=(1 - lit) * step, minlength=n_orbits)[:n_orbits]
+        generated += np.bincount(orbit, weights=p["array_power"] * lit * step / 3600.0, minlength=n_orbits)[:n_orbits]
+        consumed += np.bincount(orbit, minlength=n_orbits)[:n_orbits] * p["load_power"] * step / 3600.0
+        day_eclipse += np.bincount(day, weights=(1 - lit) * step, minlength=n_days)[:n_days]
+        # the steps are in time order, so each orbit (day) is one run of the chunk
+        for index, into, reduce in ((orbit, low, np.minimum), (orbit, high, np.maximum), (day, day_low, np.minimum)):
+            runs = np.flatnonzero(np.diff(index, prepend=-1))
+            into[index[runs]] = reduce(into[index[runs]], reduce.reduceat(energy, runs))
+        if t[0] < DETAIL_DURATION:
+            keep = t < DETAIL_DURATION
+            detail.append(pd.DataFrame({"t": t[keep], "Illumination": lit[keep], "Charge (%)": energy[keep] / capacity * 100}))
+
+    start = pd.Timestamp(epoch)
+    orbits = pd.DataFrame({
+        "Start": start + pd.to_timedelta(np.arange(n_orbits) * period, unit="s"),
+        "Eclipse (min)": eclipse / 60,
+        "Sunlight (%)": 100 - eclipse / np.minimum(period, duration - np.arange(n_orbits) * period) * 100,
+        "Generated (Wh)": generated,
+        "Consumed (Wh)": consumed,
+        "Min Charge (%)": low / capacity * 100,
+        "Max Charge (%)": high / capacity * 100,
+    })
+    # the first and last days are the parts of them inside the analysis
+    day_start = np.maximum(np.arange(n_days) * 86400.0 - offset, 0.0)
+    daily = pd.DataFrame({
+        "Date": dates,
+        "Beta (deg)": beta_angle(elements, epoch, day_start + day_seconds / 2),
+        "Eclipse (%)": day_eclipse / day_seconds * 100,
+        "Min Charge (%)": day_low / capacity * 100,
+    })
+    detail = pd.concat(detail, ignore_index=True) if detail else pd.DataFrame(columns=["t", "Illumination", "Charge (%)"])
+    detail.insert(0, "Time", start + pd.to_timedelta(detail.pop("t"), unit="s"))
+    min_charge = float(orbits["Min Charge (%)"].min())
+    return {"orbits": orbits, "daily": daily, "detail": detail, "period": period,
+            "min_charge": min_charge, "passed": min_charge >= MIN_STATE_OF_CHARGE * 100}
+
+
+# ########## PUBLIC FUNCTION
+# analyses by (elements, epoch, days, step, model, power parameters), shared by all sessions,
+# the least recently used are dropped first
+RESULT_CACHE_SIZE = 16
+_results = OrderedDict()
+_lock = threading.Lock()
+
+
+def power_budget(elements, epoch=None, days=365.0, step=10.0, model="conical", **params):
+    """
+    Return the eclipse and power analysis of an orbit, see simulate_power, computed once per orbit and parameters.
+    """
+    epoch = datetime(2024, 1, 1) if epoch is None else epoch
+    key = (tuple(float(e) for e in elements), pd.Timestamp(epoch), float(days), float(step), model,
+           tuple(sorted(dict(POWER_DEFAULTS, **params).items())))
+    with _lock, span("figure", "power budget") as record:
+        record["cache"] = "hit" if key in _results else "miss"
+        if key in _results:
+            _results.move_to_end(key)
+            return _results[key]
+        _results[key] = result = simulate_power(elements, epoch, days, step, model, **params)
+        if len(_results) > RESULT_CACHE_SIZE:
+            _results.popitem(last=False)
+        return result
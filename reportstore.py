@@ -0,0 +1,243 @@
+# to read CSV files and keep them in memory
+import pandas as pd
+import hashlib
+import io
+import logging
+import os
+import threading
+
+from diagnostics import span
+
+# pyarrow ships with streamlit, it is used to write the binary column snapshots.
+# if it is missing the store still works, it just parses the CSV on a cold start
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = None
+    pq = None
+
+
+REPORTS_DIR = "reports"
+# "csv" reads the exported query results, "triples" computes the Query1-Query7 reports
+# from the model triples in-process (see triplestore.py), the other reports stay CSV files
+BACKEND = "csv"
+# binary snapshots are written in a hidden folder next to the CSV files
+SNAPSHOT_DIR = ".snapshots"
+
+# columns that get a proper dtype when a report is loaded, whatever report they appear in
+DATETIME_COLUMNS = ["Start", "End", "MilestoneDate", "AcquisitionDate", "ReviewStart", "PlannedTestDate"]
+CATEGORY_COLUMNS = ["Site", "VM", "TestSubjects"]
+
+# process-wide store, shared by every session of the app
+# (file name, index column) -> dict(stat, size, hash, data)
+_STORE = {}
+# _LOCK guards the dicts, a report is read and parsed under its own lock so a cold load
+# only waits for loads of the same report
+_LOCK = threading.Lock()
+_REPORT_LOCKS = {}
+
+log = logging.getLogger(__name__)
+
+
+def _read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _appended_rows(entry, content, index_col):
+    '''
+    If the file only grew by whole rows since entry was loaded, return the new rows typed, else None
+    '''
+    size = entry["size"]
+    if len(content) <= size or content[size - 1:size] != b"\n":
+        return None
+    if hashlib.sha1(content[:size]).hexdigest() != entry["hash"]:
+        return None
+    # parse only the new rows, under the header line of the file
+    header = content[:content.index(b"\n") + 1]
+    return _apply_types(pd.read_csv(io.BytesIO(header + content[size:]), index_col=index_col))
+
+
+def _apply_types(df):
+    '''
+    Parse the datetime columns and turn the repeated text columns into categoricals
+    '''
+    for col in DATETIME_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col])
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+
+def _snapshot_path(name, index_col):
+    base = os.path.splitext(name)[0]
+    suffix = "" if index_col is None else f".i{index_col}"
+    return os.path.join(REPORTS_DIR, SNAPSHOT_DIR, f"{base}{suffix}.parquet")
+
+
+def _read_snapshot(path, digest):
+    '''
+    Read the snapshot at path if it was written from a CSV with the same hash, else None
+    '''
+    if pq is None or not os.path.exists(path):
+        return None
+    try:
+        meta = pq.read_schema(path).metadata or {}
+        if meta.get(b"csv_sha1", b"").decode() != digest:
+            return None
+        return pq.read_table(path).to_pandas()
+    except Exception:
+        # a broken snapshot is not fatal, the CSV is the source of truth
+        return None
+
+
+def _write_snapshot(path, df, digest):
+    if pa is None:
+        return
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table = pa.Table.from_pandas(df)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"csv_sha1": digest.encode()})
+        # write then rename, so a reader in another process never sees half a file
+        tmp = path + ".tmp"
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+    except Exception:
+        # the report is served from memory all the same, only the next cold start parses the CSV again
+        log.warning("could not write the snapshot %s", path, exc_info=True)
+
+
+def _load(name, index_col):
+    '''
+    Return the cache entry for a report, (re)loading it only when the file changed
+    '''
+    with span("report", name) as record:
+        return _load_entry(name, index_col, record)
+
+
+def _load_entry(name, index_col, record):
+    if BACKEND == "triples":
+        # imported here, the triple store reads the reports folder setting of this module
+        import triplestore
+        if name in triplestore.QUERY_REPORTS:
+            record["cache"] = "triples"
+            df, version = triplestore.query_report(name, index_col)
+            return {"hash": version, "data": df}
+
+    path = os.path.join(REPORTS_DIR, name)
+    key = (name, index_col)
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+
+    with _LOCK:
+        entry = _STORE.get(key)
+        if entry is not None and entry["stat"] == stamp:
+            record["cache"] = "hit"
+            return entry
+        lock = _REPORT_LOCKS.setdefault(key, threading.Lock())
+
+    with lock:
+        # another session may have loaded it while this one waited
+        with _LOCK:
+            entry = _STORE.get(key)
+        if entry is not None and entry["stat"] == stamp:
+            record["cache"] = "hit"
+            return entry
+        try:
+            return _reload(key, path, stamp, entry, record)
+        except (OSError, ValueError):
+            # pandas' EmptyDataError and ParserError are ValueErrors. A file caught mid-rewrite is empty or
+            # truncated: keep serving the last good version, its stamp is left as is so the next load retries
+            if entry is None:
+                raise
+            log.warning("could not reload %s, serving the last version read", path, exc_info=True)
+            record["cache"] = "stale"
+            return entry
+
+
+def _reload(key, path, stamp, entry, record):
+    '''
+    Read and parse a report whose file changed, entry is the last version read or None
+    '''
+    name, index_col = key
+    # the mtime moved, but the contents may still be the same (e.g. the export was re-run)
+    content = _read_bytes(path)
+    digest = hashlib.sha1(content).hexdigest()
+    record["bytes"] = len(content)
+    if entry is not None and entry["hash"] == digest:
+        record["cache"] = "hit"
+        entry["stat"] = stamp
+        return entry
+
+    snapshot = _snapshot_path(name, index_col)
+    appended = None if entry is None else _appended_rows(entry, content, index_col)
+    if appended is not None:
+        # append-only change: keep the parsed rows and add the new ones
+        record["cache"] = "append"
+        df = _apply_types(pd.concat([entry["data"], appended], ignore_index=index_col is None))
+        _write_snapshot(snapshot, df, digest)
+    else:
+        df = _read_snapshot(snapshot, digest)
+        record["cache"] = "snapshot"
+        if df is None:
+            record["cache"] = "miss"
+            df = _apply_types(pd.read_csv(io.BytesIO(content), index_col=index_col))
+            _write_snapshot(snapshot, df, digest)
+
+    entry = {"stat": stamp, "size": len(content), "hash": digest, "data": df}
+    with _LOCK:
+        _STORE[key] = entry
+    return entry
+
+
+# ########## PUBLIC FUNCTIONS
+def load_report(name, index_col=0, copy=True):
+    """
+    Return a report from the reports folder as a typed DataFrame.
+
+    Parameters:
+    name (str): file name of the report inside reports/, e.g. "Query4_MOEs.csv"
+    index_col (int or None): same as pandas.read_csv, most exports carry their row index in column 0
+    copy (bool): return a copy that the caller may modify. Pass False only for read-only use
+
+    Returns:
+    pandas.DataFrame
+    """
+    df = _load(name, index_col)["data"]
+    return df.copy() if copy else df
+
+
+def report_version(name, index_col=0):
+    """Return the content hash of a report. Use it to key caches built from the report."""
+    return _load(name, index_col)["hash"]
+
+
+def loaded_reports():
+    """Return the reports held in memory, (file name, index column) -> content hash, without reloading them."""
+    with _LOCK:
+        return {key: entry["hash"] for key, entry in _STORE.items()}
+
+
+def clear_reports():
+    """Drop every report held in memory. The snapshots on disk are kept."""
+    with _LOCK:
+        _STORE.clear()
+
+
+def use_backend(backend):
+    """Compute the query reports with "triples" from the model file, or read the "csv" exports."""
+    global BACKEND
+    if backend not in ("csv", "triples"):
+        raise ValueError(f"unknown report backend {backend!r}")
+    BACKEND = backend
+
+
+def use_reports_dir(path):
+    """Read the reports from another folder, e.g. generated data for the benchmarks."""
+    global REPORTS_DIR
+    with _LOCK:
+        REPORTS_DIR = path
+        _STORE.clear()
@@ -0,0 +1,232 @@
+# to propose slots for the tests that are not scheduled yet, and optionally re-slot the conflicting ones
+import pandas as pd
+import threading
+
+from reportstore import load_report, report_version
+from diagnostics import span
+from conflicts import ConflictIndex, SCHEDULE_REPORT, EQUIPMENT_REPORT, _equipment_map, _intervals, _resources
+from timeline import ScheduleIndex
+
+# proposed slots start on a whole hour
+SLOT = pd.Timedelta(hours=1)
+# duration of an unscheduled test when no test of its plan has a slot to take it from
+DEFAULT_DURATION = pd.Timedelta(hours=2)
+# passes of the repair step, each one tries to move every proposed test earlier
+MAX_REPAIR_PASSES = 5
+# how each row of the proposal came to be
+PROPOSAL_STATES = ["kept", "placed", "moved", "unplaced"]
+
+
+def _acquisitions():
+    '''
+    Map each test to the date its last piece of test equipment is acquired, from the equipment acquisition report
+    '''
+    equipment = load_report(EQUIPMENT_REPORT, copy=False)
+    return equipment.dropna(subset=["AcquisitionDate"]).groupby("Test")["AcquisitionDate"].max().to_dict()
+
+
+class _Placer:
+    '''
+    Finds the earliest free slot of a test with the interval index of the tests that keep their slot.
+    A slot is free when no test holding the same Site, TestSubject or test equipment overlaps it.
+    '''
+    def __init__(self, index):
+        self.index = index
+
+    def earliest(self, resources, release, duration, limit=None):
+        '''
+        Earliest start >= release where [start, start + duration) is free on all resources,
+        None when there is none before limit
+        '''
+        start = release.ceil(SLOT)
+        while limit is None or start < limit:
+            # jump past every test in the way, then look again from there
+            blocking = [self.index.rows[other][1]
+                        for resource in resources
+                        for other in self.index.overlapping(resource, start, start + duration)]
+            if not blocking:
+                return start
+            start = max(blocking).ceil(SLOT)
+        return None
+
+    def best(self, test, sites, release):
+        '''
+        Try the test on each candidate site, return (site, start, resources) of the earliest finish
+        '''
+        best = None
+        for site in sites:
+            resources = test["resources"] | {("Site", site)}
+            # a site is only searched up to the best start found so far
+            start = self.earliest(resources, release, test["duration"], best[1] if best else None)
+            if start is not None:
+                best = (site, start, resources)
+                if start == release.ceil(SLOT):
+                    # nothing can start earlier
+                    break
+        return best
+
+
+def propose_schedule(schedule, equipment, acquisitions, resolve=False, not_before=None):
+    """
+    Propose a Site and a slot for every unscheduled test, and with resolve=True also for one test of each
+    conflicting pair.
+
+    The tests are placed one at a time in report order, each on the candidate site where it can start first
+    (greedy pass), then the repair passes take every proposed test out and put it back in its earliest slot,
+    which lets the tests queued behind it move up. A test never starts before:
+    - the acquisition date of its test equipment,
+    - the end of the test before it in its test plan (DTPName, in report order),
+    - its current start, when it is re-slotted because of a conflict,
+    - not_before, by default the start of the first scheduled test.
+    The candidate sites of a test are the sites its test plan already uses, or all the sites when it uses none.
+
+    Parameters:
+    schedule (pandas.DataFrame): the scheduling report
+    equipment (dict): test -> test equipment, as conflicts._equipment_map
+    acquisitions (dict): test -> acquisition date of its equipment
+    resolve (bool): re-slot the conflicting tests too
+    not_before (pandas.Timestamp): earliest start of a proposed slot
+
+    Returns:
+    pandas.DataFrame: the report with Site, Start and End filled in, and a Proposal column (one of PROPOSAL_STATES)
+    """
+    proposal = schedule.copy()
+    proposal["Proposal"] = "kept"
+    scheduled = schedule["Start"].notna() & schedule["End"].notna() & schedule["Site"].notna()
+    if not_before is None:
+        not_before = schedule.loc[scheduled, "Start"].min()
+        if pd.isna(not_before):
+            not_before = pd.Timestamp.today().normalize()
+
+    # interval index of the tests that keep their slot
+    index = ConflictIndex()
+    index.build(_intervals(schedule[scheduled], equipment))
+    moving = set()
+    if resolve:
+        # one test of each conflicting pair moves, the later one in the report
+        for a, b in index.conflicts():
+            if a not in moving and b not in moving:
+                moving.add(b)
+        for rid in moving:
+            index.remove(rid)
+    index.clear_conflicts()
+
+    durations = schedule["End"] - schedule["Start"]
+    plan_duration = durations[scheduled].groupby(schedule["DTPName"]).median()
+    default_duration = durations[scheduled].median() if scheduled.any() else DEFAULT_DURATION
+    sites = sorted(schedule.loc[scheduled, "Site"].unique(), key=str)
+    plan_sites = schedule[scheduled].groupby("DTPName")["Site"].unique().to_dict()
+
+    # the tests to place, in report order
+    tests = {}
+    for rid in schedule.index:
+        if scheduled[rid] and rid not in moving:
+            continue
+        row = schedule.loc[rid]
+        if rid in moving:
+            duration, floor = durations[rid], max(row["Start"], not_before)
+        else:
+            duration, floor = plan_duration.get(row["DTPName"], default_duration), not_before
+        if pd.isna(duration) or duration <= pd.Timedelta(0):
+            duration = DEFAULT_DURATION
+        acquired = max([acquisitions[name] for name in (row["VMName"], row["VM"]) if name in acquisitions], default=floor)
+        candidates = list(plan_sites.get(row["DTPName"], [])) or sites
+        if rid in moving:
+            # the current site is tried first, so a tie keeps the test where it was
+            candidates = [row["Site"]] + [site for site in candidates if site != row["Site"]]
+        tests[rid] = {
+            "resources": _resources(row["VM"], row["VMName"], row["TestSubjects"], None, equipment),
+            "duration": duration,
+            "floor": max(floor, acquired),
+            "sites": candidates,
+        }
+
+    # the test before each one in its test plan
+    previous, last = {}, {}
+    for rid, plan in zip(schedule.index, schedule["DTPName"]):
+        if plan in last:
+            previous[rid] = last[plan]
+        last[plan] = rid
+
+    # the end of every test with a slot, kept or proposed
+    ends = schedule.loc[scheduled, "End"].to_dict()
+    for rid in moving:
+        del ends[rid]
+
+    def release(rid):
+        before = ends.get(previous.get(rid))
+        floor = tests[rid]["floor"]
+        return floor if before is None or before < floor else before
+
+    placer = _Placer(index)
+    placed = {}
+
+    def place(rid, slot):
+        site, start, resources = slot
+        end = start + tests[rid]["duration"]
+        index.add(rid, start, end, resources)
+        placed[rid] = (site, start, end)
+        ends[rid] = end
+
+    # greedy pass
+    for rid, test in tests.items():
+        if not test["sites"]:
+            continue
+        place(rid, placer.best(test, test["sites"], release(rid)))
+
+    # repair: the greedy pass placed the tests in report order, so a test may wait behind one placed before it
+    # that now has an earlier slot. take each one out in start order and put it back in its earliest slot
+    for _ in range(MAX_REPAIR_PASSES):
+        improved = False
+        for rid in sorted(placed, key=lambda rid: placed[rid][1]):
+            site, start, end = placed[rid]
+            index.remove(rid)
+            del ends[rid]
+            slot = placer.best(tests[rid], tests[rid]["sites"], release(rid))
+            if slot[1] < start:
+                improved = True
+            else:
+                # nothing earlier, it goes back where it was
+                slot = (site, start, tests[rid]["resources"] | {("Site", site)})
+            place(rid, slot)
+        if not improved:
+            break
+
+    rows = list(placed)
+    proposal.loc[list(tests), "Proposal"] = "unplaced"
+    if rows:
+        proposal.loc[rows, "Site"] = [placed[rid][0] for rid in rows]
+        proposal.loc[rows, "Start"] = pd.to_datetime([placed[rid][1] for rid in rows])
+        proposal.loc[rows, "End"] = pd.to_datetime([placed[rid][2] for rid in rows])
+        proposal.loc[rows, "Proposal"] = ["moved" if rid in moving else "placed" for rid in rows]
+    return proposal
+
+
+# ########## PUBLIC FUNCTION
+# one proposal per (scheduling report version, equipment report version, resolve), shared by all sessions
+_proposals = {}
+_lock = threading.Lock()
+
+
+def proposed_schedule(resolve=False):
+    """
+    Return the proposed schedule of the current reports and its ScheduleIndex, built once per report version.
+
+    Parameters:
+    resolve (bool): re-slot the conflicting tests too
+
+    Returns:
+    proposal (pandas.DataFrame): see propose_schedule
+    index (timeline.ScheduleIndex): the proposal sorted by Start
+    """
+    key = (report_version(SCHEDULE_REPORT), report_version(EQUIPMENT_REPORT), resolve)
+    with _lock, span("figure", "schedule proposal") as record:
+        record["cache"] = "hit" if key in _proposals else "miss"
+        if key not in _proposals:
+            # keep the proposals of the current versions only
+            for old in [old for old in _proposals if old[:2] != key[:2]]:
+                del _proposals[old]
+            proposal = propose_schedule(load_report(SCHEDULE_REPORT, copy=False), _equipment_map(), _acquisitions(),
+                                        resolve=resolve)
+            _proposals[key] = (proposal, ScheduleIndex(proposal))
+        return _proposals[key]
@@ -0,0 +1,344 @@
+"""
+Static snapshot of the dashboard, for read-only viewers.
+
+    python snapshot.py site/
+    python snapshot.py site/ --reports reports --workers 4
+
+Every tab runs once in its own worker process, headless, against the recording streamlit stub.
+The figures, graphs and tables the views emit are written as files named by their content hash:
+plotly JSON, graphviz SVG (or the DOT source when the dot executable is missing), table HTML and
+PNG images. One HTML page per tab lays them out, and the folder can be served by any static file
+server. manifest.json records the report versions and the code each tab was built from; a tab
+whose reports and code did not change is not run again, and an artifact that already exists is
+not written again.
+"""
+import argparse
+import glob
+import hashlib
+import html
+import importlib
+import io
+import json
+import os
+import re
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import reportstore
+from tabs import TAB_VIEWS
+
+# the tabs of the app, the Diagnostics tab shows the recordings of a running app and is left out
+TABS = [tab for tab in TAB_VIEWS if tab != "Diagnostics"]
+# results that a view shows once they are computed and that no widget starts headless: tab -> (module, function),
+# run to the end before the tab is exported so the page gets the final figure
+PRECOMPUTE = {
+    "Requirements": [("lifetime", "run_ensemble")],
+}
+# a view is exported once per option of its first selectbox or radio, up to this many options
+MAX_VARIANTS = 50
+ARTIFACTS_DIR = "artifacts"
+MANIFEST = "manifest.json"
+# elements written as text into the page, the others are layout or inputs and are left out
+TEXT_ELEMENTS = {"header": "h2", "subheader": "h3", "markdown": "div", "write": "div", "caption": "small",
+                 "info": "p", "warning": "p", "success": "p", "error": "p"}
+
+
+def _slug(text):
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+def _sha1(data):
+    return hashlib.sha1(data if isinstance(data, bytes) else data.encode()).hexdigest()
+
+
+def code_version():
+    """sha1 of the dashboard modules, a change to any of them rebuilds every tab."""
+    digest = hashlib.sha1()
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.py"))):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _write_artifact(output, data, extension):
+    '''
+    Write data under its content hash, unless that file exists already. Returns the relative path
+    '''
+    name = f"{_sha1(data)}.{extension}"
+    path = os.path.join(output, ARTIFACTS_DIR, name)
+    if not os.path.exists(path):
+        # write then rename, so a viewer never gets half a file
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data if isinstance(data, bytes) else data.encode())
+        os.replace(tmp, path)
+    return f"{ARTIFACTS_DIR}/{name}"
+
+
+def _render_svg(output, source):
+    '''
+    Lay out a DOT graph once per source: the SVG is named by the hash of the DOT source
+    '''
+    import graphviz
+
+    name = f"{_sha1(source)}.svg"
+    if os.path.exists(os.path.join(output, ARTIFACTS_DIR, name)):
+        return f"{ARTIFACTS_DIR}/{name}"
+    try:
+        svg = graphviz.Source(source).pipe(format="svg")
+    except graphviz.ExecutableNotFound:
+        return None
+    path = os.path.join(output, ARTIFACTS_DIR, name)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(svg)
+    os.replace(tmp, path)
+    return f"{ARTIFACTS_DIR}/{name}"
+
+
+def _export_element(output, name, value, args, kwargs):
+    '''
+    Turn one recorded element into a page item, writing its artifact. None for the elements that are left out
+    '''
+    if name == "plotly_chart":
+        return {"type": "plotly", "src": _write_artifact(output, value.to_json(), "json")}
+    if name == "graphviz_chart":
+        source = value if isinstance(value, str) else value.source
+        svg = _render_svg(output, source)
+        if svg is not None:
+            return {"type": "svg", "src": svg}
+        return {"type": "dot", "src": _write_artifact(output, source, "dot")}
+    if name == "image" and isinstance(value, str) and value.lstrip().startswith("<"):
+        # a layout rendered on the server, e.g. the architecture views
+        return {"type": "svg", "src": _write_artifact(output, value, "svg")}
+    if name == "dataframe":
+        if hasattr(value, "to_html"):
+            table = value.to_html() if hasattr(value, "data") else value.to_html(index=not kwargs.get("hide_index", False), na_rep="")
+            return {"type": "table", "src": _write_artifact(output, table, "html")}
+        return None
+    if name == "pyplot":
+        buffer = io.BytesIO()
+        value.savefig(buffer, format="png", bbox_inches="tight")
+        return {"type": "image", "src": _write_artifact(output, buffer.getvalue(), "png")}
+    if name == "metric":
+        label = kwargs.get("label", args[0] if args else "")
+        metric = kwargs.get("value", args[1] if len(args) > 1 else "")
+        return {"type": "metric", "label": str(label), "value": str(metric), "delta": str(kwargs.get("delta") or "")}
+    if name in TEXT_ELEMENTS and args:
+        return {"type": "text", "tag": TEXT_ELEMENTS[name], "text": str(args[0]),
+                "html": bool(kwargs.get("unsafe_allow_html") or (len(args) > 1 and args[1] is True))}
+    return None
+
+
+def _run_view(st, view, choices):
+    st.choices = choices
+    st.reset()
+    view()
+    return list(st.elements)
+
+
+def export_tab(tab, reports_dir, output):
+    """
+    Run the views of one tab headless and write their artifacts. Runs in a worker process.
+
+    Returns:
+    dict: the page items of every view and variant, and the reports the tab read (file name -> sha1)
+    """
+    from benchmarks.stubstreamlit import StreamlitStub
+
+    # the views import streamlit at module level, so the stub goes in first
+    st = StreamlitStub(measure=False)
+    sys.modules["streamlit"] = st
+    reportstore.use_reports_dir(reports_dir)
+
+    for module, function in PRECOMPUTE.get(tab, []):
+        getattr(importlib.import_module(module), function)()
+
+    sections = []
+    for module, function in TAB_VIEWS[tab]:
+        try:
+            view = getattr(importlib.import_module(module), function)
+        except ImportError as e:
+            # e.g. the Orbit tab without poliastro installed
+            sections.append({"view": function, "variant": None, "error": str(e), "items": []})
+            continue
+
+        elements = _run_view(st, view, {})
+        # the first selectbox or radio of the view gives the variants, the default run is the one of the default option
+        widget = next(((args[0], value, kwargs["choice"]) for name, value, args, kwargs in elements
+                       if name in ("selectbox", "radio") and args), None)
+        variants = [(None, elements)]
+        if widget is not None:
+            label, options, chosen = widget
+            variants = [(str(option), elements if option == chosen else _run_view(st, view, {label: option}))
+                        for option in options[:MAX_VARIANTS]]
+        for variant, recorded in variants:
+            items = [_export_element(output, *element) for element in recorded]
+            sections.append({"view": function, "variant": variant, "items": [item for item in items if item]})
+
+    reports = {name: digest for (name, _), digest in reportstore.loaded_reports().items()}
+    return {"sections": sections, "reports": reports}
+
+
+# ########## STATIC PAGES
+_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>CatSat Dashboard - {title}</title>
+<script src="assets/plotly.min.js"></script>
+<style>
+body {{ font-family: sans-serif; margin: 1.5em; }}
+nav a {{ margin-right: 1em; }} nav a.active {{ font-weight: bold; }}
+.metric {{ display: inline-block; margin: 0.5em 1.5em 0.5em 0; }}
+.metric .value {{ font-size: 1.6em; }} .metric .delta {{ color: #2e7d32; font-size: 0.9em; }}
+table {{ border-collapse: collapse; font-size: 0.85em; }} td, th {{ border: 1px solid #ddd; padding: 2px 6px; }}
+.table {{ max-height: 500px; overflow: auto; }} img {{ max-width: 100%; }}
+</style>
+</head>
+<body>
+<h1>🛰️ CubeSat Mission Dashboard</h1>
+<p><small>Snapshot of {generated}</small></p>
+<nav>{nav}</nav>
+<hr>
+{body}
+<script>
+// the figures and tables are separate files, fetched when the page loads
+document.querySelectorAll("[data-plotly]").forEach(function (div) {{
+  fetch(div.dataset.plotly).then(function (r) {{ return r.json(); }}).then(function (fig) {{
+    Plotly.newPlot(div, fig.data, fig.layout, {{responsive: true}});
+  }});
+}});
+document.querySelectorAll("[data-table]").forEach(function (div) {{
+  fetch(div.dataset.table).then(function (r) {{ return r.text(); }}).then(function (text) {{ div.innerHTML = text; }});
+}});
+</script>
+</body>
+</html>
+"""
+
+
+def _item_html(item):
+    kind = item["type"]
+    if kind == "plotly":
+        return f'<div class="plot" data-plotly="{item["src"]}"></div>'
+    if kind == "svg":
+        return f'<img src="{item["src"]}">'
+    if kind == "image":
+        return f'<img src="{item["src"]}">'
+    if kind == "dot":
+        return f'<p><a href="{item["src"]}">Graph (DOT source)</a></p>'
+    if kind == "table":
+        return f'<div class="table" data-table="{item["src"]}"></div>'
+    if kind == "metric":
+        return (f'<div class="metric"><div>{html.escape(item["label"])}</div><div class="value">{html.escape(item["value"])}</div>'
+                f'<div class="delta">{html.escape(item["delta"])}</div></div>')
+    text = item["text"] if item["html"] else html.escape(item["text"])
+    return f'<{item["tag"]}>{text}</{item["tag"]}>'
+
+
+def write_pages(output, tabs, generated):
+    """
+    Write index.html and one page per tab from the page items in the manifest
+    """
+    pages = {tab: "index.html" if i == 0 else f"{_slug(tab)}.html" for i, tab in enumerate(tabs)}
+    for tab, page in pages.items():
+        nav = "".join(f'<a href="{href}"{" class=active" if name == tab else ""}>{html.escape(name)}</a>'
+                      for name, href in pages.items())
+        body = []
+        for section in tabs[tab]["sections"]:
+            if section.get("error"):
+                body.append(f"<p><i>{html.escape(section['view'])} is not available in this snapshot: "
+                            f"{html.escape(section['error'])}</i></p>")
+                continue
+            if section["variant"] is not None:
+                body.append(f"<h4>{html.escape(section['variant'])}</h4>")
+            body.extend(_item_html(item) for item in section["items"])
+        with open(os.path.join(output, page), "w", encoding="utf-8") as f:
+            f.write(_PAGE.format(title=html.escape(tab), generated=generated, nav=nav, body="\n".join(body)))
+
+
+def _copy_plotly(output):
+    import plotly
+
+    source = os.path.join(os.path.dirname(plotly.__file__), "package_data", "plotly.min.js")
+    target = os.path.join(output, "assets", "plotly.min.js")
+    if not os.path.exists(target) or os.path.getsize(target) != os.path.getsize(source):
+        shutil.copyfile(source, target)
+
+
+def _file_sha1(reports_dir, name):
+    try:
+        with open(os.path.join(reports_dir, name), "rb") as f:
+            return _sha1(f.read())
+    except OSError:
+        return None
+
+
+def export_snapshot(output, reports_dir="reports", workers=None, force=False):
+    """
+    Write the static snapshot of every tab into output.
+
+    Parameters:
+    output (str): folder of the bundle, created if needed
+    reports_dir (str): folder of the reports to snapshot
+    workers (int): worker processes, one per tab to build by default
+    force (bool): rebuild every tab, even when its reports and the code did not change
+
+    Returns:
+    dict: tab name -> "built" or "unchanged"
+    """
+    import datetime
+
+    os.makedirs(os.path.join(output, ARTIFACTS_DIR), exist_ok=True)
+    os.makedirs(os.path.join(output, "assets"), exist_ok=True)
+    manifest_path = os.path.join(output, MANIFEST)
+    previous = {}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path) as f:
+            previous = json.load(f)
+
+    code = code_version()
+    tabs, status = {}, {}
+    for tab in TABS:
+        old = previous.get("tabs", {}).get(tab)
+        unchanged = (old is not None and previous.get("code") == code
+                     and all(_file_sha1(reports_dir, name) == digest for name, digest in old["reports"].items())
+                     and all(os.path.exists(os.path.join(output, item["src"]))
+                             for section in old["sections"] for item in section["items"] if "src" in item))
+        if unchanged:
+            tabs[tab], status[tab] = old, "unchanged"
+
+    todo = [tab for tab in TABS if tab not in tabs]
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers or len(todo)) as pool:
+            results = pool.map(export_tab, todo, [reports_dir] * len(todo), [output] * len(todo))
+            for tab, result in zip(todo, results):
+                tabs[tab], status[tab] = result, "built"
+
+    tabs = {tab: tabs[tab] for tab in TABS}
+    generated = datetime.datetime.now().strftime("%d %b %Y %H:%M")
+    _copy_plotly(output)
+    write_pages(output, tabs, generated)
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump({"generated": generated, "code": code, "tabs": tabs}, f, indent=1)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return status
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output", help="folder of the static bundle")
+    parser.add_argument("--reports", default="reports", help="folder of the reports")
+    parser.add_argument("--workers", type=int, help="worker processes, one per tab by default")
+    parser.add_argument("--force", action="store_true", help="rebuild every tab")
+    args = parser.parse_args(argv)
+
+    for tab, state in export_snapshot(args.output, args.reports, args.workers, args.force).items():
+        print(f"{tab:<20} {state}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
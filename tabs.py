@@ -0,0 +1,28 @@
+# the tabs of the dashboard, shared by the app and the static snapshot.
+# no imports here: the app reads these before the header is drawn
+
+# tab name -> (module, function) of the views under the tab section, in files where the View is created.
+# a module is imported the first time one of its tabs is rendered, so the header does not wait for
+# plotly, graphviz, matplotlib or the orbital mechanics stack
+TAB_VIEWS = {
+    "Requirements": [("dashboard", "dashreqs")],
+    "Architecture": [("architecture", "sysarcfunc")],
+    "Orbit": [("orbit", "orbitfunc")],
+    "Test Strategy": [("dashboard", "dashschedule"), ("dashboard", "dashresults")],
+    "Warnings/Issues": [("issues", "sysissues")],
+    "Diagnostics": [("diagnostics", "diagnosticsfunc")],
+}
+
+# tab name -> reports its views read, a change to one of them refreshes the tab
+TAB_REPORTS = {
+    "Requirements": ["cubesatrequirements.csv", "Query7_VerificationCheck.csv", "Units.csv"],
+    "Architecture": ["FunctionalArchitecture.csv", "Query2_SystemArchitecture.csv", "Query1_MissionArchitecture 1.csv",
+                     "Query4_MOEs.csv", "Environment.csv",
+                     # linked by the impact analysis, see impact.LINKS
+                     "cubesatrequirements.csv", "Query7_VerificationCheck.csv", "Query6_Scheduling 2 copy.csv"],
+    "Orbit": [],
+    "Test Strategy": ["Query6_Scheduling 2 copy.csv", "DocumentSearch.csv", "Query7_VerificationCheck.csv",
+                      "Query5_KeyCapabilities 2.csv", "Units.csv", "TestEquipmentCheck.csv"],
+    "Warnings/Issues": ["Query6_Scheduling 2 copy.csv", "TestEquipmentCheck.csv"],
+    "Diagnostics": [],
+}
@@ -0,0 +1,5 @@
+# the dashboard modules are top-level files, put the repo folder on the path for the tests
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from impact import KINDS, ImpactIndex, _csr, _strong_components
+
+
+def _random_links(seed, n, edges):
+    '''
+    A random graph with cycles, self-loops and repeated edges, as the links of ImpactIndex
+    '''
+    rng = np.random.default_rng(seed)
+    tails, heads = rng.integers(0, n, edges), rng.integers(0, n, edges)
+    kinds = rng.choice(KINDS, n)
+    return pd.DataFrame({"Tail": [f"n{i}" for i in tails], "TailKind": kinds[tails],
+                         "Head": [f"n{i}" for i in heads], "HeadKind": kinds[heads], "Relation": "links to"})
+
+
+def _reachable(successors, start):
+    '''
+    Breadth-first search: the nodes reached from start by at least one edge
+    '''
+    seen, frontier = set(), [start]
+    while frontier:
+        frontier = [head for node in frontier for head in successors.get(node, ()) if head not in seen]
+        seen.update(frontier)
+    return seen
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_strong_components_match_mutual_reachability(seed):
+    rng = np.random.default_rng(seed)
+    n = 60
+    tails, heads = rng.integers(0, n, 90), rng.integers(0, n, 90)
+    indptr, indices, _ = _csr(tails, heads, n)
+    component = _strong_components(indptr, indices)
+
+    successors = {}
+    for tail, head in zip(tails, heads):
+        successors.setdefault(tail, set()).add(head)
+    reach = [_reachable(successors, node) | {node} for node in range(n)]
+    for a in range(n):
+        for b in range(n):
+            assert (component[a] == component[b]) == (b in reach[a] and a in reach[b])
+
+
+@pytest.mark.parametrize("seed, n, edges", [(seed, 80, edges) for seed in range(10) for edges in (60, 120, 240)])
+def test_affected_matches_breadth_first_search(seed, n, edges):
+    links = _random_links(seed, n, edges)
+    index = ImpactIndex(links)
+
+    successors = {}
+    for tail, head in zip(links["Tail"], links["Head"]):
+        successors.setdefault(tail, set()).add(head)
+    for name in index.names:
+        affected = index.affected(name)
+        found = [element for names in affected.values() for element in names]
+        assert len(found) == len(set(found))
+        assert set(found) == _reachable(successors, name)
+        # grouped by kind in KINDS order
+        assert list(affected) == [kind for kind in KINDS if kind in affected]
+        assert all(index.kind(element) == kind for kind, names in affected.items() for element in names)
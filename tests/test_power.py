@@ -0,0 +1,53 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from decay import R_EARTH
+from power import _state_of_charge, simulate_power
+
+
+def _step_by_step(energy, level, capacity):
+    '''
+    The battery model one step at a time, what _state_of_charge computes in windows
+    '''
+    out = np.empty(len(energy))
+    for i, e in enumerate(energy):
+        level = min(max(level + e, 0.0), capacity)
+        out[i] = level
+    return out
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("window", [7, 64, 2048])
+def test_state_of_charge_matches_step_by_step(seed, window):
+    rng = np.random.default_rng(seed)
+    # runs of charging and discharging long enough to fill and empty the battery several times
+    runs = rng.integers(5, 300, 40)
+    signs = np.repeat(np.tile([1.0, -1.0], 20), runs)
+    energy = signs * rng.uniform(0.0, 0.2, len(signs))
+    level, capacity = rng.uniform(0.0, 10.0), 10.0
+
+    expected = _step_by_step(energy, level, capacity)
+    result = _state_of_charge(energy, level, capacity, window=window)
+    # the battery did saturate at both ends, so the clamping is exercised
+    assert (expected == capacity).any() and (expected == 0.0).any()
+    np.testing.assert_allclose(result, expected, rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("level", [0.0, 10.0])
+def test_state_of_charge_starts_saturated(level):
+    energy = np.array([1.0, 1.0, -3.0, -20.0, 5.0, 0.0, 4.0])
+    np.testing.assert_allclose(_state_of_charge(energy, level, 10.0, window=3), _step_by_step(energy, level, 10.0))
+
+
+@pytest.mark.parametrize("model", ["cylindrical", "conical"])
+def test_longest_eclipse_at_465_km(model):
+    # an equatorial orbit at the March equinox has the Sun in its plane (beta about 0), the longest eclipse:
+    # the shadow covers arcsin(R / r) / pi of the orbit, about 36 min at 465 km
+    a = R_EARTH + 465.0
+    result = simulate_power((a, 0.0, 0.0, 0.0, 0.0, 0.0), datetime(2024, 3, 20, 3, 6), days=0.5, step=1.0, model=model)
+    expected = np.arcsin(R_EARTH / a) / np.pi * result["period"] / 60
+    longest = result["orbits"]["Eclipse (min)"].max()
+    assert longest == pytest.approx(expected, abs=0.2)
+    assert 35.5 < longest < 36.5
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import threading
+
+from reportstore import load_report, report_version
+from diagnostics import span
+from conflicts import SCHEDULE_REPORT
+
+
+class ScheduleIndex:
+    '''
+    Scheduled tests sorted by Start, so the events of any time window are found with a binary search
+    instead of a scan of the whole report.
+    '''
+    def __init__(self, schedule):
+        scheduled = schedule[schedule["Start"].notna() & schedule["End"].notna()]
+        self.events = scheduled.sort_values("Start", kind="stable")
+        self.starts = self.events["Start"].to_numpy()
+        # the longest test bounds how far before a window an overlapping test can start
+        durations = (self.events["End"] - self.events["Start"]).to_numpy()
+        self.max_duration = durations.max() if len(durations) else np.timedelta64(0, "ns")
+        # first day of each week (weeks start on Sunday, as the Week column did)
+        self.weeks = pd.DatetimeIndex(self.events["Start"].dt.to_period("W-SAT").dt.start_time.unique())
+
+    def window(self, start, end):
+        '''
+        Return the tests that overlap [start, end)
+        '''
+        start, end = np.datetime64(start, "ns"), np.datetime64(end, "ns")
+        lo = np.searchsorted(self.starts, start - self.max_duration, side="left")
+        hi = np.searchsorted(self.starts, end, side="left")
+        candidates = self.events.iloc[lo:hi]
+        return candidates[candidates["End"] > start]
+
+    def occupancy(self, start=None, end=None):
+        '''
+        Per-site, per-week totals of the tests that start in [start, end):
+        Site, WeekStart, WeekEnd, Tests, Hours
+        '''
+        events = self.events
+        if start is not None:
+            lo = np.searchsorted(self.starts, np.datetime64(start, "ns"), side="left")
+            hi = np.searchsorted(self.starts, np.datetime64(end, "ns"), side="left")
+            events = events.iloc[lo:hi]
+        weekly = pd.DataFrame({
+            "Site": events["Site"].astype(str),
+            "WeekStart": events["Start"].dt.to_period("W-SAT").dt.start_time,
+            "Hours": (events["End"] - events["Start"]).dt.total_seconds() / 3600,
+        })
+        weekly = weekly.groupby(["Site", "WeekStart"], as_index=False).agg(Tests=("Hours", "size"), Hours=("Hours", "sum"))
+        weekly["WeekEnd"] = weekly["WeekStart"] + pd.Timedelta(days=7)
+        return weekly
+
+
+# one index per version of the scheduling report, shared by all sessions
+_indexes = {}
+_lock = threading.Lock()
+
+
+def schedule_index():
+    """Return the ScheduleIndex of the current scheduling report, built once per report version."""
+    version = report_version(SCHEDULE_REPORT)
+    with _lock, span("figure", "schedule index") as record:
+        record["cache"] = "hit" if version in _indexes else "miss"
+        if version not in _indexes:
+            _indexes.clear()
+            _indexes[version] = ScheduleIndex(load_report(SCHEDULE_REPORT, copy=False))
+        return _indexes[version]
@@ -0,0 +1,73 @@
+import pandas as pd
+import threading
+
+from reportstore import load_report, report_version
+from diagnostics import span
+
+REQUIREMENTS_REPORT = "cubesatrequirements.csv"
+VERIFICATION_REPORT = "Query7_VerificationCheck.csv"
+
+
+class TraceIndex:
+    '''
+    Requirements traceability, built once per version of the requirement and verification reports.
+
+    Every requirement ID and name maps to its row, so looking one up is a dict access. The tests
+    and measured values of Query7_VerificationCheck are grouped by requirement ID.
+    '''
+    def __init__(self, requirements, verification):
+        self.requirements = requirements.reset_index(drop=True)
+        ids = self.requirements["Requirement ID"]
+        names = self.requirements["Requirement Name"]
+
+        # id or name -> row position
+        self.position_by_id = dict(zip(ids, range(len(ids))))
+        self.position_by_name = dict(zip(names, range(len(names))))
+        self.id_by_name = dict(zip(names, ids))
+
+        # requirement id -> the tests and measured values that verify it
+        self.measurements = {rid: group for rid, group in verification.groupby("MissionReq", sort=False)}
+
+        # the warnings of all requirements, each list computed in one pass over the columns
+        not_verified = "Requirement " + names[self.requirements["Verified By"].isna()].astype(str) + " is not verified by any analysis"
+        not_satisfied = "Requirement " + names[self.requirements["Satisfied By"].isna()].astype(str) + " is not satisfied by any mission element"
+        self.not_verified = not_verified.tolist()
+        self.not_satisfied = not_satisfied.tolist()
+        # both kinds together, in requirement order
+        self.warnings = pd.concat([not_verified, not_satisfied]).sort_index(kind="stable").tolist()
+
+    def by_id(self, rid):
+        '''
+        Return the requirement with this ID as a one-row DataFrame
+        '''
+        return self.requirements.iloc[[self.position_by_id[rid]]]
+
+    def by_name(self, name):
+        '''
+        Return the requirement with this name as a one-row DataFrame
+        '''
+        return self.requirements.iloc[[self.position_by_name[name]]]
+
+    def tests(self, rid):
+        '''
+        Return the tests and measured values recorded for a requirement ID, empty if there are none
+        '''
+        return self.measurements.get(rid, pd.DataFrame(columns=["TestName", "TestMeasurement", "Value", "MinValue", "Unit"]))
+
+
+# one index per version of the two reports, shared by all sessions
+_indexes = {}
+_lock = threading.Lock()
+
+
+def trace_index():
+    """Return the TraceIndex of the current reports, built once per data version."""
+    version = (report_version(REQUIREMENTS_REPORT, index_col=None), report_version(VERIFICATION_REPORT))
+    with _lock, span("figure", "trace index") as record:
+        record["cache"] = "hit" if version in _indexes else "miss"
+        if version not in _indexes:
+            _indexes.clear()
+            requirements = load_report(REQUIREMENTS_REPORT, index_col=None, copy=False)
+            requirements = requirements.drop(columns=["Verification Status", "Results"])
+            _indexes[version] = TraceIndex(requirements, load_report(VERIFICATION_REPORT, copy=False))
+        return _indexes[version]
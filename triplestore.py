@@ -0,0 +1,465 @@
+# to answer the Query1-Query7 reports from the model triples, without a SPARQL endpoint
+import numpy as np
+import pandas as pd
+import hashlib
+import os
+import re
+import sys
+import threading
+from urllib.parse import quote
+
+import reportstore
+
+# vocabulary of the model, the OML bundles publish their terms under these namespaces
+BASE = "http://uaontologies.com/dTEMP_Rover/bundle/"
+VOCAB = BASE + "properties#"
+CLASSES = BASE + "classes#"
+INDIVIDUALS = BASE + "individuals/"
+RDF_TYPE = "http://www.w3.org/1999/02/22-rdf-syntax-ns#type"
+TITLE = "http://purl.org/dc/elements/1.1/title"
+XSD = "http://www.w3.org/2001/XMLSchema#"
+
+# the export of the model that stands in for the endpoint, inside the reports folder
+TRIPLES_FILE = "model.nt"
+
+# one N-Triples statement: subject, predicate, then an IRI or a literal object
+_STATEMENT = re.compile(r'^(<[^>]*>)\s+(<[^>]*>)\s+(<[^>]*>|"(?:[^"\\]|\\.)*"(?:\^\^<[^>]*>|@[\w-]+)?)\s*\.\s*$', re.M)
+_LITERAL = re.compile(r'^"((?:[^"\\]|\\.)*)"(?:\^\^<([^>]*)>)?')
+
+
+def _term(value):
+    '''
+    Turn a short name into a full term: "type", "title" and "?vars" are kept, "Class:x" is a class
+    '''
+    if value.startswith("?"):
+        return value
+    if value == "type":
+        return f"<{RDF_TYPE}>"
+    if value == "title":
+        return f"<{TITLE}>"
+    if value.startswith("Class:"):
+        return f"<{CLASSES}{value[6:]}>"
+    return f"<{VOCAB}{value}>"
+
+
+def _unescape(text):
+    return text.replace('\\"', '"').replace("\\n", "\n").replace("\\\\", "\\")
+
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _literal_value(term):
+    '''
+    Return the Python value of a literal term, numbers as int or float, everything else as str
+    '''
+    match = _LITERAL.match(term)
+    text, datatype = _unescape(match.group(1)), match.group(2)
+    if datatype == XSD + "integer":
+        return int(text)
+    if datatype in (XSD + "decimal", XSD + "double"):
+        return float(text)
+    return text
+
+
+class TripleStore:
+    '''
+    The model triples, indexed for the precompiled report queries.
+
+    Every term is interned to an integer id, in order of first appearance. The triples are
+    partitioned by predicate, each partition is a (subject, object) table sorted by subject, so a
+    pattern with a fixed predicate is one lookup and the joins of a query are merges on integers.
+    '''
+    def __init__(self, text):
+        triples = np.array(_STATEMENT.findall(text), dtype=object).reshape(-1, 3)
+        # intern the terms, ids follow the order of the file
+        ids, self.terms = pd.factorize(triples.ravel(order="C"))
+        ids = ids.reshape(-1, 3)
+        self.count = len(ids)
+        self.id_of = {term: i for i, term in enumerate(self.terms)}
+
+        # python value of each literal, NaN for IRIs; the extra last slot decodes the -1 of an unmatched OPTIONAL
+        values = [_literal_value(t) if t.startswith('"') else np.nan for t in self.terms]
+        self.values = np.array(values + [np.nan], dtype=object)
+
+        # predicate id -> DataFrame(s, o) sorted by subject
+        order = np.lexsort((ids[:, 0], ids[:, 1]))
+        ids = ids[order]
+        bounds = np.flatnonzero(np.diff(ids[:, 1])) + 1
+        self.by_predicate = {}
+        for part in np.split(ids, bounds):
+            if len(part):
+                self.by_predicate[int(part[0, 1])] = pd.DataFrame({"s": part[:, 0], "o": part[:, 2]})
+
+    def match(self, s, p, o):
+        '''
+        Return the bindings of one triple pattern as a DataFrame with one column per variable
+        '''
+        pid = self.id_of.get(_term(p))
+        table = self.by_predicate.get(pid) if pid is not None else None
+        if table is None:
+            return pd.DataFrame({var: pd.Series(dtype=np.int64) for var in (s, o) if var.startswith("?")})
+        if not o.startswith("?"):
+            table = table[table["o"] == self.id_of.get(_term(o), -1)]
+        if not s.startswith("?"):
+            table = table[table["s"] == self.id_of.get(_term(s), -1)]
+        columns = {"s": s, "o": o}
+        keep = [col for col in ("s", "o") if columns[col].startswith("?")]
+        return table[keep].rename(columns=columns)
+
+    def solve(self, patterns, how="inner", into=None):
+        '''
+        Join the bindings of a group of patterns, then join the group into the solutions so far
+        '''
+        table = None
+        for pattern in patterns:
+            part = self.match(*pattern)
+            if table is None:
+                table = part
+            else:
+                shared = [col for col in part.columns if col in table.columns]
+                table = table.merge(part, on=shared, how="inner") if shared else table.merge(part, how="cross")
+        if into is None:
+            return table
+        shared = [col for col in table.columns if col in into.columns]
+        return into.merge(table, on=shared, how=how)
+
+
+class Query:
+    '''
+    A precompiled report query: required patterns, OPTIONAL groups and the selected columns.
+
+    Parameters:
+    where (list): (subject, predicate, object) patterns that every result matches
+    optional (list): groups of patterns, each joined like a SPARQL OPTIONAL block
+    select (dict): report column -> variable
+    order (list): variables whose first appearance in the model orders the rows, like ORDER BY
+    '''
+    def __init__(self, where, optional=(), select=None, order=None):
+        self.where = where
+        self.optional = optional
+        self.select = select
+        self.order = order or list(select.values())[:1]
+
+    def run(self, store):
+        table = store.solve(self.where)
+        for group in self.optional:
+            table = store.solve(group, how="left", into=table)
+        table = table.fillna(-1).astype(np.int64).sort_values(self.order, kind="stable")
+
+        report = {}
+        for column, var in self.select.items():
+            values = pd.Series(store.values[table[var].to_numpy()], dtype=object)
+            numbers = values.dropna()
+            # numeric literals give a numeric column, as does a column that never matched
+            if numbers.map(lambda v: isinstance(v, (int, float))).all():
+                values = pd.to_numeric(values)
+            report[column] = values
+        return reportstore._apply_types(pd.DataFrame(report))
+
+
+# ########## PRECOMPILED QUERIES
+# report file -> query, the results have the columns of the exported CSV
+QUERY_REPORTS = {
+    "Query1_MissionArchitecture 1.csv": Query(
+        where=[("?program", "type", "Class:Program"), ("?program", "title", "?programName"),
+               ("?program", "hasMission", "?mission"), ("?mission", "title", "?missionName"),
+               ("?mission", "hasComponent", "?component"), ("?component", "title", "?componentName")],
+        optional=[[("?component", "hasSubsystem", "?subsystem"), ("?subsystem", "title", "?subsystemName")]],
+        select={"ProgramName": "?programName", "MissionName": "?missionName",
+                "MissionComponentName": "?componentName", "SubsystemName": "?subsystemName"},
+        order=["?program", "?mission", "?component", "?subsystem"]),
+    "Query2_SystemArchitecture.csv": Query(
+        where=[("?system", "type", "Class:System"), ("?system", "title", "?systemName"),
+               ("?system", "hasSubsystem", "?subsystem"), ("?subsystem", "title", "?subsystemName")],
+        optional=[[("?subsystem", "hasSubsubsystem", "?subsub"), ("?subsub", "title", "?subsubName")]],
+        select={"SystemName": "?systemName", "SubsystemName": "?subsystemName", "SubsubsystemName": "?subsubName"},
+        order=["?system", "?subsystem", "?subsub"]),
+    "Query3_Decisions.csv": Query(
+        where=[("?review", "type", "Class:Review"), ("?review", "title", "?reviewName"),
+               ("?review", "hasDecision", "?decision"), ("?decision", "title", "?decisionName")],
+        optional=[[("?review", "reviewStart", "?start")],
+                  [("?decision", "milestone", "?milestone"), ("?milestone", "title", "?milestoneName")],
+                  [("?decision", "data", "?data")],
+                  [("?decision", "testData", "?testData")]],
+        select={"Review": "?reviewName", "Decision": "?decisionName", "ReviewStart": "?start",
+                "Milestone": "?milestoneName", "Data": "?data", "TestData": "?testData"},
+        order=["?decision"]),
+    "Query4_MOEs.csv": Query(
+        where=[("?mission", "type", "Class:Mission"), ("?mission", "title", "?missionName"),
+               ("?mission", "hasMOE", "?moe"), ("?moe", "title", "?moeName")],
+        select={"MissionName": "?missionName", "MOEName": "?moeName"},
+        order=["?mission", "?moe"]),
+    "Query5_KeyCapabilities 2.csv": Query(
+        where=[("?kc", "type", "Class:KeyCapability"), ("?kc", "title", "?kcName")],
+        optional=[[("?kc", "satisfiedBy", "?quantity"), ("?quantity", "title", "?quantityName")],
+                  [("?kc", "unit", "?unit")],
+                  [("?kc", "threshold", "?threshold")],
+                  [("?kc", "objective", "?objective")],
+                  [("?kc", "verifiedBy", "?method"), ("?method", "title", "?methodName")]],
+        select={"KCName": "?kcName", "SatisfiedBy": "?quantityName", "Unit": "?unit", "Threshold": "?threshold",
+                "Objective": "?objective", "VerificationMethodName": "?methodName"},
+        order=["?kc"]),
+    "Query6_Scheduling 2 copy.csv": Query(
+        where=[("?event", "type", "Class:TestEvent"),
+               ("?event", "verificationMethod", "?method"), ("?method", "identifier", "?vm"), ("?method", "title", "?vmName")],
+        optional=[[("?event", "integratedTestProgram", "?itp"), ("?itp", "title", "?itpName")],
+                  [("?event", "detailedTestPlan", "?dtp"), ("?dtp", "title", "?dtpName")],
+                  [("?event", "testSubject", "?subject"), ("?subject", "title", "?subjectName")],
+                  [("?event", "site", "?site"), ("?site", "title", "?siteName")],
+                  [("?event", "start", "?start")],
+                  [("?event", "end", "?end")]],
+        select={"ITPName": "?itpName", "DTPName": "?dtpName", "VM": "?vm", "VMName": "?vmName",
+                "TestSubjects": "?subjectName", "Site": "?siteName", "Start": "?start", "End": "?end"},
+        order=["?event"]),
+    "Query7_VerificationCheck.csv": Query(
+        where=[("?measurement", "type", "Class:Measurement"), ("?measurement", "title", "?measurementName"),
+               ("?measurement", "verifies", "?requirement"), ("?requirement", "identifier", "?reqId"),
+               ("?requirement", "title", "?reqName")],
+        optional=[[("?measurement", "quantity", "?quantity"), ("?quantity", "title", "?quantityName")],
+                  [("?measurement", "test", "?test"), ("?test", "title", "?testName")],
+                  [("?measurement", "testOutput", "?output"), ("?output", "title", "?outputName")],
+                  [("?measurement", "unit", "?unit")],
+                  [("?measurement", "value", "?value")],
+                  [("?measurement", "minValue", "?minValue")]],
+        select={"MissionReq": "?reqId", "MissionReqName": "?reqName", "SystemQuantity": "?quantityName",
+                "TestName": "?testName", "TestOutput": "?outputName", "TestMeasurement": "?measurementName",
+                "Unit": "?unit", "Value": "?value", "MinValue": "?minValue"},
+        order=["?measurement"]),
+}
+
+
+# ########## STORE AND RESULT CACHES
+# one store per version of the triples file, and the query results of that version
+_STORE = {}
+_RESULTS = {}
+_LOCK = threading.Lock()
+
+
+def _triples_path():
+    return os.path.join(reportstore.REPORTS_DIR, TRIPLES_FILE)
+
+
+def load_store():
+    """
+    Return the TripleStore of the triples file and its version, parsed once per file content.
+
+    Returns:
+    (TripleStore, str): the store and the sha1 of the triples file
+    """
+    path = _triples_path()
+    stat = os.stat(path)
+    stamp = (path, stat.st_mtime_ns, stat.st_size)
+    with _LOCK:
+        if _STORE.get("stamp") == stamp:
+            return _STORE["store"], _STORE["version"]
+        with open(path, "rb") as f:
+            content = f.read()
+        version = hashlib.sha1(content).hexdigest()
+        if _STORE.get("version") != version:
+            _STORE["store"] = TripleStore(content.decode("utf-8"))
+            _RESULTS.clear()
+        _STORE.update(stamp=stamp, version=version)
+        return _STORE["store"], version
+
+
+def query_report(name, index_col=0):
+    """
+    Return a report computed from the model triples, in the shape load_report gives for the CSV.
+
+    Parameters:
+    name (str): file name of the exported report, one of QUERY_REPORTS
+    index_col (int or None): 0 gives the row numbers as the index, None keeps them as the "Unnamed: 0" column
+
+    Returns:
+    (pandas.DataFrame, str): the report and the version of the graph it was computed from
+    """
+    store, version = load_store()
+    key = (name, index_col)
+    with _LOCK:
+        df = _RESULTS.get(key)
+    if df is None:
+        df = QUERY_REPORTS[name].run(store)
+        if index_col is None:
+            df.insert(0, "Unnamed: 0", np.arange(len(df)))
+        with _LOCK:
+            _RESULTS[key] = df
+    return df, version
+
+
+def clear_store():
+    """Drop the parsed triples and every query result held in memory."""
+    with _LOCK:
+        _STORE.clear()
+        _RESULTS.clear()
+
+
+# ########## EXPORT
+def _iri(kind, key):
+    return f"<{INDIVIDUALS}{kind}/{quote(str(key), safe='')}>"
+
+
+def _literal(value):
+    if isinstance(value, (bool, np.bool_)):
+        return f'"{str(value).lower()}"^^<{XSD}boolean>'
+    if isinstance(value, (int, np.integer)):
+        return f'"{value}"^^<{XSD}integer>'
+    if isinstance(value, (float, np.floating)):
+        return f'"{repr(float(value))}"^^<{XSD}decimal>'
+    return f'"{_escape(str(value))}"'
+
+
+class _Writer:
+    '''
+    Collects the statements of the export, each one once
+    '''
+    def __init__(self):
+        self.lines = {}
+
+    def add(self, s, p, o):
+        if o is None or (isinstance(o, float) and np.isnan(o)) or o is pd.NaT:
+            return
+        obj = o if isinstance(o, str) and o.startswith("<") else _literal(o)
+        self.lines.setdefault(f"{s} {_term(p)} {obj} .", None)
+
+    def entity(self, kind, key, title=None):
+        iri = _iri(kind, key)
+        self.add(iri, "type", _term(f"Class:{kind}"))
+        self.add(iri, "title", key if title is None else title)
+        return iri
+
+
+def _present(value):
+    return not (value is None or (isinstance(value, float) and np.isnan(value)))
+
+
+def _export_missions(w, df):
+    for row in df.itertuples(index=False):
+        program = w.entity("Program", row.ProgramName)
+        mission = w.entity("Mission", row.MissionName)
+        component = w.entity("MissionComponent", row.MissionComponentName)
+        w.add(program, "hasMission", mission)
+        w.add(mission, "hasComponent", component)
+        if _present(row.SubsystemName):
+            w.add(component, "hasSubsystem", w.entity("Subsystem", row.SubsystemName))
+
+
+def _export_systems(w, df):
+    for row in df.itertuples(index=False):
+        system = w.entity("System", row.SystemName)
+        subsystem = w.entity("Subsystem", row.SubsystemName)
+        w.add(system, "hasSubsystem", subsystem)
+        if _present(row.SubsubsystemName):
+            w.add(subsystem, "hasSubsubsystem", w.entity("Subsystem", row.SubsubsystemName))
+
+
+def _export_decisions(w, df):
+    for i, row in enumerate(df.itertuples(index=False)):
+        review = w.entity("Review", row.Review)
+        decision = w.entity("Decision", f"{row.Review}/{i}", row.Decision)
+        w.add(review, "hasDecision", decision)
+        if _present(row.ReviewStart):
+            w.add(review, "reviewStart", pd.Timestamp(row.ReviewStart).isoformat())
+        if _present(row.Milestone):
+            w.add(decision, "milestone", w.entity("Milestone", row.Milestone))
+        w.add(decision, "data", row.Data)
+        w.add(decision, "testData", row.TestData)
+
+
+def _export_moes(w, df):
+    for row in df.itertuples(index=False):
+        mission = w.entity("Mission", row.MissionName)
+        w.add(mission, "hasMOE", w.entity("MOE", f"{row.MissionName}/{row.MOEName}", row.MOEName))
+
+
+def _export_key_capabilities(w, df):
+    for i, row in enumerate(df.itertuples(index=False)):
+        kc = w.entity("KeyCapability", f"KC{i}", row.KCName)
+        if _present(row.SatisfiedBy):
+            w.add(kc, "satisfiedBy", w.entity("Quantity", row.SatisfiedBy))
+        w.add(kc, "unit", row.Unit)
+        w.add(kc, "threshold", row.Threshold)
+        w.add(kc, "objective", row.Objective)
+        if _present(row.VerificationMethodName):
+            w.add(kc, "verifiedBy", w.entity("VerificationMethod", row.VerificationMethodName))
+
+
+def _export_scheduling(w, df):
+    for i, row in enumerate(df.itertuples(index=False)):
+        event = w.entity("TestEvent", f"Event{i}", f"{row.VM} {i}")
+        method = _iri("TestMethod", row.VM)
+        w.add(method, "identifier", row.VM)
+        w.add(method, "title", row.VMName)
+        w.add(event, "verificationMethod", method)
+        for prop, kind, value in (("integratedTestProgram", "ITP", row.ITPName), ("detailedTestPlan", "DTP", row.DTPName),
+                                  ("testSubject", "TestSubject", row.TestSubjects), ("site", "Site", row.Site)):
+            if _present(value):
+                w.add(event, prop, w.entity(kind, value))
+        for prop, value in (("start", row.Start), ("end", row.End)):
+            if _present(value):
+                w.add(event, prop, pd.Timestamp(value).isoformat())
+
+
+def _export_verification(w, df):
+    for i, row in enumerate(df.itertuples(index=False)):
+        measurement = w.entity("Measurement", f"Measurement{i}", row.TestMeasurement)
+        requirement = _iri("Requirement", row.MissionReq)
+        w.add(requirement, "identifier", row.MissionReq)
+        w.add(requirement, "title", row.MissionReqName)
+        w.add(measurement, "verifies", requirement)
+        for prop, kind, value in (("quantity", "Quantity", row.SystemQuantity), ("test", "Test", row.TestName),
+                                  ("testOutput", "TestOutput", row.TestOutput)):
+            if _present(value):
+                w.add(measurement, prop, w.entity(kind, value))
+        w.add(measurement, "unit", row.Unit)
+        w.add(measurement, "value", row.Value)
+        w.add(measurement, "minValue", row.MinValue)
+
+
+# report file -> function that adds the triples of the report rows
+EXPORTS = {
+    "Query1_MissionArchitecture 1.csv": _export_missions,
+    "Query2_SystemArchitecture.csv": _export_systems,
+    "Query3_Decisions.csv": _export_decisions,
+    "Query4_MOEs.csv": _export_moes,
+    "Query5_KeyCapabilities 2.csv": _export_key_capabilities,
+    "Query6_Scheduling 2 copy.csv": _export_scheduling,
+    "Query7_VerificationCheck.csv": _export_verification,
+}
+
+
+def export_triples(path=None):
+    """
+    Write the triples behind the Query1-Query7 reports, from the reports in the reports folder.
+
+    The file stands in for the model endpoint: the precompiled queries give back the same reports.
+    Reports missing from the folder are skipped.
+
+    Parameters:
+    path (str): file to write, the TRIPLES_FILE of the reports folder by default
+
+    Returns:
+    int: number of triples written
+    """
+    w = _Writer()
+    for name, export in EXPORTS.items():
+        path_csv = os.path.join(reportstore.REPORTS_DIR, name)
+        if os.path.exists(path_csv):
+            # read the CSV itself, whatever backend the report store uses
+            df = reportstore._apply_types(pd.read_csv(path_csv, index_col=0))
+            export(w, df.astype(object).where(df.notna(), None))
+
+    path = path or _triples_path()
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("\n".join(w.lines) + "\n")
+    os.replace(tmp, path)
+    return len(w.lines)
+
+
+if __name__ == "__main__":
+    # python triplestore.py [reports folder]: write the model file from the exported reports
+    if len(sys.argv) > 1:
+        reportstore.use_reports_dir(sys.argv[1])
+    print(f"{export_triples()} triples written to {_triples_path()}")
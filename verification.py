@@ -0,0 +1,141 @@
+# to evaluate the measured values of the verification report against their minimum values
+import numpy as np
+import pandas as pd
+import threading
+
+from reportstore import load_report, report_version
+from diagnostics import span
+from traceability import VERIFICATION_REPORT
+
+UNITS_REPORT = "Units.csv"
+
+# unit -> (symbol, scale, offset) to the base unit of its dimension: base = value * scale + offset.
+# units of Units.csv that are not listed here are compared in their own unit
+UNIT_CONVERSIONS = {
+    "W": ("W", 1.0, 0.0),
+    "Wh": ("Wh", 3600.0, 0.0),
+    "day": ("d", 86400.0, 0.0),
+    "second": ("s", 1.0, 0.0),
+    "degC": ("°C", 1.0, 273.15),
+    "degF": ("°F", 5 / 9, 273.15 - 32 * 5 / 9),
+    "degK": ("K", 1.0, 0.0),
+    "degrees": ("deg", np.pi / 180, 0.0),
+    "radians": ("rad", 1.0, 0.0),
+    "kilogram": ("kg", 1.0, 0.0),
+    "km": ("km", 1000.0, 0.0),
+    "metre": ("m", 1.0, 0.0),
+    "percentage": ("%", 0.01, 0.0),
+    "percent": ("%", 0.01, 0.0),
+    "n-a": ("", 1.0, 0.0),
+    "na": ("", 1.0, 0.0),
+}
+# the outcome of a measurement, and of a requirement: its worst measurement, in this order
+STATUSES = ["fail", "unknown", "pass"]
+
+
+def unit_table(units):
+    '''
+    Conversion table indexed by unit: Dimension, Symbol, Scale, Offset.
+    A unit listed under several dimensions (percentage) gets one row with the dimensions joined
+    '''
+    table = units.dropna(subset=["Unit"]).groupby("Unit", sort=False)["Dimension"] \
+        .agg(lambda x: "/".join(x.dropna().astype(str))).to_frame()
+    # the units the code knows but the report does not list, e.g. "percent"
+    table = table.reindex(table.index.union(pd.Index(list(UNIT_CONVERSIONS), name="Unit"), sort=False))
+    known = pd.DataFrame.from_dict(UNIT_CONVERSIONS, orient="index", columns=["Symbol", "Scale", "Offset"])
+    table = table.join(known)
+    table["Symbol"] = table["Symbol"].fillna(pd.Series(table.index, index=table.index))
+    table["Scale"] = table["Scale"].fillna(1.0)
+    table["Offset"] = table["Offset"].fillna(0.0)
+    return table
+
+
+def evaluate(verification, table):
+    """
+    Compare every measured value with its minimum value, in one pass over the columns.
+
+    The value and the minimum are converted to the base unit of their dimension first, so a minimum given in
+    another unit (optional MinUnit column) is compared correctly. A measurement with no value or no minimum is "unknown".
+
+    Parameters:
+    verification (pandas.DataFrame): the verification report
+    table (pandas.DataFrame): the unit_table
+
+    Returns:
+    pandas.DataFrame: the report with the columns Symbol, Status, Margin (in the unit of the value) and
+    Margin (%) (relative to the minimum) added
+    """
+    units = verification["Unit"]
+    min_units = verification["MinUnit"].fillna(units) if "MinUnit" in verification else units
+    # unknown and missing units are taken as they are: scale 1, offset 0
+    scale = table["Scale"].reindex(units).fillna(1.0).to_numpy()
+    offset = table["Offset"].reindex(units).fillna(0.0).to_numpy()
+    min_scale = table["Scale"].reindex(min_units).fillna(1.0).to_numpy()
+    min_offset = table["Offset"].reindex(min_units).fillna(0.0).to_numpy()
+
+    value = pd.to_numeric(verification["Value"], errors="coerce").to_numpy(dtype=float) * scale + offset
+    minimum = pd.to_numeric(verification["MinValue"], errors="coerce").to_numpy(dtype=float) * min_scale + min_offset
+    margin = value - minimum
+    with np.errstate(divide="ignore", invalid="ignore"):
+        relative = np.where(minimum != 0, margin / np.abs(minimum) * 100, np.nan)
+
+    result = verification.copy()
+    result["Symbol"] = table["Symbol"].reindex(units).fillna("").to_numpy()
+    result["Status"] = np.select([np.isnan(margin), margin >= 0], ["unknown", "pass"], "fail")
+    result["Margin"] = margin / scale
+    result["Margin (%)"] = relative
+    return result
+
+
+def rollup(evaluation):
+    """
+    Roll the measurements up by mission requirement: a requirement fails when one of its measurements fails,
+    is unknown when one is unknown, and passes otherwise.
+
+    Returns:
+    pandas.DataFrame: one row per requirement with MissionReq, MissionReqName, Measurements, Passed, Failed,
+    Unknown, Worst Margin (%) and Status, in report order
+    """
+    status = evaluation["Status"]
+    grouped = pd.DataFrame({
+        "MissionReq": evaluation["MissionReq"],
+        "MissionReqName": evaluation["MissionReqName"],
+        "Passed": status.eq("pass"),
+        "Failed": status.eq("fail"),
+        "Unknown": status.eq("unknown"),
+        "Margin (%)": evaluation["Margin (%)"],
+    }).groupby("MissionReq", sort=False)
+    summary = grouped.agg(**{
+        "MissionReqName": ("MissionReqName", "first"),
+        "Measurements": ("Passed", "size"),
+        "Passed": ("Passed", "sum"),
+        "Failed": ("Failed", "sum"),
+        "Unknown": ("Unknown", "sum"),
+        "Worst Margin (%)": ("Margin (%)", "min"),
+    }).reset_index()
+    summary["Status"] = np.select([summary["Failed"] > 0, summary["Unknown"] > 0], ["fail", "unknown"], "pass")
+    return summary
+
+
+# ########## PUBLIC FUNCTION
+# one evaluation per version of the verification and units reports, shared by all sessions
+_results = {}
+_lock = threading.Lock()
+
+
+def verification_results():
+    """
+    Return the evaluated measurements and their roll-up by requirement, computed once per data version.
+
+    Returns:
+    evaluation (pandas.DataFrame): see evaluate
+    requirements (pandas.DataFrame): see rollup
+    """
+    version = (report_version(VERIFICATION_REPORT), report_version(UNITS_REPORT))
+    with _lock, span("figure", "verification results") as record:
+        record["cache"] = "hit" if version in _results else "miss"
+        if version not in _results:
+            _results.clear()
+            evaluation = evaluate(load_report(VERIFICATION_REPORT, copy=False), unit_table(load_report(UNITS_REPORT, copy=False)))
+            _results[version] = (evaluation, rollup(evaluation))
+        return _results[version]